@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# benchmarks/bench_analyze.py
+# 多数ユーザー・長期間の日次指標に対する異常検知の時間計測
+# 合成したレディネス・睡眠データをCOPYで投入し、analyze_users の読み込み・採点・書き込みを計測して投入分を削除する
+# RELEVANT FILES: ../src/healthhub_batch/analytics.py
+
+"""Benchmark: anomaly detection over many users and years of daily metrics.
+
+Usage:
+    python benchmarks/bench_analyze.py --db-url postgresql://localhost/postgres
+    python benchmarks/bench_analyze.py --db-url ... --users 1000 --years 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+import structlog
+from sqlalchemy import text
+
+# プロジェクトルートをPATHに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from healthhub_batch.analytics import ANOMALIES_TABLE, analyze_users  # noqa: E402
+from healthhub_batch.config import Settings  # noqa: E402
+from healthhub_batch.database import Database  # noqa: E402
+from healthhub_batch.db_models import (  # noqa: E402
+    Base,
+    DailyReadinessSummary,
+    DailySleepSummary,
+)
+
+END_DAY = date(2024, 12, 31)
+OUTLIER_RATE = 0.002  # 外れ値を入れる日の割合
+
+
+def bench_user_ids(users: int) -> list[UUID]:
+    return [UUID(int=0xA0A0_0000_0000 + i) for i in range(users)]
+
+
+def _synthetic(days: int, rng: np.random.Generator, low: int, high: int) -> np.ndarray:
+    """ゆっくり変わる水準 + ノイズ + まれな外れ値（欠損日は NaN）"""
+    level = np.cumsum(rng.normal(0, 0.3, days)) * 0.2 + (low + high) / 2
+    values = np.clip(np.round(level + rng.normal(0, 4, days)), low, high)
+    outliers = rng.random(days) < OUTLIER_RATE
+    values[outliers] = np.clip(values[outliers] - 40, low, high)
+    values[rng.random(days) < 0.05] = np.nan
+    return values
+
+
+async def seed(db: Database, user_ids: list[UUID], days: int) -> int:
+    """ユーザーごとにレディネス・睡眠の行をCOPYで投入"""
+    rng = np.random.default_rng(0)
+    day_list = [END_DAY - timedelta(days=days - 1 - i) for i in range(days)]
+    rows = 0
+    async with db.engine.connect() as conn:
+        pg_conn = (await conn.get_raw_connection()).driver_connection
+        for n, user_id in enumerate(user_ids):
+            readiness = [_synthetic(days, rng, 40, 100) for _ in range(3)]
+            temperature = np.round(rng.normal(0, 0.3, days), 2)
+            sleep = _synthetic(days, rng, 40, 100)
+
+            def _int(value: float) -> int | None:
+                return None if np.isnan(value) else int(value)
+
+            await pg_conn.copy_records_to_table(
+                DailyReadinessSummary.__tablename__,
+                schema_name="healthhub",
+                columns=[
+                    "user_id",
+                    "day",
+                    "score",
+                    "temperature_deviation",
+                    "contributors_hrv_balance",
+                    "contributors_resting_heart_rate",
+                    "document_id",
+                ],
+                records=[
+                    (
+                        user_id,
+                        day,
+                        _int(readiness[0][i]),
+                        float(temperature[i]),
+                        _int(readiness[1][i]),
+                        _int(readiness[2][i]),
+                        UUID(int=(n << 32) + i),
+                    )
+                    for i, day in enumerate(day_list)
+                ],
+            )
+            await pg_conn.copy_records_to_table(
+                DailySleepSummary.__tablename__,
+                schema_name="healthhub",
+                columns=["user_id", "day", "score", "document_id"],
+                records=[
+                    (user_id, day, _int(sleep[i]), UUID(int=(1 << 63) + (n << 32) + i))
+                    for i, day in enumerate(day_list)
+                ],
+            )
+            rows += 2 * days
+    return rows
+
+
+async def cleanup(db: Database, user_ids: list[UUID]) -> None:
+    async with db.engine.begin() as conn:
+        for table in (
+            DailyReadinessSummary.__table__.fullname,
+            DailySleepSummary.__table__.fullname,
+            ANOMALIES_TABLE,
+        ):
+            await conn.execute(
+                text(f"DELETE FROM {table} WHERE user_id = ANY(:ids)"), {"ids": user_ids}
+            )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", required=True, help="Local PostgreSQL URL")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--years", type=float, default=10.0)
+    parser.add_argument("--user-batch", type=int, default=100)
+    parser.add_argument("--window", type=int, default=28)
+    args = parser.parse_args()
+
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    settings = Settings(oura_pat="unused", supabase_db_url=args.db_url)
+    db = Database(settings)
+    async with db.engine.begin() as conn:
+        await conn.execute(text("CREATE SCHEMA IF NOT EXISTS healthhub"))
+        await conn.run_sync(Base.metadata.create_all)
+
+    user_ids = bench_user_ids(args.users)
+    days = int(args.years * 365)
+    start_day = END_DAY - timedelta(days=days - 1)
+
+    print("\n=== Anomaly Detection Benchmark ===")
+    try:
+        started = time.perf_counter()
+        rows = await seed(db, user_ids, days)
+        async with db.engine.begin() as conn:
+            await conn.execute(text("ANALYZE healthhub.daily_readiness_summaries"))
+            await conn.execute(text("ANALYZE healthhub.daily_sleep_summaries"))
+        print(f"seed       {time.perf_counter() - started:7.2f} s  {rows} rows")
+
+        for label in ("initial", "re-run"):
+            started = time.perf_counter()
+            result = await analyze_users(
+                db,
+                user_ids,
+                start_day,
+                END_DAY,
+                window=args.window,
+                user_batch=args.user_batch,
+            )
+            elapsed = time.perf_counter() - started
+            print(
+                f"{label:<10} {elapsed:7.2f} s  users={result.users} "
+                f"scored={result.scored} anomalies={result.anomalies} "
+                f"({result.scored / elapsed:,.0f} scores/s)"
+            )
+    finally:
+        await cleanup(db, user_ids)
+        await db.close()
+    print("=" * 30 + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# benchmarks/bench_heartrate.py
+# 1ユーザー・1年分の心拍数時系列の取り込み時間計測
+# フェイクAPIから日時ウィンドウで並列取得し、月パーティションへ「範囲DELETE + COPY」する。2回目は再取り込み（置き換え）の計測
+# RELEVANT FILES: ../src/healthhub_batch/heartrate.py, fake_oura_server.py
+
+"""Benchmark: one year of heart rate samples into the partitioned table.
+
+Usage:
+    python benchmarks/bench_heartrate.py --db-url postgresql://localhost/postgres
+    python benchmarks/bench_heartrate.py --db-url ... --interval 60 --window-days 7
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from uuid import UUID
+
+import httpx
+import structlog
+from sqlalchemy import text
+
+# プロジェクトルートをPATHに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer  # noqa: E402
+
+from healthhub_batch.config import Settings  # noqa: E402
+from healthhub_batch.database import Database  # noqa: E402
+from healthhub_batch.db_models import Base  # noqa: E402
+from healthhub_batch.heartrate import ingest_heartrate  # noqa: E402
+from healthhub_batch.oura_client import OuraClient  # noqa: E402
+
+BENCH_USER_ID = UUID("00000000-0000-0000-0000-00000000b0b0")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", required=True, help="Local PostgreSQL URL")
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between samples")
+    parser.add_argument("--page-size", type=int, default=10_000, help="Samples per page")
+    parser.add_argument("--window-days", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # リクエストごとのinfoログは計測を歪めるので警告以上だけ出す
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    config = FakeOuraConfig(
+        years=args.years,
+        heartrate_interval=args.interval,
+        heartrate_page_size=args.page_size,
+        latency=args.latency_ms / 1000,
+    )
+    server = FakeOuraServer(config)
+    settings = Settings(oura_pat="unused", supabase_db_url=args.db_url)
+    db = Database(settings)
+    async with db.engine.begin() as conn:
+        await conn.execute(text("CREATE SCHEMA IF NOT EXISTS healthhub"))
+        await conn.run_sync(Base.metadata.create_all)
+
+    start = config.heartrate_start
+    end = start + timedelta(days=(config.end_day - config.start_day).days + 1)
+
+    print("\n=== Heart Rate Ingestion Benchmark ===")
+    print(
+        f"samples={config.heartrate_samples} interval={args.interval}s "
+        f"window={args.window_days}d concurrency={args.concurrency} latency={args.latency_ms:g}ms"
+    )
+    http_client = httpx.AsyncClient(transport=server.transport(), base_url=server.base_url)
+    async with http_client, OuraClient(server.token(0), http_client=http_client) as client:
+        for label in ("initial", "re-ingest"):
+            requests_before = server.requests
+            started = time.perf_counter()
+            results = await ingest_heartrate(
+                client, db, BENCH_USER_ID, start, end, args.window_days, args.concurrency
+            )
+            elapsed = time.perf_counter() - started
+            samples = sum(r.samples for r in results)
+            print(
+                f"{label:<10} {elapsed:7.2f} s  {samples:>9} samples  "
+                f"{sum(r.replaced for r in results):>9} replaced  "
+                f"{samples / elapsed:>9.0f} samples/s  "
+                f"{server.requests - requests_before} requests  "
+                f"{sum(1 for r in results if not r.ok)} failed windows"
+            )
+    await db.close()
+    print("=" * 30 + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# benchmarks/bench_parse.py
+# 1年分のdaily_activityレスポンスのパース時間計測
+# 従来方式（response.json() + DailyActivity(**item) のループ）とバイト列からの直接バリデーションを比較する
+# RELEVANT FILES: ../src/healthhub_batch/parsing.py, fake_oura_server.py
+
+"""Microbenchmark: json.loads + model loop vs TypeAdapter.validate_json.
+
+Usage:
+    python benchmarks/bench_parse.py --days 365 --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+# プロジェクトルートをPATHに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer  # noqa: E402
+
+from healthhub_batch.models import DailyActivity  # noqa: E402
+from healthhub_batch.parsing import parse_page  # noqa: E402
+
+
+def legacy_parse(body: bytes) -> list[DailyActivity]:
+    """従来方式：dictにデコードしてから1件ずつモデルを生成"""
+    data = json.loads(body)
+    return [DailyActivity(**item) for item in data["data"]]
+
+
+def direct_parse(body: bytes) -> list[DailyActivity]:
+    """バイト列から直接バリデーション"""
+    return parse_page(body, DailyActivity, "daily_activity").records
+
+
+def measure(parse: Callable[[bytes], list[Any]], body: bytes, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse(body)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365, help="Records in the response")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    server = FakeOuraServer(FakeOuraConfig(years=args.days / 365))
+    start = server.config.end_day - timedelta(days=args.days - 1)
+    data = [
+        server.document(0, "daily_activity", start + timedelta(days=i)) for i in range(args.days)
+    ]
+    body = json.dumps({"data": data, "next_token": None}).encode()
+
+    # 結果が一致することを確認してから計測
+    assert legacy_parse(body) == direct_parse(body)
+    # ウォームアップ（TypeAdapterの構築を計測から除く）
+    measure(direct_parse, body, 1)
+    measure(legacy_parse, body, 1)
+
+    results = [
+        ("json.loads + model(**item)", measure(legacy_parse, body, args.repeat)),
+        ("TypeAdapter.validate_json", measure(direct_parse, body, args.repeat)),
+    ]
+
+    print("\n=== Parse Benchmark (daily_activity) ===")
+    print(f"records={args.days} body={len(body) / 1024 / 1024:.1f} MiB repeat={args.repeat}")
+    baseline = statistics.median(results[0][1])
+    for label, timings in results:
+        median = statistics.median(timings)
+        print(
+            f"{label:<28} median {median * 1000:8.2f} ms  min {min(timings) * 1000:8.2f} ms  "
+            f"{args.days / median:10.0f} records/sec  x{baseline / median:.1f}"
+        )
+    print("=" * 30 + "\n")
+
+
+if __name__ == "__main__":
+    main()
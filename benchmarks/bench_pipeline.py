@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# benchmarks/bench_pipeline.py
+# フェイクOura API（fake_oura_server.py）に対する取得 → パース → 保存のエンドツーエンド計測
+# ステージごとのrequests/sec・records/sec・p95レイテンシと、ピークメモリを表示する
+# RELEVANT FILES: fake_oura_server.py, ../src/healthhub_batch/fetcher.py, bench_upsert.py
+
+"""End-to-end throughput benchmark against the fake Oura API.
+
+Usage:
+    python benchmarks/bench_pipeline.py --users 4 --years 2
+    python benchmarks/bench_pipeline.py --users 4 --years 2 \\
+        --db-url postgresql://postgres@localhost/postgres --load-mode copy
+
+Each (user, window) job runs the stages of ``fetch_and_save_data``:
+``fetch_all_data`` (fetch), ``parse_raw_data`` (parse) and, when
+``--db-url`` is given, ``save_parsed_data`` (save). Without a database only
+fetch and parse are measured. The database must be disposable.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+from uuid import UUID
+
+import httpx
+import structlog
+
+# プロジェクトルートをPATHに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from healthhub_batch.backfill import split_date_range  # noqa: E402
+from healthhub_batch.config import Settings  # noqa: E402
+from healthhub_batch.database import Database  # noqa: E402
+from healthhub_batch.db_models import Base  # noqa: E402
+from healthhub_batch.fetcher import (  # noqa: E402
+    LoadMode,
+    fetch_all_data,
+    parse_raw_data,
+    save_parsed_data,
+)
+from healthhub_batch.oura_client import OuraClient  # noqa: E402
+
+
+class TimingTransport(httpx.AsyncBaseTransport):
+    """Record the latency of every HTTP request."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport) -> None:
+        self.inner = inner
+        self.latencies: list[float] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        self.latencies.append(time.perf_counter() - started)
+        return response
+
+
+class StageStats:
+    """Durations and record counts per stage."""
+
+    def __init__(self) -> None:
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self.records: dict[str, int] = defaultdict(int)
+
+    def add(self, stage: str, seconds: float, records: int) -> None:
+        self.durations[stage].append(seconds)
+        self.records[stage] += records
+
+
+def p95(values: list[float]) -> float:
+    """95th percentile (nearest rank)."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=20, method="inclusive")[-1]
+
+
+async def run_job(
+    server: FakeOuraServer,
+    http_client: httpx.AsyncClient,
+    user: int,
+    window: tuple,
+    settings: Settings,
+    db: Database | None,
+    load_mode: LoadMode,
+    stats: StageStats,
+) -> None:
+    """1ユーザー・1ウィンドウ分を fetch → parse → save で実行し、ステージごとに計測"""
+    start_date, end_date = (d.isoformat() for d in window)
+    client = OuraClient.from_settings(settings, server.token(user), http_client)
+
+    async with client:
+        started = time.perf_counter()
+        raw = await fetch_all_data(start_date, end_date, settings, client=client)
+        records = sum(len(r.get("data", [])) for r in raw.values())
+        stats.add("fetch", time.perf_counter() - started, records)
+
+    started = time.perf_counter()
+    parsed = parse_raw_data(raw)
+    stats.add("parse", time.perf_counter() - started, sum(len(v) for v in parsed.values()))
+
+    if db is not None:
+        started = time.perf_counter()
+        counts = await save_parsed_data(parsed, UUID(int=user + 1), settings, db, load_mode)
+        stats.add("save", time.perf_counter() - started, sum(c.total for c in counts.values()))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--window-days", type=int, default=30, help="Days per fetch job")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent jobs")
+    parser.add_argument("--page-size", type=int, default=30, help="Days per API page")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake API latency")
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=1000.0, help="Client requests/sec")
+    parser.add_argument("--db-url", help="Local PostgreSQL URL (enables the save stage)")
+    parser.add_argument("--load-mode", type=LoadMode, default=LoadMode.ORM)
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="Track peak memory with tracemalloc (slower)"
+    )
+    args = parser.parse_args()
+
+    # リクエストごとのinfoログは計測を歪めるので警告以上だけ出す
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    config = FakeOuraConfig(
+        users=args.users,
+        years=args.years,
+        page_size=args.page_size,
+        latency=args.latency_ms / 1000,
+        error_rate_429=args.error_rate_429,
+        error_rate_5xx=args.error_rate_5xx,
+    )
+    server = FakeOuraServer(config)
+    transport = TimingTransport(server.transport())
+
+    settings = Settings(
+        oura_pat="unused",
+        supabase_db_url=args.db_url or "postgresql://unused",
+        oura_rate_limit_per_second=args.rate_limit,
+        oura_rate_limit_burst=max(1, int(args.rate_limit)),
+    )
+    db = None
+    if args.db_url:
+        db = Database(settings)
+        async with db.engine.begin() as conn:
+            await conn.execute(text("CREATE SCHEMA IF NOT EXISTS healthhub"))
+            await conn.run_sync(Base.metadata.create_all)
+
+    windows = split_date_range(config.start_day, config.end_day, args.window_days)
+    jobs = [(user, window) for user in range(args.users) for window in windows]
+    stats = StageStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(user: int, window: tuple) -> None:
+        async with semaphore:
+            await run_job(server, http_client, user, window, settings, db, args.load_mode, stats)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url=server.base_url) as http_client:
+        await asyncio.gather(*(bounded(user, window) for user, window in jobs))
+    elapsed = time.perf_counter() - started
+    peak_traced = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+    if db is not None:
+        await db.close()
+
+    days = (config.end_day - config.start_day + timedelta(days=1)).days
+    print("\n=== Pipeline Benchmark ===")
+    print(
+        f"users={args.users} days={days} jobs={len(jobs)} concurrency={args.concurrency} "
+        f"latency={args.latency_ms:g}ms load_mode={args.load_mode.value if db else '-'}"
+    )
+    print(
+        f"requests: {server.requests}  ({server.requests / elapsed:.0f} req/s, "
+        f"p95 {p95(transport.latencies) * 1000:.1f} ms, "
+        f"429={server.errors[429]} 5xx={server.errors[503]})"
+    )
+    for stage, durations in stats.durations.items():
+        busy = sum(durations)
+        print(
+            f"{stage:<6} {stats.records[stage]:>8} records  "
+            f"{stats.records[stage] / elapsed:>9.0f} rec/s (wall)  "
+            f"{stats.records[stage] / busy if busy else 0:>9.0f} rec/s (busy)  "
+            f"p95 {p95(durations) * 1000:8.1f} ms/job"
+        )
+    print(f"total  {elapsed:.2f} s")
+    if peak_traced is not None:
+        print(f"peak traced memory: {peak_traced / 1024 / 1024:.1f} MiB")
+    print(f"max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+    print("=" * 30 + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# benchmarks/bench_upsert.py
+# HealthDataRepository のupsertスループット計測（ローカルPostgreSQL用）
+# 1行1ステートメント（従来方式）と複数行INSERTのrows/secを比較する
+# RELEVANT FILES: ../src/healthhub_batch/repository.py, ../src/healthhub_batch/db_models.py
+
+"""Benchmark per-row vs multi-row upserts against a local PostgreSQL.
+
+Usage:
+    python benchmarks/bench_upsert.py --db-url postgresql://postgres@localhost/postgres
+
+The target database must be disposable: the ``healthhub`` schema and summary
+tables are created if missing, and benchmark rows are written under random
+user IDs.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+# プロジェクトルートをPATHに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from healthhub_batch.db_models import Base, DailyActivitySummary, DailySleepSummary
+from healthhub_batch.models import DailyActivity, DailySleep
+from healthhub_batch.repository import HealthDataRepository, activity_to_row, sleep_to_row
+
+
+def make_sleep(days: int) -> list[DailySleep]:
+    """ベンチマーク用の睡眠データを生成"""
+    start = date(2020, 1, 1)
+    return [
+        DailySleep(
+            id=str(uuid4()),
+            day=start + timedelta(days=i),
+            score=60 + i % 40,
+            timestamp=datetime(2020, 1, 1, tzinfo=timezone.utc) + timedelta(days=i),
+            contributors={
+                "deep_sleep": 70,
+                "efficiency": 80,
+                "latency": 90,
+                "rem_sleep": 60,
+                "restfulness": 75,
+                "timing": 85,
+                "total_sleep": 65,
+            },
+        )
+        for i in range(days)
+    ]
+
+
+def make_activity(days: int) -> list[DailyActivity]:
+    """ベンチマーク用の活動データを生成"""
+    start = date(2020, 1, 1)
+    return [
+        DailyActivity(
+            id=str(uuid4()),
+            day=start + timedelta(days=i),
+            score=50 + i % 50,
+            active_calories=300 + i % 200,
+            average_met_minutes=1.5,
+            contributors={
+                "meet_daily_targets": 60,
+                "move_every_hour": 70,
+                "recovery_time": 80,
+                "stay_active": 90,
+                "training_frequency": 50,
+                "training_volume": 40,
+            },
+            equivalent_walking_distance=5000,
+            high_activity_met_minutes=10,
+            high_activity_time=600,
+            inactivity_alerts=1,
+            low_activity_met_minutes=100,
+            low_activity_time=10000,
+            medium_activity_met_minutes=50,
+            medium_activity_time=3000,
+            meters_to_target=1000,
+            non_wear_time=0,
+            resting_time=30000,
+            sedentary_met_minutes=20,
+            sedentary_time=20000,
+            steps=8000 + i,
+            target_calories=500,
+            target_meters=8000,
+            total_calories=2200,
+            timestamp=datetime(2020, 1, 1, tzinfo=timezone.utc) + timedelta(days=i),
+        )
+        for i in range(days)
+    ]
+
+
+async def legacy_upsert(session: AsyncSession, model: type[Base], rows: list[dict]) -> None:
+    """従来方式：1レコードごとにINSERT ... ON CONFLICTを組み立てて実行"""
+    for values in rows:
+        stmt = insert(model).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "day"],
+            set_={
+                k: getattr(stmt.excluded, k)
+                for k in values.keys()
+                if k not in ["user_id", "day", "created_at"]
+            },
+        )
+        await session.execute(stmt)
+
+
+async def run_case(
+    engine: AsyncEngine, label: str, batch_size: int | None, days: int
+) -> tuple[str, int, float]:
+    """1ケース分（睡眠 + 活動）のupsertを実行し、経過時間を返す
+
+    batch_size が None の場合は従来方式（1行1ステートメント）で実行する。
+    """
+    sleep_data = make_sleep(days)
+    activity_data = make_activity(days)
+    user_id = uuid4()
+
+    started = time.perf_counter()
+    async with AsyncSession(engine) as session:
+        if batch_size is None:
+            await legacy_upsert(
+                session, DailySleepSummary, [sleep_to_row(user_id, x) for x in sleep_data]
+            )
+            await legacy_upsert(
+                session,
+                DailyActivitySummary,
+                [activity_to_row(user_id, x) for x in activity_data],
+            )
+        else:
+            repo = HealthDataRepository(session, user_id, batch_size=batch_size)
+            await repo.upsert_sleep_data(sleep_data)
+            await repo.upsert_activity_data(activity_data)
+        await session.commit()
+    elapsed = time.perf_counter() - started
+
+    return label, len(sleep_data) + len(activity_data), elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", required=True, help="Local PostgreSQL URL")
+    parser.add_argument("--days", type=int, default=730, help="Days per table (default: 730)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per statement")
+    args = parser.parse_args()
+
+    db_url = args.db_url
+    if db_url.startswith("postgresql://"):
+        db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    engine = create_async_engine(db_url)
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE SCHEMA IF NOT EXISTS healthhub"))
+        await conn.run_sync(Base.metadata.create_all)
+
+    # ウォームアップ（接続確立・型情報のキャッシュ）
+    await run_case(engine, "warmup", args.batch_size, 7)
+
+    results = [
+        await run_case(engine, "per-row (legacy)", None, args.days),
+        await run_case(engine, f"multi-row (batch_size={args.batch_size})", args.batch_size, args.days),
+    ]
+    await engine.dispose()
+
+    print("\n=== Upsert Benchmark ===")
+    baseline = results[0][1] / results[0][2]
+    for label, rows, elapsed in results:
+        rate = rows / elapsed
+        print(f"{label:<32} {rows:>6} rows  {elapsed:8.3f} s  {rate:10.0f} rows/sec  x{rate / baseline:.1f}")
+    print("=" * 30 + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# benchmarks/fake_oura_server.py
+# docs/oura_openapi.json のスキーマから決定的な合成データを返すOura API v2のフェイク
+# ページネーション・レイテンシ・429/5xxの注入に対応し、httpxトランスポートとHTTPサーバーの両方で使える
+# RELEVANT FILES: ../docs/oura_openapi.json, bench_pipeline.py, ../src/healthhub_batch/fetcher.py
+
+"""Fake Oura API v2 serving deterministic synthetic data.
+
+In-process (no sockets), for benchmarks and tests::
+
+    server = FakeOuraServer(FakeOuraConfig(users=10, years=2))
+    http_client = httpx.AsyncClient(transport=server.transport(), base_url=server.base_url)
+    OuraClient(server.token(0), http_client=http_client)
+
+As a local HTTP server, for running the real CLI against it::
+
+    python benchmarks/fake_oura_server.py --port 8765 --users 3
+    OURA_PAT=fake-token-0 OURA_API_BASE_URL=http://127.0.0.1:8765/v2/usercollection \\
+        healthhub-batch fetch --dry-run -s 2024-01-01 -e 2024-03-31
+
+Documents depend only on (seed, user, endpoint, day), so any page size or
+date range returns the same document for a given day. ``/heartrate`` serves
+one sample every ``heartrate_interval`` seconds, likewise independent of
+paging and of the requested ``start_datetime``/``end_datetime`` range.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+OPENAPI_PATH = Path(__file__).parent.parent / "docs" / "oura_openapi.json"
+API_PREFIX = "/v2/usercollection/"
+
+# エンドポイント → レスポンス要素のスキーマ名
+ENDPOINT_SCHEMAS = {
+    "daily_sleep": "DailySleepModel",
+    "daily_activity": "DailyActivityModel",
+    "daily_readiness": "DailyReadinessModel",
+    "daily_stress": "DailyStressModel",
+    "daily_resilience": "DailyResilienceModel",
+}
+
+# 実APIは返すがOpenAPIに載っていないフィールド（models.py が必須にしている）
+EXTRA_FIELDS = {
+    "ReadinessContributors": {"sleep_regularity": {"type": "integer"}},
+}
+
+# 配列・文字列の長さ（実データに合わせる: METは1分ごと、class_5_minは5分ごと）
+MET_ITEMS = 1440
+CLASS_5_MIN_LENGTH = 288
+
+
+@dataclass
+class FakeOuraConfig:
+    """Fake server behaviour."""
+
+    users: int = 1
+    years: float = 1.0
+    end_day: date = date(2024, 12, 31)  # データが存在する最終日
+    page_size: int = 30  # 1ページあたりの日数
+    latency: float = 0.0  # 1リクエストあたりの遅延（秒）
+    latency_jitter: float = 0.0  # 遅延に加える一様乱数の上限（秒）
+    error_rate_429: float = 0.0
+    error_rate_5xx: float = 0.0
+    retry_after: float = 0.0  # 429のRetry-After（秒）
+    seed: int = 0
+    heartrate_interval: int = 300  # 心拍数サンプルの間隔（秒）
+    heartrate_page_size: int = 10_000  # 心拍数の1ページあたりのサンプル数
+
+    @property
+    def start_day(self) -> date:
+        return self.end_day - timedelta(days=int(self.years * 365) - 1)
+
+    @property
+    def heartrate_start(self) -> datetime:
+        return datetime.combine(self.start_day, time(), tzinfo=timezone.utc)
+
+    @property
+    def heartrate_samples(self) -> int:
+        """Number of heart rate samples per user over the whole range."""
+        days = (self.end_day - self.start_day).days + 1
+        return days * 86400 // self.heartrate_interval
+
+
+class SchemaDataGenerator:
+    """Generate documents that conform to the Oura OpenAPI schemas."""
+
+    def __init__(self, openapi_path: Path = OPENAPI_PATH, seed: int = 0) -> None:
+        spec = json.loads(openapi_path.read_text(encoding="utf-8"))
+        self.schemas: dict[str, Any] = spec["components"]["schemas"]
+        # METの数値列は1件ずつ乱数を引くと生成が計測対象より重くなるので、
+        # 固定の列をドキュメントごとにずらして使う
+        pool_rng = random.Random(f"{seed}:met")
+        self._met_pool = [round(pool_rng.uniform(0.9, 8.0), 1) for _ in range(MET_ITEMS)]
+
+    def _resolve(self, schema: dict[str, Any]) -> tuple[str | None, dict[str, Any]]:
+        if "$ref" in schema:
+            name = schema["$ref"].rsplit("/", 1)[1]
+            return name, self.schemas[name]
+        return None, schema
+
+    def generate(self, schema_name: str, day: date, rng: random.Random) -> dict[str, Any]:
+        """Generate one document of ``schema_name`` for ``day``."""
+        return self._value(self.schemas[schema_name], schema_name, None, "", day, rng)
+
+    def _value(
+        self,
+        schema: dict[str, Any],
+        schema_name: str | None,
+        parent: str | None,
+        field: str,
+        day: date,
+        rng: random.Random,
+    ) -> Any:
+        ref_name, schema = self._resolve(schema)
+        schema_name = ref_name or schema_name
+
+        if "anyOf" in schema:
+            # Optionalは常に値を入れる（NULLの扱いはパーサ側のテストで確認する）
+            variant = next(v for v in schema["anyOf"] if v.get("type") != "null")
+            return self._value(variant, schema_name, parent, field, day, rng)
+        if "enum" in schema:
+            return rng.choice(schema["enum"])
+
+        if "properties" in schema:
+            properties = {**schema["properties"], **EXTRA_FIELDS.get(schema_name or "", {})}
+            return {
+                name: self._value(prop, None, schema_name, name, day, rng)
+                for name, prop in properties.items()
+            }
+
+        kind = schema.get("type")
+        if kind == "array":
+            if field == "items":
+                shift = rng.randrange(MET_ITEMS)
+                return self._met_pool[shift:] + self._met_pool[:shift]
+            item_schema = schema.get("items", {})
+            return [self._value(item_schema, None, None, "", day, rng) for _ in range(3)]
+        if kind == "integer":
+            return self._integer(parent, field, rng)
+        if kind == "number":
+            return self._number(field, rng)
+        return self._string(schema, ref_name, field, day, rng)
+
+    @staticmethod
+    def _integer(parent: str | None, field: str, rng: random.Random) -> int:
+        if (parent or "").endswith("Contributors") or field == "score":
+            return rng.randint(1, 100)
+        if field.endswith("_time") or field in ("stress_high", "recovery_high"):
+            return rng.randint(0, 36_000)
+        if field == "steps":
+            return rng.randint(0, 25_000)
+        if field.endswith("calories") or field.endswith("meters") or "distance" in field:
+            return rng.randint(0, 4_000)
+        return rng.randint(0, 100)
+
+    @staticmethod
+    def _number(field: str, rng: random.Random) -> float:
+        if field == "interval":
+            return 60.0
+        if field.startswith("temperature"):
+            return round(rng.uniform(-1.5, 1.5), 2)
+        if "met" in field:
+            return round(rng.uniform(0.9, 8.0), 1)
+        return round(rng.uniform(0, 100), 2)
+
+    @staticmethod
+    def _string(
+        schema: dict[str, Any],
+        ref_name: str | None,
+        field: str,
+        day: date,
+        rng: random.Random,
+    ) -> str:
+        if field == "id":
+            return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        if schema.get("format") == "date" or field == "day":
+            return day.isoformat()
+        if (ref_name or "").startswith("LocalDateTime") or field == "timestamp":
+            return datetime.combine(day, time(4, 0), timezone.utc).isoformat()
+        if field == "class_5_min":
+            return "".join(rng.choice("012345") for _ in range(CLASS_5_MIN_LENGTH))
+        return f"{field}-{rng.randint(0, 999)}"
+
+
+class FakeOuraServer:
+    """Fake ``/v2/usercollection/<endpoint>`` for ``config.users`` users."""
+
+    base_url = f"http://fake-oura{API_PREFIX}".rstrip("/")
+
+    def __init__(
+        self, config: FakeOuraConfig | None = None, generator: SchemaDataGenerator | None = None
+    ) -> None:
+        self.config = config or FakeOuraConfig()
+        self.generator = generator or SchemaDataGenerator(seed=self.config.seed)
+        self._error_rng = random.Random(f"{self.config.seed}:errors")
+        self.requests = 0
+        self.errors = {429: 0, 503: 0}
+
+    @staticmethod
+    def token(user: int) -> str:
+        """Personal Access Token of fake user ``user``."""
+        return f"fake-token-{user}"
+
+    def _user_for(self, authorization: str | None) -> int | None:
+        prefix = "Bearer fake-token-"
+        if not authorization or not authorization.startswith(prefix):
+            return None
+        try:
+            user = int(authorization[len(prefix) :])
+        except ValueError:
+            return None
+        return user if 0 <= user < self.config.users else None
+
+    def document(self, user: int, endpoint: str, day: date) -> dict[str, Any]:
+        """The document of ``endpoint`` for ``user`` on ``day`` (always the same)."""
+        rng = random.Random(f"{self.config.seed}:{user}:{endpoint}:{day.isoformat()}")
+        return self.generator.generate(ENDPOINT_SCHEMAS[endpoint], day, rng)
+
+    def heartrate_sample(self, user: int, index: int) -> dict[str, Any]:
+        """The ``index``-th heart rate sample of ``user`` (always the same)."""
+        config = self.config
+        timestamp = config.heartrate_start + timedelta(seconds=index * config.heartrate_interval)
+        # 乱数生成器を作らずに済むよう、整数タプルのハッシュ（ランダム化されない）から値を決める
+        noise = hash((config.seed, user, index)) % 20
+        asleep = timestamp.hour < 6
+        return {
+            "bpm": (48 if asleep else 62) + noise,
+            "source": "sleep" if asleep else "awake",
+            "timestamp": timestamp.isoformat(),
+        }
+
+    def _heartrate(self, user: int, params: dict[str, str]) -> tuple[int, dict[str, str], bytes]:
+        """``/heartrate``: samples with ``start_datetime <= timestamp <= end_datetime``."""
+        config = self.config
+        try:
+            start = datetime.fromisoformat(params["start_datetime"])
+            end = datetime.fromisoformat(params["end_datetime"])
+            next_token = params.get("next_token")
+            offset = int(base64.urlsafe_b64decode(next_token)) if next_token else 0
+        except (KeyError, ValueError):
+            return 400, {}, b'{"detail": "Bad Request"}'
+
+        interval = config.heartrate_interval
+        first = max(0, -(-(start - config.heartrate_start).total_seconds() // interval))
+        last = min(
+            config.heartrate_samples - 1, (end - config.heartrate_start).total_seconds() // interval
+        )
+        total = max(0, int(last) - int(first) + 1)
+        page_end = min(offset + config.heartrate_page_size, total)
+        data = [self.heartrate_sample(user, int(first) + i) for i in range(offset, page_end)]
+        next_token = (
+            base64.urlsafe_b64encode(str(page_end).encode()).decode() if page_end < total else None
+        )
+        body = json.dumps({"data": data, "next_token": next_token}).encode()
+        return 200, {"Content-Type": "application/json"}, body
+
+    async def respond(
+        self, path: str, params: dict[str, str], authorization: str | None
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Build (status, headers, body) for one GET request."""
+        self.requests += 1
+        config = self.config
+        if config.latency or config.latency_jitter:
+            await asyncio.sleep(config.latency + random.uniform(0, config.latency_jitter))
+
+        roll = self._error_rng.random()
+        if roll < config.error_rate_429:
+            self.errors[429] += 1
+            headers = {"Retry-After": f"{config.retry_after:g}"}
+            return 429, headers, b'{"detail": "Too Many Requests"}'
+        if roll < config.error_rate_429 + config.error_rate_5xx:
+            self.errors[503] += 1
+            return 503, {}, b'{"detail": "Service Unavailable"}'
+
+        user = self._user_for(authorization)
+        if user is None:
+            return 401, {}, b'{"detail": "Unauthorized"}'
+        endpoint = path.removeprefix(API_PREFIX).strip("/")
+        if endpoint == "heartrate":
+            return self._heartrate(user, params)
+        if endpoint not in ENDPOINT_SCHEMAS:
+            return 404, {}, b'{"detail": "Not Found"}'
+
+        try:
+            start = max(date.fromisoformat(params["start_date"]), config.start_day)
+            end = min(date.fromisoformat(params["end_date"]), config.end_day)
+            next_token = params.get("next_token")
+            offset = int(base64.urlsafe_b64decode(next_token)) if next_token else 0
+        except (KeyError, ValueError):
+            return 400, {}, b'{"detail": "Bad Request"}'
+
+        total_days = max(0, (end - start).days + 1)
+        page_end = min(offset + config.page_size, total_days)
+        data = [
+            self.document(user, endpoint, start + timedelta(days=i))
+            for i in range(offset, page_end)
+        ]
+        next_token = (
+            base64.urlsafe_b64encode(str(page_end).encode()).decode()
+            if page_end < total_days
+            else None
+        )
+        body = json.dumps({"data": data, "next_token": next_token}).encode()
+        return 200, {"Content-Type": "application/json"}, body
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        """httpx handler (use with ``httpx.MockTransport``)."""
+        status, headers, body = await self.respond(
+            request.url.path, dict(request.url.params), request.headers.get("authorization")
+        )
+        return httpx.Response(status, headers=headers, content=body)
+
+    def transport(self) -> httpx.MockTransport:
+        """In-process transport for ``httpx.AsyncClient``."""
+        return httpx.MockTransport(self.handle)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.Server:
+        """Start a minimal HTTP/1.1 server (GET only, keep-alive)."""
+
+        async def on_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                while request_line := await reader.readline():
+                    _, target, _ = request_line.decode("latin-1").split(" ", 2)
+                    headers = {}
+                    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        name, _, value = line.decode("latin-1").partition(":")
+                        headers[name.strip().lower()] = value.strip()
+
+                    url = urlsplit(target)
+                    status, response_headers, body = await self.respond(
+                        url.path, dict(parse_qsl(url.query)), headers.get("authorization")
+                    )
+                    head = [f"HTTP/1.1 {status} {httpx.codes.get_reason_phrase(status)}"]
+                    head += [f"{k}: {v}" for k, v in response_headers.items()]
+                    head.append(f"Content-Length: {len(body)}")
+                    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                    await writer.drain()
+            except (ConnectionError, ValueError):
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(on_connection, host, port)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Oura API v2 server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--page-size", type=int, default=30, help="Days per page")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOuraServer(
+        FakeOuraConfig(
+            users=args.users,
+            years=args.years,
+            page_size=args.page_size,
+            latency=args.latency_ms / 1000,
+            error_rate_429=args.error_rate_429,
+            error_rate_5xx=args.error_rate_5xx,
+        )
+    )
+    http_server = await server.serve(args.host, args.port)
+    print(f"Fake Oura API on http://{args.host}:{args.port}{API_PREFIX} (tokens fake-token-0..)")
+    async with http_server:
+        await http_server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -37,7 +37,8 @@ async def analyze_responses() -> None:
 
     analysis_results = {}
 
-    async with OuraClient(settings.oura_pat) as client:
+    # OURA_CACHE_DIR を設定すると、同じ期間の再実行はAPIを呼ばずにキャッシュから返す
+    async with OuraClient.from_settings(settings) as client:
         for endpoint in endpoints:
             print(f"\n{'='*80}")
             print(f"Analyzing: {endpoint}")
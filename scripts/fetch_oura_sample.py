@@ -12,6 +12,10 @@ import urllib.request
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from healthhub_batch.response_cache import ResponseCache  # noqa: E402
+
 ENV_FILE = ROOT / ".env"
 OUTPUT_DIR = ROOT / "artifacts" / "oura_samples"
 
@@ -38,16 +42,35 @@ def load_dotenv(path: Path) -> None:
         os.environ.setdefault(key, value)
 
 
-def fetch(endpoint: str, token: str, start_date: str, end_date: str) -> dict:
+def open_cache() -> ResponseCache | None:
+    """OURA_CACHE_DIR が設定されていればレスポンスキャッシュを開く"""
+    cache_dir = os.getenv("OURA_CACHE_DIR")
+    return ResponseCache(cache_dir) if cache_dir else None
+
+
+def fetch(
+    endpoint: str,
+    token: str,
+    start_date: str,
+    end_date: str,
+    cache: ResponseCache | None = None,
+) -> dict:
+    params = {"start_date": start_date, "end_date": end_date}
+    cache_key = ResponseCache.key(endpoint, params, "default")
+    if cache and (body := cache.get(cache_key)) is not None:
+        return json.loads(body)
+
     base_url = f"https://api.ouraring.com/v2/usercollection/{endpoint}"
-    query = urllib.parse.urlencode({"start_date": start_date, "end_date": end_date})
+    query = urllib.parse.urlencode(params)
     url = f"{base_url}?{query}"
     request = urllib.request.Request(
         url,
         headers={"Authorization": f"Bearer {token}", "Accept": "application/json"},
     )
     with urllib.request.urlopen(request, timeout=30) as response:
-        payload = response.read().decode("utf-8")
+        payload = response.read()
+    if cache:
+        cache.put(cache_key, payload, cache.ttl_for(params))
     return json.loads(payload)
 
 
@@ -95,11 +118,12 @@ def main() -> int:
     end_date = today.isoformat()
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    cache = open_cache()
 
     summaries: list[dict[str, object]] = []
     for endpoint in ENDPOINTS:
         try:
-            payload = fetch(endpoint, token, start_date, end_date)
+            payload = fetch(endpoint, token, start_date, end_date, cache)
         except urllib.error.HTTPError as exc:
             print(f"[ERROR] {endpoint} request failed: {exc.code} {exc.reason}", file=sys.stderr)
             try:
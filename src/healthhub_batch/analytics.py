@@ -0,0 +1,362 @@
+# src/healthhub_batch/analytics.py
+# 日次指標の異常検知（直前の窓の中央値・MADによるロバストzスコア）
+# ユーザーのバッチ単位でバイナリCOPYをNumPyの構造化配列として読み、バッチ内の全ユーザー × 全指標をまとめて採点してhealthhub.anomaliesへ書き込む
+# RELEVANT FILES: db_models.py, database.py, heartrate.py, cli.py
+
+"""Vectorized robust z-score anomaly detection over the daily metrics."""
+from __future__ import annotations
+
+import io
+import time
+from collections.abc import Sequence
+from datetime import date, timedelta
+from functools import cache
+from typing import NamedTuple
+from uuid import UUID
+
+import numpy as np
+import numpy.typing as npt
+import structlog
+from asyncpg import Connection
+from numpy.lib.stride_tricks import sliding_window_view
+
+from healthhub_batch.database import Database
+from healthhub_batch.db_models import Anomaly, Base, DailyReadinessSummary, DailySleepSummary
+
+logger = structlog.get_logger(__name__)
+
+ANOMALIES_TABLE = Anomaly.__table__.fullname
+COPY_COLUMNS = ["user_id", "day", "metric", "value", "baseline", "scale", "z_score"]
+
+# 指標名 → (日次テーブル, カラム)
+ANOMALY_METRICS: dict[str, tuple[type[Base], str]] = {
+    "readiness_score": (DailyReadinessSummary, "score"),
+    "temperature_deviation": (DailyReadinessSummary, "temperature_deviation"),
+    "hrv_balance": (DailyReadinessSummary, "contributors_hrv_balance"),
+    "resting_heart_rate": (DailyReadinessSummary, "contributors_resting_heart_rate"),
+    "sleep_score": (DailySleepSummary, "score"),
+}
+
+MAD_SCALE = 1.4826  # 正規分布で MAD を標準偏差に揃える係数
+MEAN_AD_SCALE = 1.2533  # MAD が0のとき（値の半分以上が同じ）に使う平均絶対偏差の係数
+
+_SCORE_BLOCK = 16  # 一度に窓を並べ替える系列数（中間配列をキャッシュに収まる大きさに保つ）
+
+# バイナリCOPY（各列が固定長になるよう、NULLはNaNにしてから送る）
+_PG_EPOCH = date(2000, 1, 1)  # バイナリ形式の date は 2000-01-01 からの日数
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+
+class AnalyzeResult(NamedTuple):
+    """異常検知の結果"""
+
+    users: int
+    scored: int  # zスコアを計算できた (ユーザー, 日, 指標) の数
+    anomalies: int
+
+
+class RobustScores(NamedTuple):
+    """日ごとのロバストzスコア（入力と同じ形、採点できない日は NaN）"""
+
+    baseline: np.ndarray  # 直前の窓の中央値
+    scale: np.ndarray  # 1.4826 × MAD（MAD が0なら 1.2533 × 平均絶対偏差）
+    z: np.ndarray
+
+
+class MetricGrid(NamedTuple):
+    """ユーザー × 日の密な指標配列"""
+
+    user_ids: list[UUID]
+    first_day: date
+    values: npt.NDArray[np.float32]  # (指標, ユーザー, 日)、欠損は NaN
+
+
+def _sorted_median(ordered: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """昇順（NaN は末尾）に並んだ窓の、先頭 counts 個の中央値"""
+    lower = np.take_along_axis(ordered, (np.maximum(counts - 1, 0) // 2)[..., None], axis=-1)
+    upper = np.take_along_axis(ordered, (counts // 2)[..., None], axis=-1)
+    return ((lower + upper) / 2)[..., 0]
+
+
+def robust_zscores(values: np.ndarray, window: int, min_days: int) -> RobustScores:
+    """Score every day against the ``window`` days before it.
+
+    The baseline is the median and the scale the MAD (median absolute
+    deviation) of the trailing window, excluding the day itself, so a single
+    outlier neither moves the baseline nor hides itself. The windows are a
+    strided view of the input and each median comes from a sort along the
+    window axis (missing values sort last), a block of series at a time.
+
+    Args:
+        values: ``(series, days)`` array with NaN for missing days
+        window: Trailing days forming each baseline
+        min_days: Values required in the window to score a day
+
+    Returns:
+        Baseline, scale and z-score per day (NaN where a day cannot be scored)
+    """
+    series, days = values.shape
+    padded = np.full((series, window + days), np.nan, dtype=np.float32)
+    padded[:, window:] = values
+    # 日 d の窓は padded[:, d : d + window]（= 元の d - window .. d - 1）
+    windows = sliding_window_view(padded, window, axis=1)[:, :days]
+    present = np.zeros((series, window + days + 1), dtype=np.int32)
+    np.cumsum(~np.isnan(padded), axis=1, out=present[:, 1:])
+    counts = present[:, window : window + days] - present[:, :days]
+
+    baseline = np.empty((series, days), dtype=np.float32)
+    mad = np.empty((series, days), dtype=np.float32)
+    mean_ad = np.zeros((series, days), dtype=np.float32)
+    for block in range(0, series, _SCORE_BLOCK):
+        rows = slice(block, block + _SCORE_BLOCK)
+        ordered = np.sort(windows[rows], axis=-1)
+        baseline[rows] = _sorted_median(ordered, counts[rows])
+        # 並べ替えた窓をその場で偏差に変え、もう一度並べ替えて MAD を取る
+        ordered -= baseline[rows][..., None]
+        np.abs(ordered, out=ordered)
+        ordered.sort(axis=-1)
+        mad[rows] = _sorted_median(ordered, counts[rows])
+        flat = mad[rows] == 0
+        if flat.any():
+            mean_ad[rows][flat] = np.nansum(ordered[flat], axis=-1) / np.maximum(
+                counts[rows][flat], 1
+            )
+
+    scale = np.where(mad > 0, MAD_SCALE * mad, MEAN_AD_SCALE * mean_ad)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (values - baseline) / scale
+    z[(counts < min_days) | ~(scale > 0)] = np.nan
+    return RobustScores(baseline, scale, z)
+
+
+def _sources() -> dict[type[Base], list[str]]:
+    """日次テーブル → そこから読む指標（ANOMALY_METRICS の順）"""
+    sources: dict[type[Base], list[str]] = {}
+    for metric, (model, _) in ANOMALY_METRICS.items():
+        sources.setdefault(model, []).append(metric)
+    return sources
+
+
+@cache
+def _load_query(model: type[Base]) -> str:
+    """1テーブル分の指標を NULL → NaN の float4 で返すクエリ（$1: ユーザー, $2-$3: 期間）"""
+    values = ", ".join(
+        f"coalesce({ANOMALY_METRICS[metric][1]}::float4, 'NaN')" for metric in _sources()[model]
+    )
+    table = model.__table__.fullname  # type: ignore[attr-defined]
+    return (
+        f"SELECT user_id, day, {values} FROM {table} "
+        "WHERE user_id = ANY($1::uuid[]) AND day BETWEEN $2 AND $3"
+    )
+
+
+@cache
+def _row_dtype(model: type[Base]) -> np.dtype:
+    """_load_query の1行（フィールド数・各列の長さと値）"""
+    fields = [("fields", ">i2"), ("user_id_length", ">i4"), ("user_id", "V16")]
+    fields += [("day_length", ">i4"), ("day", ">i4")]
+    for metric in _sources()[model]:
+        fields += [(f"{metric}_length", ">i4"), (metric, ">f4")]
+    return np.dtype(fields)
+
+
+def decode_copy_rows(data: bytes, model: type[Base]) -> np.ndarray:
+    """Decode ``COPY ... TO STDOUT (FORMAT binary)`` output of ``_load_query``.
+
+    Every column has a fixed width (NULLs were replaced by NaN in the query),
+    so the rows map directly onto a structured dtype without a per-row loop.
+
+    Args:
+        data: Complete COPY output
+        model: Table the query read
+
+    Returns:
+        Structured array with ``user_id``, ``day`` and one field per metric
+
+    Raises:
+        ValueError: If the data is not binary COPY output of the expected shape
+    """
+    if not data.startswith(_COPY_SIGNATURE):
+        msg = "Not binary COPY output"
+        raise ValueError(msg)
+    extension = int.from_bytes(data[15:19], "big")
+    body = memoryview(data)[19 + extension : -2]  # ヘッダーと終端（-1）を除く
+    rows = np.frombuffer(body, dtype=_row_dtype(model))
+    if len(rows) and (rows["fields"] != 2 + len(_sources()[model])).any():
+        msg = "Unexpected column count in COPY output"
+        raise ValueError(msg)
+    return rows
+
+
+def new_grid(user_ids: Sequence[UUID], first_day: date, last_day: date) -> MetricGrid:
+    """Return an all-missing grid for ``user_ids`` from ``first_day`` to ``last_day``."""
+    days = (last_day - first_day).days + 1
+    values = np.full((len(ANOMALY_METRICS), len(user_ids), days), np.nan, dtype=np.float32)
+    return MetricGrid(list(user_ids), first_day, values)
+
+
+def scatter_rows(grid: MetricGrid, model: type[Base], rows: np.ndarray) -> None:
+    """Write decoded rows of one table into ``grid`` (rows of other users are ignored).
+
+    Args:
+        grid: Grid to fill
+        model: Table the rows came from
+        rows: Output of ``decode_copy_rows``
+    """
+    user_bytes = np.array([user.bytes for user in grid.user_ids], dtype="V16")
+    order = np.argsort(user_bytes)
+    position = np.searchsorted(user_bytes[order], rows["user_id"]).clip(0, len(order) - 1)
+    known = user_bytes[order][position] == rows["user_id"]
+    user_index = order[position][known]
+    day_index = rows["day"][known].astype(np.int64) - (grid.first_day - _PG_EPOCH).days
+
+    metrics = list(ANOMALY_METRICS)
+    for metric in _sources()[model]:
+        grid.values[metrics.index(metric), user_index, day_index] = rows[metric][known]
+
+
+def anomaly_records(
+    grid: MetricGrid, scores: RobustScores, threshold: float, start_day: date
+) -> list[tuple]:
+    """Return COPY records for the days from ``start_day`` with ``|z| >= threshold``.
+
+    Args:
+        grid: Scored grid
+        scores: ``robust_zscores`` of ``grid.values`` reshaped to ``(metric × user, day)``
+        threshold: Absolute z-score at which a day is anomalous
+        start_day: First day to report (earlier days only form baselines)
+
+    Returns:
+        Tuples in ``COPY_COLUMNS`` order
+    """
+    metrics = list(ANOMALY_METRICS)
+    users = len(grid.user_ids)
+    flagged = np.abs(scores.z) >= threshold  # NaN は False
+    flagged[:, : max((start_day - grid.first_day).days, 0)] = False
+
+    rows, days = np.nonzero(flagged)
+    values = grid.values.reshape(-1, grid.values.shape[-1])
+    return [
+        (
+            grid.user_ids[row % users],
+            grid.first_day + timedelta(days=day),
+            metrics[row // users],
+            value,
+            baseline,
+            scale,
+            z,
+        )
+        for row, day, value, baseline, scale, z in zip(
+            rows.tolist(),
+            days.tolist(),
+            values[rows, days].tolist(),
+            scores.baseline[rows, days].tolist(),
+            scores.scale[rows, days].tolist(),
+            scores.z[rows, days].tolist(),
+        )
+    ]
+
+
+async def _analyze_batch(
+    pg_conn: Connection,
+    user_ids: list[UUID],
+    start_day: date,
+    end_day: date,
+    window: int,
+    min_days: int,
+    threshold: float,
+) -> AnalyzeResult:
+    """ユーザーのバッチを読み込み・採点し、期間の異常日を置き換える"""
+    # 開始日の窓に必要な過去分も読む
+    grid = new_grid(user_ids, start_day - timedelta(days=window), end_day)
+    for model in _sources():
+        buffer = io.BytesIO()
+        await pg_conn.copy_from_query(
+            _load_query(model),
+            user_ids,
+            grid.first_day,
+            end_day,
+            output=buffer,
+            format="binary",
+        )
+        scatter_rows(grid, model, decode_copy_rows(buffer.getvalue(), model))
+
+    metrics, users, days = grid.values.shape
+    scores = robust_zscores(grid.values.reshape(metrics * users, days), window, min_days)
+    records = anomaly_records(grid, scores, threshold, start_day)
+    scored = int(np.count_nonzero(~np.isnan(scores.z[:, window:])))
+
+    async with pg_conn.transaction():
+        await pg_conn.execute(
+            f"DELETE FROM {ANOMALIES_TABLE} "
+            "WHERE user_id = ANY($1::uuid[]) AND day BETWEEN $2 AND $3",
+            user_ids,
+            start_day,
+            end_day,
+        )
+        if records:
+            await pg_conn.copy_records_to_table(
+                Anomaly.__table__.name,
+                schema_name=Anomaly.__table__.schema,
+                records=records,
+                columns=COPY_COLUMNS,
+            )
+    return AnalyzeResult(len(user_ids), scored, len(records))
+
+
+async def analyze_users(
+    db: Database,
+    user_ids: Sequence[UUID],
+    start_day: date,
+    end_day: date,
+    window: int = 28,
+    min_days: int = 14,
+    threshold: float = 3.5,
+    user_batch: int = 100,
+) -> AnalyzeResult:
+    """
+    ユーザーの日次指標を採点し、期間内の異常日を healthhub.anomalies に保存する
+
+    各日を直前 window 日の中央値・MAD と比べ、|z| が threshold 以上の日を異常とする。
+    user_batch 人ずつバイナリCOPYで読み込み、バッチ内の全ユーザー × 全指標を
+    まとめて採点する（Pythonのループは異常日の行の組み立てだけ）。期間内の既存の
+    異常日はバッチごとのトランザクションで置き換わるので、再実行しても重複しない。
+
+    Args:
+        db: データベースインスタンス
+        user_ids: 対象ユーザー
+        start_day: 開始日（これより前の window 日はベースラインにだけ使う）
+        end_day: 終了日（含む）
+        window: ベースラインにする直前の日数
+        min_days: 採点に必要な窓内の値の数
+        threshold: 異常とする |z| の下限
+        user_batch: 1回に読み込むユーザー数
+
+    Returns:
+        AnalyzeResult: ユーザー数・採点数・異常日数
+    """
+    started = time.perf_counter()
+    total = AnalyzeResult(0, 0, 0)
+
+    async with db.engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        pg_conn: Connection = raw_conn.driver_connection
+
+        for i in range(0, len(user_ids), user_batch):
+            result = await _analyze_batch(
+                pg_conn,
+                list(user_ids[i : i + user_batch]),
+                start_day,
+                end_day,
+                window,
+                min_days,
+                threshold,
+            )
+            total = AnalyzeResult(*(a + b for a, b in zip(total, result)))
+
+    logger.info(
+        "analyze_completed",
+        **total._asdict(),
+        elapsed_seconds=round(time.perf_counter() - started, 3),
+    )
+    return total
@@ -0,0 +1,325 @@
+# src/healthhub_batch/archive.py
+# 生レスポンスのアーカイブ（追記専用・zstd圧縮のNDJSONセグメント）
+# ユーザー/エンドポイント/月ごとのディレクトリにページ単位のzstdフレームを追記し、各セグメントが含む日付をindex.jsonに記録する
+# RELEVANT FILES: oura_client.py, parsing.py, config.py
+
+"""Append-only archive of raw Oura API responses.
+
+Layout::
+
+    <root>/<user_id>/<endpoint>/<YYYY-MM>/000001.ndjson.zst
+                                          index.json
+
+Every successful response page becomes one NDJSON line::
+
+    {"fetched_at": "...", "endpoint": "...", "params": {...}, "body": <response>}
+
+``body`` is the response bytes as received (not re-serialized). Each line is
+written as its own zstd frame, so a segment is always a valid concatenation
+of complete frames and readers see pages as soon as they are appended.
+``index.json`` records, per segment, the days its pages contain, so readers
+can pick segments for a date range without decompressing anything.
+"""
+from __future__ import annotations
+
+import fcntl
+import io
+import json
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+from uuid import UUID
+
+import structlog
+import zstandard as zstd
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+logger = structlog.get_logger(__name__)
+
+INDEX_FILE = "index.json"
+SEGMENT_SUFFIX = ".ndjson.zst"
+_BODY_KEY = b',"body":'
+
+
+class ArchivedPage(NamedTuple):
+    """アーカイブから読み出した1ページ"""
+
+    endpoint: str
+    fetched_at: datetime
+    params: dict[str, str]
+    body: bytes  # 受信したままのレスポンス（parsing.parse_page にそのまま渡せる）
+
+
+class _DayRecord(BaseModel):
+    day: Optional[str] = None
+    timestamp: Optional[str] = None
+
+
+class _DayPage(BaseModel):
+    data: list[_DayRecord] = []
+
+
+_DAY_PAGE = TypeAdapter(_DayPage)
+
+
+def record_days(body: bytes) -> list[str]:
+    """Return the days (``day``, else the date part of ``timestamp``) in a page.
+
+    Only those two fields are materialized, so this is much cheaper than
+    decoding the page.
+
+    Args:
+        body: Raw response body
+
+    Returns:
+        Sorted ISO dates (empty if the page has no records or is not a page)
+    """
+    try:
+        page = _DAY_PAGE.validate_json(body)
+    except ValidationError:
+        return []
+    days = {record.day or (record.timestamp or "")[:10] for record in page.data}
+    days.discard("")
+    return sorted(days)
+
+
+def _request_day(params: dict[str, str]) -> str:
+    """レコードのないページの振り分け先（リクエストの開始日）"""
+    value = params.get("start_date") or params.get("start_datetime", "")[:10]
+    return value or datetime.now(timezone.utc).date().isoformat()
+
+
+def _read_index(directory: Path) -> dict[str, Any]:
+    try:
+        return json.loads((directory / INDEX_FILE).read_bytes())
+    except FileNotFoundError:
+        return {}
+
+
+def _write_index(directory: Path, index: dict[str, Any]) -> None:
+    """index.json を置き換え（一時ファイル経由で、読み手が書きかけを見ない）"""
+    tmp_path = directory / f"{INDEX_FILE}.tmp"
+    tmp_path.write_text(json.dumps(index, separators=(",", ":")))
+    os.replace(tmp_path, directory / INDEX_FILE)
+
+
+class _CommittedPrefix:
+    """ファイルの先頭 size バイト（index.json に記録済みの長さ）だけを読むソース
+
+    追記中のフレームや、書き込み中に落ちたプロセスが残した末尾を読まない。
+    """
+
+    def __init__(self, fh: io.BufferedReader, size: int) -> None:
+        self._fh = fh
+        self._remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        size = self._remaining if size < 0 else min(size, self._remaining)
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+
+@contextmanager
+def _locked(directory: Path) -> Iterator[None]:
+    """月ディレクトリ単位の排他ロック（同じアーカイブに書く別プロセスとの競合防止）"""
+    with open(directory / ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class RawArchive:
+    """Append raw pages to, and read them back from, an archive directory."""
+
+    def __init__(
+        self,
+        root: str | Path,
+        compression_level: int = 3,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        """Initialize the archive.
+
+        Args:
+            root: Archive directory (created on first write)
+            compression_level: zstd level
+            segment_max_bytes: Compressed size after which a month starts a
+                new segment
+        """
+        self.root = Path(root)
+        self.segment_max_bytes = segment_max_bytes
+        self._compressor = zstd.ZstdCompressor(level=compression_level)
+        self._decompressor = zstd.ZstdDecompressor()
+        # 圧縮器はスレッドセーフではないので、同じプロセス内のスレッドからの追記を直列化する
+        self._append_lock = threading.Lock()
+
+    def append(
+        self, user_id: UUID | str, endpoint: str, params: dict[str, str], body: bytes
+    ) -> Path:
+        """Append one response page.
+
+        The page goes to the month of its first record day (pages of a range
+        crossing a month boundary stay whole; the index lists every day).
+        This blocks on file locks and disk I/O; async callers run it in a
+        worker thread. Appends from several threads are serialized.
+
+        Args:
+            user_id: User the page belongs to
+            endpoint: API endpoint (e.g., "daily_sleep")
+            params: Query parameters of the request
+            body: Response body as received
+
+        Returns:
+            Segment the page was written to
+        """
+        days = record_days(body)
+        month = (days[0] if days else _request_day(params))[:7]
+        directory = self.root / str(user_id) / endpoint / month
+        directory.mkdir(parents=True, exist_ok=True)
+
+        meta = json.dumps(
+            {
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+                "endpoint": endpoint,
+                "params": params,
+            },
+            separators=(",", ":"),
+        ).encode()
+        # 行区切りと衝突しないよう、JSONのトークン間の改行だけを空白にする（文字列内の改行は\nにエスケープ済み）
+        if b"\n" in body:
+            body = body.replace(b"\n", b" ")
+
+        with self._append_lock, _locked(directory):
+            index = _read_index(directory)
+            segment = self._current_segment(index)
+            entry = index.setdefault(segment, {"days": [], "pages": 0, "bytes": 0})
+            with open(directory / segment, "ab") as fh:
+                # 前回の書き込みが途中で落ちていれば、記録済みの長さまで切り詰めてから追記
+                if fh.tell() != entry["bytes"]:
+                    fh.truncate(entry["bytes"])
+                    fh.seek(entry["bytes"])
+                with self._compressor.stream_writer(fh, closefd=False) as writer:
+                    writer.write(meta[:-1])
+                    writer.write(_BODY_KEY)
+                    writer.write(body)
+                    writer.write(b"}\n")
+                size = fh.tell()
+            entry["days"] = sorted({*entry["days"], *days})
+            entry["pages"] += 1
+            entry["bytes"] = size
+            _write_index(directory, index)
+        return directory / segment
+
+    def _current_segment(self, index: dict[str, Any]) -> str:
+        """追記先のセグメント（最新が上限に達していれば新しい番号）"""
+        if index:
+            latest = max(index)
+            if index[latest]["bytes"] < self.segment_max_bytes:
+                return latest
+            number = int(latest.removesuffix(SEGMENT_SUFFIX)) + 1
+        else:
+            number = 1
+        return f"{number:06d}{SEGMENT_SUFFIX}"
+
+    def segments(
+        self,
+        user_id: UUID | str,
+        endpoint: str,
+        start_day: date | None = None,
+        end_day: date | None = None,
+    ) -> list[Path]:
+        """Return the segments holding pages with days in ``[start_day, end_day]``.
+
+        Args:
+            user_id: User
+            endpoint: API endpoint
+            start_day: First day (default: unbounded)
+            end_day: Last day, inclusive (default: unbounded)
+
+        Returns:
+            Segment paths in write order
+        """
+        return [path for path, _ in self._select(user_id, endpoint, start_day, end_day)]
+
+    def _select(
+        self,
+        user_id: UUID | str,
+        endpoint: str,
+        start_day: date | None,
+        end_day: date | None,
+    ) -> list[tuple[Path, int]]:
+        """(セグメント, 記録済みの長さ) の一覧"""
+        base = self.root / str(user_id) / endpoint
+        if not base.is_dir():
+            return []
+        low = start_day.isoformat() if start_day else ""
+        high = end_day.isoformat() if end_day else "9999-12-31"
+        unbounded = start_day is None and end_day is None
+
+        selected = []
+        for directory in sorted(path for path in base.iterdir() if path.is_dir()):
+            for segment, entry in sorted(_read_index(directory).items()):
+                if unbounded or any(low <= day <= high for day in entry["days"]):
+                    selected.append((directory / segment, entry["bytes"]))
+        return selected
+
+    def iter_pages(
+        self,
+        user_id: UUID | str,
+        endpoint: str,
+        start_day: date | None = None,
+        end_day: date | None = None,
+    ) -> Iterator[ArchivedPage]:
+        """Stream archived pages that contain days in ``[start_day, end_day]``.
+
+        Pages are yielded in the order they were fetched within each segment,
+        one at a time; a page may also contain days outside the range. The
+        same day can appear in several pages when it was fetched again
+        (e.g. by the sync's revision window); the last one is the newest.
+
+        Args:
+            user_id: User
+            endpoint: API endpoint
+            start_day: First day (default: unbounded)
+            end_day: Last day, inclusive (default: unbounded)
+
+        Yields:
+            Archived pages
+        """
+        for path, size in self._select(user_id, endpoint, start_day, end_day):
+            yield from self._read_segment(path, size)
+
+    def _read_segment(self, path: Path, size: int) -> Iterator[ArchivedPage]:
+        with open(path, "rb") as fh:
+            reader = self._decompressor.stream_reader(
+                _CommittedPrefix(fh, size), read_across_frames=True
+            )
+            lines = io.BufferedReader(reader, buffer_size=1024 * 1024)  # type: ignore[arg-type]
+            try:
+                for number, line in enumerate(lines, 1):
+                    # 壊れた行は飛ばして同じセグメントの残りを読み続ける
+                    try:
+                        split = line.index(_BODY_KEY)
+                        meta = json.loads(line[:split] + b"}")
+                        page = ArchivedPage(
+                            meta["endpoint"],
+                            datetime.fromisoformat(meta["fetched_at"]),
+                            meta["params"],
+                            line[split + len(_BODY_KEY) : -2],
+                        )
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.error(
+                            "archive_line_malformed", segment=str(path), line=number, error=str(e)
+                        )
+                        continue
+                    yield page
+            except zstd.ZstdError as e:
+                logger.error("archive_segment_corrupt", segment=str(path), error=str(e))
@@ -0,0 +1,160 @@
+# src/healthhub_batch/backfill.py
+# 長期間のリカバリ（バックフィル）用の期間分割・並列実行エンジン
+# 期間を一定日数のウィンドウに分割し、セマフォで同時実行数を制限しながらウィンドウごとにコミットする
+# RELEVANT FILES: fetcher.py, cli.py, oura_client.py
+
+"""Windowed, concurrent date-range backfill."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+from typing import NamedTuple
+from uuid import UUID
+
+import structlog
+
+from healthhub_batch.config import Settings
+from healthhub_batch.database import Database
+from healthhub_batch.fetcher import LoadMode, fetch_and_save_range
+from healthhub_batch.oura_client import OuraClient
+from healthhub_batch.repository import UpsertResult
+
+logger = structlog.get_logger(__name__)
+
+
+class WindowResult(NamedTuple):
+    """1ウィンドウ分の実行結果"""
+
+    start: date
+    end: date
+    save_counts: dict[str, UpsertResult]
+    errors: dict[str, str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def split_date_range(start: date, end: date, window_days: int) -> list[tuple[date, date]]:
+    """Split ``[start, end]`` into windows of ``window_days`` days.
+
+    Adjacent windows share their boundary day. The Oura daily endpoints are
+    inconsistent about whether ``end_date`` is inclusive, and re-upserting one
+    day per window is cheaper than losing it.
+
+    Args:
+        start: First day of the range
+        end: Last day of the range
+        window_days: Days per window (>= 1)
+
+    Returns:
+        List of (window_start, window_end) pairs covering the range
+    """
+    if window_days < 1:
+        msg = f"window_days must be positive: {window_days}"
+        raise ValueError(msg)
+    if end < start:
+        msg = f"end date {end} is before start date {start}"
+        raise ValueError(msg)
+
+    windows = []
+    window_start = start
+    while True:
+        window_end = min(window_start + timedelta(days=window_days), end)
+        windows.append((window_start, window_end))
+        if window_end >= end:
+            return windows
+        window_start = window_end
+
+
+async def _run_window(
+    client: OuraClient,
+    semaphore: asyncio.Semaphore,
+    window: tuple[date, date],
+    user_id: UUID,
+    settings: Settings,
+    db: Database,
+    load_mode: LoadMode,
+) -> WindowResult:
+    """1ウィンドウ分を取得 → パース → 保存（ウィンドウ単位でコミット）"""
+    window_start, window_end = window
+
+    async with semaphore:
+        log = logger.bind(window_start=window_start.isoformat(), window_end=window_end.isoformat())
+        log.info("backfill_window_started")
+
+        try:
+            # 取得できたエンドポイントだけでも保存し、失敗分はウィンドウ単位で再実行できるようにする
+            result = await fetch_and_save_range(
+                client,
+                window_start.isoformat(),
+                window_end.isoformat(),
+                user_id,
+                settings,
+                db,
+                load_mode,
+            )
+        except Exception as e:
+            log.error("backfill_window_failed", error=str(e))
+            return WindowResult(window_start, window_end, {}, {"window": str(e)})
+
+        if result.errors:
+            log.warning(
+                "backfill_window_incomplete", errors=result.errors, save_counts=result.save_counts
+            )
+        else:
+            log.info("backfill_window_completed", save_counts=result.save_counts)
+        return WindowResult(window_start, window_end, result.save_counts, result.errors)
+
+
+async def run_backfill(
+    start_date: str,
+    end_date: str,
+    settings: Settings,
+    db: Database,
+    window_days: int = 30,
+    concurrency: int = 4,
+    load_mode: LoadMode = LoadMode.ORM,
+) -> list[WindowResult]:
+    """
+    期間をウィンドウに分割し、並列に取得・保存する（DB接続は閉じない）
+
+    同時に処理するウィンドウは ``concurrency`` 個までなので、メモリ使用量は
+    期間の長さではなくウィンドウサイズ × 同時実行数で決まる。
+
+    Args:
+        start_date: 開始日 (YYYY-MM-DD)
+        end_date: 終了日 (YYYY-MM-DD)
+        settings: アプリケーション設定
+        db: データベースインスタンス
+        window_days: 1ウィンドウの日数
+        concurrency: 同時に処理するウィンドウ数
+        load_mode: 保存方式
+
+    Returns:
+        ウィンドウごとの実行結果（期間順）
+    """
+    user_id = UUID(settings.user_id)
+    windows = split_date_range(
+        date.fromisoformat(start_date), date.fromisoformat(end_date), window_days
+    )
+    logger.info(
+        "backfill_started",
+        user_id=str(user_id),
+        windows=len(windows),
+        window_days=window_days,
+        concurrency=concurrency,
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async with OuraClient.from_settings(settings) as client:
+        results = await asyncio.gather(
+            *(
+                _run_window(client, semaphore, window, user_id, settings, db, load_mode)
+                for window in windows
+            )
+        )
+
+    failed = [r for r in results if not r.ok]
+    logger.info("backfill_completed", windows=len(results), failed_windows=len(failed))
+    return list(results)
@@ -6,24 +6,22 @@
 """Command Line Interface for healthhub batch processing."""
 from __future__ import annotations
 
-import asyncio
+from collections.abc import Coroutine, Iterable
+from typing import TYPE_CHECKING, Any, TypeVar
 
-import structlog
 import typer
 from typing_extensions import Annotated
 
-from healthhub_batch.config import Settings
-from healthhub_batch.database import init_database
-from healthhub_batch.fetcher import fetch_all_data, fetch_and_save_data, print_summary
-
-# structlogの設定
-structlog.configure(
-    processors=[
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.add_log_level,
-        structlog.dev.ConsoleRenderer(),
-    ]
-)
+from healthhub_batch.load_mode import LoadMode
+
+# 重い依存（asyncio・SQLAlchemy・asyncpg・httpx・pydantic）は各コマンドの中でimportし、
+# --help や version の起動を速く保つ（tests/test_import_time.py で確認）
+if TYPE_CHECKING:
+    from healthhub_batch.config import Settings
+    from healthhub_batch.database import Database
+    from healthhub_batch.repository import UpsertResult
+
+T = TypeVar("T")
 
 app = typer.Typer(
     name="healthhub-batch",
@@ -32,45 +30,659 @@ app = typer.Typer(
 )
 
 
+def _configure_logging() -> None:
+    """structlogの設定（ログを出すコマンドの実行時にだけ行う）"""
+    import structlog
+
+    structlog.configure(
+        processors=[
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.add_log_level,
+            structlog.dev.ConsoleRenderer(),
+        ]
+    )
+
+
+def _load_settings() -> Settings:
+    """ログを設定し、環境変数から設定を読み込む（不備があれば終了）"""
+    from healthhub_batch.config import Settings
+
+    _configure_logging()
+    try:
+        settings = Settings()
+        settings.validate_required_secrets()
+    except ValueError as e:
+        typer.echo(f"[ERROR] Configuration error: {e}", err=True)
+        raise typer.Exit(code=1) from e
+    return settings
+
+
+def _format_counts(counts: UpsertResult) -> str:
+    """upsert件数の内訳を1行で表示用に整形"""
+    return f"{counts.inserted} inserted, {counts.updated} updated, {counts.unchanged} unchanged"
+
+
+def _total_counts(counts: Iterable[UpsertResult]) -> UpsertResult:
+    """データ種別ごとの件数を合算"""
+    from healthhub_batch.repository import UpsertResult
+
+    total = UpsertResult()
+    for item in counts:
+        total = total.merge(item)
+    return total
+
+
+def _run_command(command: str, settings: Settings, main: Coroutine[Any, Any, T]) -> T:
+    """コマンド本体を実行し、実行時間を記録して METRICS_TEXTFILE にメトリクスを書き出す"""
+    import asyncio
+
+    from healthhub_batch.metrics import track_run
+
+    with track_run(command, settings.metrics_textfile):
+        return asyncio.run(main)
+
+
+async def _check_database(db: Database) -> None:
+    """起動時にプーラーの設定を確認し、問題があれば警告を表示"""
+    if not db.settings.db_startup_check:
+        return
+    for warning in await db.check_pooler():
+        typer.echo(f"[WARN] {warning}", err=True)
+
+
 @app.command()
 def fetch(
     start_date: Annotated[str, typer.Option("--start-date", "-s", help="Start date (YYYY-MM-DD)")],
     end_date: Annotated[str, typer.Option("--end-date", "-e", help="End date (YYYY-MM-DD)")],
     dry_run: Annotated[bool, typer.Option("--dry-run", help="Run without saving to database")] = False,
+    load_mode: Annotated[
+        LoadMode,
+        typer.Option("--load-mode", help="orm: multi-row upsert / copy: COPY via staging table"),
+    ] = LoadMode.ORM,
 ) -> None:
     """Fetch Oura Ring data for the specified date range."""
-    try:
-        settings = Settings()
-        settings.validate_required_secrets()
-    except ValueError as e:
-        typer.echo(f"[ERROR] Configuration error: {e}", err=True)
-        raise typer.Exit(code=1) from e
+    from healthhub_batch.database import init_database
+    from healthhub_batch.fetcher import fetch_all_data, fetch_and_save_data, print_summary
+
+    settings = _load_settings()
 
     typer.echo(f"[INFO] Fetching Oura data from {start_date} to {end_date}")
 
     if dry_run:
         # Dry runモード：APIからデータ取得のみ（DB保存なし）
         typer.echo("[INFO] Dry run mode: データベースには保存しません")
-        results = asyncio.run(fetch_all_data(start_date, end_date, settings))
+        results = _run_command("fetch", settings, fetch_all_data(start_date, end_date, settings))
         print_summary(results)
     else:
         # 通常モード：データ取得 + DB保存
-        typer.echo("[INFO] Saving data to database...")
+        typer.echo(f"[INFO] Saving data to database (load mode: {load_mode.value})...")
         db = init_database(settings)
 
-        save_counts = asyncio.run(
-            fetch_and_save_data(start_date, end_date, settings, db)
-        )
+        async def _run() -> dict[str, UpsertResult]:
+            try:
+                await _check_database(db)
+                return await fetch_and_save_data(
+                    start_date, end_date, settings, db, load_mode=load_mode
+                )
+            finally:
+                await db.close()
+
+        save_counts = _run_command("fetch", settings, _run())
 
         # 保存結果を表示
         typer.echo("\n=== Save Summary ===")
-        for data_type, count in save_counts.items():
-            typer.echo(f"[OK] {data_type}: {count} records saved")
+        for data_type, counts in save_counts.items():
+            typer.echo(f"[OK] {data_type}: {_format_counts(counts)}")
         typer.echo("=" * 30 + "\n")
 
     typer.echo("[OK] Data fetching completed")
 
 
+@app.command()
+def backfill(
+    start_date: Annotated[str, typer.Option("--start-date", "-s", help="Start date (YYYY-MM-DD)")],
+    end_date: Annotated[str, typer.Option("--end-date", "-e", help="End date (YYYY-MM-DD)")],
+    window_days: Annotated[
+        int | None,
+        typer.Option("--window-days", min=1, help="Days per window (default: BACKFILL_WINDOW_DAYS)"),
+    ] = None,
+    concurrency: Annotated[
+        int | None,
+        typer.Option(
+            "--concurrency", min=1, help="Concurrent windows (default: BACKFILL_CONCURRENCY)"
+        ),
+    ] = None,
+    load_mode: Annotated[
+        LoadMode,
+        typer.Option("--load-mode", help="orm: multi-row upsert / copy: COPY via staging table"),
+    ] = LoadMode.ORM,
+) -> None:
+    """Recover a long date range in windows, committing each window independently."""
+    from healthhub_batch.backfill import WindowResult, run_backfill
+    from healthhub_batch.database import init_database
+    from healthhub_batch.repository import UpsertResult
+
+    settings = _load_settings()
+
+    window_days = window_days or settings.backfill_window_days
+    concurrency = concurrency or settings.backfill_concurrency
+    typer.echo(
+        f"[INFO] Backfilling {start_date} to {end_date} "
+        f"({window_days}-day windows, concurrency {concurrency})"
+    )
+
+    db = init_database(settings)
+
+    async def _run() -> list[WindowResult]:
+        try:
+            await _check_database(db)
+            return await run_backfill(
+                start_date,
+                end_date,
+                settings,
+                db,
+                window_days=window_days,
+                concurrency=concurrency,
+                load_mode=load_mode,
+            )
+        finally:
+            await db.close()
+
+    results = _run_command("backfill", settings, _run())
+
+    # 保存結果を表示
+    totals: dict[str, UpsertResult] = {}
+    for result in results:
+        for data_type, counts in result.save_counts.items():
+            totals[data_type] = totals.get(data_type, UpsertResult()).merge(counts)
+
+    typer.echo("\n=== Backfill Summary ===")
+    for data_type, counts in totals.items():
+        typer.echo(f"[OK] {data_type}: {_format_counts(counts)}")
+    failed = [r for r in results if not r.ok]
+    for result in failed:
+        typer.echo(
+            f"[ERROR] {result.start} to {result.end}: {', '.join(result.errors)} failed",
+            err=True,
+        )
+    typer.echo("=" * 30 + "\n")
+
+    if failed:
+        typer.echo(f"[ERROR] {len(failed)}/{len(results)} windows failed; re-run them", err=True)
+        raise typer.Exit(code=1)
+    typer.echo("[OK] Backfill completed")
+
+
+@app.command()
+def heartrate(
+    start_date: Annotated[str, typer.Option("--start-date", "-s", help="Start date (YYYY-MM-DD)")],
+    end_date: Annotated[str, typer.Option("--end-date", "-e", help="End date (YYYY-MM-DD)")],
+    window_days: Annotated[
+        int | None,
+        typer.Option(
+            "--window-days", min=1, help="Days per window (default: HEARTRATE_WINDOW_DAYS)"
+        ),
+    ] = None,
+    concurrency: Annotated[
+        int | None,
+        typer.Option(
+            "--concurrency", min=1, help="Concurrent windows (default: HEARTRATE_CONCURRENCY)"
+        ),
+    ] = None,
+) -> None:
+    """Ingest heart rate samples for whole days, replacing what is stored for them."""
+    from datetime import date, datetime, time, timedelta
+    from uuid import UUID
+    from zoneinfo import ZoneInfo
+
+    from healthhub_batch.database import init_database
+    from healthhub_batch.heartrate import HeartrateWindowResult, ingest_heartrate
+    from healthhub_batch.oura_client import OuraClient
+
+    settings = _load_settings()
+
+    # 日付は TIMEZONE の日として解釈し、終了日はその日の終わりまでを含める
+    tz = ZoneInfo(settings.timezone)
+    start = datetime.combine(date.fromisoformat(start_date), time(), tzinfo=tz)
+    end = datetime.combine(date.fromisoformat(end_date) + timedelta(days=1), time(), tzinfo=tz)
+    window_days = window_days or settings.heartrate_window_days
+    concurrency = concurrency or settings.heartrate_concurrency
+    typer.echo(
+        f"[INFO] Ingesting heart rate from {start_date} to {end_date} "
+        f"({window_days}-day windows, concurrency {concurrency})"
+    )
+
+    db = init_database(settings)
+
+    async def _run() -> list[HeartrateWindowResult]:
+        try:
+            await _check_database(db)
+            async with OuraClient.from_settings(settings) as client:
+                return await ingest_heartrate(
+                    client,
+                    db,
+                    UUID(settings.user_id),
+                    start,
+                    end,
+                    window_days=window_days,
+                    concurrency=concurrency,
+                )
+        finally:
+            await db.close()
+
+    results = _run_command("heartrate", settings, _run())
+
+    typer.echo("\n=== Heart Rate Summary ===")
+    typer.echo(
+        f"[OK] samples: {sum(r.samples for r in results)} saved, "
+        f"{sum(r.replaced for r in results)} replaced"
+    )
+    failed = [r for r in results if not r.ok]
+    for result in failed:
+        typer.echo(
+            f"[ERROR] {result.start.isoformat()} to {result.end.isoformat()}: {result.error}",
+            err=True,
+        )
+    typer.echo("=" * 30 + "\n")
+
+    if failed:
+        typer.echo(f"[ERROR] {len(failed)}/{len(results)} windows failed; re-run them", err=True)
+        raise typer.Exit(code=1)
+    typer.echo("[OK] Heart rate ingestion completed")
+
+
+@app.command("fetch-all-users")
+def fetch_all_users_command(
+    start_date: Annotated[
+        str | None,
+        typer.Option("--start-date", "-s", help="Start date (default: yesterday in user's TZ)"),
+    ] = None,
+    end_date: Annotated[
+        str | None,
+        typer.Option("--end-date", "-e", help="End date (default: today in user's TZ)"),
+    ] = None,
+    concurrency: Annotated[
+        int | None,
+        typer.Option(
+            "--concurrency", min=1, help="Concurrent users (default: MULTI_USER_CONCURRENCY)"
+        ),
+    ] = None,
+    load_mode: Annotated[
+        LoadMode,
+        typer.Option("--load-mode", help="orm: multi-row upsert / copy: COPY via staging table"),
+    ] = LoadMode.ORM,
+) -> None:
+    """Fetch and save data for every active user in healthhub.users."""
+    from healthhub_batch.database import init_database
+    from healthhub_batch.multi_user import UserRunResult, fetch_all_users
+
+    settings = _load_settings()
+
+    concurrency = concurrency or settings.multi_user_concurrency
+    typer.echo(f"[INFO] Fetching data for all active users (concurrency {concurrency})")
+
+    db = init_database(settings)
+
+    async def _run() -> list[UserRunResult]:
+        try:
+            await _check_database(db)
+            return await fetch_all_users(
+                settings,
+                db,
+                start_date=start_date,
+                end_date=end_date,
+                concurrency=concurrency,
+                load_mode=load_mode,
+            )
+        finally:
+            await db.close()
+
+    results = _run_command("fetch-all-users", settings, _run())
+
+    # 保存結果を表示
+    typer.echo("\n=== Multi-user Summary ===")
+    for result in results:
+        total = _total_counts(result.save_counts.values())
+        status = "OK" if result.ok else "ERROR"
+        typer.echo(
+            f"[{status}] {result.user_id} ({result.start_date} to {result.end_date}): "
+            f"{_format_counts(total)}"
+            + (f", failed: {', '.join(result.errors)}" if result.errors else "")
+        )
+    typer.echo("=" * 30 + "\n")
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        typer.echo(f"[ERROR] {len(failed)}/{len(results)} users failed", err=True)
+        raise typer.Exit(code=1)
+    typer.echo("[OK] Data fetching completed")
+
+
+@app.command("sync")
+def sync_command(
+    all_users: Annotated[
+        bool,
+        typer.Option("--all-users", help="Sync every active user in healthhub.users"),
+    ] = False,
+    concurrency: Annotated[
+        int | None,
+        typer.Option(
+            "--concurrency", min=1, help="Concurrent users (default: MULTI_USER_CONCURRENCY)"
+        ),
+    ] = None,
+) -> None:
+    """Fetch only days at or after each endpoint's watermark (minus SYNC_REVISION_DAYS)."""
+    from healthhub_batch.database import init_database
+    from healthhub_batch.fetcher import ENDPOINT_MODELS
+    from healthhub_batch.multi_user import UserRunResult
+    from healthhub_batch.repository import UpsertResult
+    from healthhub_batch.sync import SyncResult, sync, sync_all_users
+
+    settings = _load_settings()
+
+    db = init_database(settings)
+
+    if all_users:
+        concurrency = concurrency or settings.multi_user_concurrency
+        typer.echo(f"[INFO] Syncing all active users (concurrency {concurrency})")
+
+        async def _run_all() -> list[UserRunResult]:
+            try:
+                await _check_database(db)
+                return await sync_all_users(settings, db, concurrency=concurrency)
+            finally:
+                await db.close()
+
+        results = _run_command("sync", settings, _run_all())
+
+        typer.echo("\n=== Sync Summary ===")
+        for result in results:
+            total = _total_counts(result.save_counts.values())
+            status = "OK" if result.ok else "ERROR"
+            typer.echo(
+                f"[{status}] {result.user_id} ({result.start_date} to {result.end_date}): "
+                f"{_format_counts(total)}"
+                + (f", failed: {', '.join(result.errors)}" if result.errors else "")
+            )
+        typer.echo("=" * 30 + "\n")
+
+        failed = [r for r in results if not r.ok]
+        if failed:
+            typer.echo(f"[ERROR] {len(failed)}/{len(results)} users failed", err=True)
+            raise typer.Exit(code=1)
+        typer.echo("[OK] Sync completed")
+        return
+
+    typer.echo(f"[INFO] Syncing user {settings.user_id}")
+
+    async def _run() -> SyncResult:
+        try:
+            await _check_database(db)
+            return await sync(settings, db)
+        finally:
+            await db.close()
+
+    result = _run_command("sync", settings, _run())
+
+    typer.echo("\n=== Sync Summary ===")
+    for endpoint, (start, end) in result.ranges.items():
+        if endpoint in result.errors:
+            typer.echo(f"[ERROR] {endpoint} ({start} to {end}): {result.errors[endpoint]}")
+        else:
+            counts = result.save_counts.get(ENDPOINT_MODELS[endpoint][0], UpsertResult())
+            typer.echo(f"[OK] {endpoint} ({start} to {end}): {_format_counts(counts)}")
+    typer.echo("=" * 30 + "\n")
+
+    if not result.ok:
+        typer.echo(f"[ERROR] Failed endpoints: {', '.join(result.errors)}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo("[OK] Sync completed")
+
+
+@app.command("serve")
+def serve_command(
+    all_users: Annotated[
+        bool,
+        typer.Option("--all-users", help="Sync every active user in healthhub.users"),
+    ] = False,
+    concurrency: Annotated[
+        int | None,
+        typer.Option(
+            "--concurrency", min=1, help="Concurrent users (default: MULTI_USER_CONCURRENCY)"
+        ),
+    ] = None,
+) -> None:
+    """Stay resident and run the sync at DAEMON_RUN_TIMES, keeping HTTP and DB pools warm."""
+    import asyncio
+    import signal
+
+    from healthhub_batch.daemon import SyncDaemon
+    from healthhub_batch.database import init_database
+
+    settings = _load_settings()
+    try:
+        db = init_database(settings)
+        daemon = SyncDaemon(
+            settings,
+            db,
+            all_users=all_users,
+            concurrency=concurrency or settings.multi_user_concurrency,
+        )
+    except ValueError as e:
+        typer.echo(f"[ERROR] Configuration error: {e}", err=True)
+        raise typer.Exit(code=1) from e
+
+    typer.echo(
+        f"[INFO] Serving: sync at {', '.join(settings.daemon_run_times)} ({settings.timezone})"
+    )
+
+    async def _run() -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, daemon.stop)
+        try:
+            await _check_database(db)
+            await daemon.run()
+        finally:
+            await db.close()
+
+    asyncio.run(_run())
+    typer.echo("[OK] Daemon stopped")
+
+
+@app.command()
+def export(
+    output_dir: Annotated[str, typer.Option("--output-dir", "-o", help="Output directory")],
+    fmt: Annotated[
+        str, typer.Option("--format", help="parquet / ipc (Arrow IPC file)")
+    ] = "parquet",
+    tables: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--table", help="Data type to export (repeatable; default: all daily summaries)"
+        ),
+    ] = None,
+    user_id: Annotated[
+        str | None, typer.Option("--user-id", help="Only this user (default: all users)")
+    ] = None,
+    start_date: Annotated[
+        str | None, typer.Option("--start-date", "-s", help="First day (YYYY-MM-DD)")
+    ] = None,
+    end_date: Annotated[
+        str | None, typer.Option("--end-date", "-e", help="Last day (YYYY-MM-DD)")
+    ] = None,
+    batch_size: Annotated[
+        int | None,
+        typer.Option("--batch-size", min=1, help="Rows per fetch (default: EXPORT_BATCH_SIZE)"),
+    ] = None,
+) -> None:
+    """Export the daily summary tables to partitioned Parquet / Arrow IPC files."""
+    from datetime import date
+    from pathlib import Path
+    from uuid import UUID
+
+    from healthhub_batch.database import init_database
+    from healthhub_batch.repository import TABLE_MAPPINGS
+
+    try:
+        from healthhub_batch.export import ExportFormat, ExportResult, export_table
+    except ImportError as e:
+        if e.name != "pyarrow":
+            raise
+        typer.echo(
+            "[ERROR] export requires pyarrow: pip install 'healthhub-batch[export]'", err=True
+        )
+        raise typer.Exit(code=1) from e
+
+    settings = _load_settings()
+
+    data_types = tables or list(TABLE_MAPPINGS)
+    unknown = [t for t in data_types if t not in TABLE_MAPPINGS]
+    if unknown or fmt not in {f.value for f in ExportFormat}:
+        typer.echo(
+            f"[ERROR] Unknown table {unknown} or format '{fmt}' "
+            f"(tables: {', '.join(TABLE_MAPPINGS)}; formats: parquet, ipc)",
+            err=True,
+        )
+        raise typer.Exit(code=1)
+
+    typer.echo(f"[INFO] Exporting {', '.join(data_types)} to {output_dir} ({fmt})")
+    db = init_database(settings)
+
+    async def _run() -> list[ExportResult]:
+        try:
+            await _check_database(db)
+            # テーブルは順番に書き出す（同時に開くカーソル・ファイルは1つずつ）
+            return [
+                await export_table(
+                    db,
+                    data_type,
+                    Path(output_dir),
+                    ExportFormat(fmt),
+                    batch_size or settings.export_batch_size,
+                    UUID(user_id) if user_id else None,
+                    date.fromisoformat(start_date) if start_date else None,
+                    date.fromisoformat(end_date) if end_date else None,
+                )
+                for data_type in data_types
+            ]
+        finally:
+            await db.close()
+
+    results = _run_command("export", settings, _run())
+
+    typer.echo("\n=== Export Summary ===")
+    for result in results:
+        typer.echo(f"[OK] {result.table}: {result.rows} rows, {len(result.files)} files")
+    typer.echo("=" * 30 + "\n")
+    typer.echo("[OK] Export completed")
+
+
+@app.command()
+def analyze(
+    start_date: Annotated[str, typer.Option("--start-date", "-s", help="Start date (YYYY-MM-DD)")],
+    end_date: Annotated[str, typer.Option("--end-date", "-e", help="End date (YYYY-MM-DD)")],
+    all_users: Annotated[
+        bool, typer.Option("--all-users", help="Every active user in healthhub.users")
+    ] = False,
+    user_id: Annotated[
+        str | None, typer.Option("--user-id", help="Only this user (default: USER_ID)")
+    ] = None,
+    window_days: Annotated[
+        int | None,
+        typer.Option(
+            "--window-days", min=2, help="Baseline window (default: ANALYZE_WINDOW_DAYS)"
+        ),
+    ] = None,
+    threshold: Annotated[
+        float | None,
+        typer.Option("--threshold", min=0, help="|z| limit (default: ANALYZE_THRESHOLD)"),
+    ] = None,
+) -> None:
+    """Flag anomalous days of the daily metrics into healthhub.anomalies (run after fetch)."""
+    from datetime import date
+    from uuid import UUID
+
+    from healthhub_batch.analytics import AnalyzeResult, analyze_users
+    from healthhub_batch.database import init_database
+    from healthhub_batch.repository import UserRepository
+
+    settings = _load_settings()
+    window_days = window_days or settings.analyze_window_days
+    if threshold is None:
+        threshold = settings.analyze_threshold
+    typer.echo(
+        f"[INFO] Analyzing {start_date} to {end_date} "
+        f"({window_days}-day baseline, |z| >= {threshold:g})"
+    )
+
+    db = init_database(settings)
+
+    async def _run() -> AnalyzeResult:
+        try:
+            await _check_database(db)
+            if all_users:
+                async with db.session() as session:
+                    users = await UserRepository(session).list_active_users()
+                user_ids = [user.user_id for user in users]
+            else:
+                user_ids = [UUID(user_id or settings.user_id)]
+            return await analyze_users(
+                db,
+                user_ids,
+                date.fromisoformat(start_date),
+                date.fromisoformat(end_date),
+                window=window_days,
+                min_days=settings.analyze_min_days,
+                threshold=threshold,
+                user_batch=settings.analyze_user_batch,
+            )
+        finally:
+            await db.close()
+
+    result = _run_command("analyze", settings, _run())
+
+    typer.echo("\n=== Analyze Summary ===")
+    typer.echo(
+        f"[OK] {result.users} users, {result.scored} scored days, "
+        f"{result.anomalies} anomalies"
+    )
+    typer.echo("=" * 30 + "\n")
+    typer.echo("[OK] Analysis completed")
+
+
+@app.command("rebuild-rollups")
+def rebuild_rollups_command(
+    user_id: Annotated[
+        str | None, typer.Option("--user-id", help="Only this user (default: all users)")
+    ] = None,
+) -> None:
+    """Rebuild the weekly / monthly rollup tables from the daily summaries."""
+    from uuid import UUID
+
+    from healthhub_batch.database import init_database
+    from healthhub_batch.rollups import rebuild_rollups
+
+    settings = _load_settings()
+    typer.echo(f"[INFO] Rebuilding rollups for {user_id or 'all users'}")
+    db = init_database(settings)
+
+    async def _run() -> dict[str, int]:
+        try:
+            await _check_database(db)
+            return await rebuild_rollups(db, UUID(user_id) if user_id else None)
+        finally:
+            await db.close()
+
+    counts = _run_command("rebuild-rollups", settings, _run())
+
+    typer.echo("\n=== Rollup Summary ===")
+    for table, rows in counts.items():
+        typer.echo(f"[OK] {table}: {rows} rows")
+    typer.echo("=" * 30 + "\n")
+    typer.echo("[OK] Rollup rebuild completed")
+
+
 @app.command()
 def migrate() -> None:
     """Run database migrations."""
@@ -6,6 +6,8 @@
 """Configuration management using pydantic-settings."""
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -22,6 +24,52 @@ class Settings(BaseSettings):
     # Oura API settings
     oura_pat: str = Field(..., description="Oura Personal Access Token")
 
+    oura_api_base_url: str = Field(
+        default="https://api.ouraring.com/v2/usercollection",
+        description="Oura API base URL (override to point at a local fake server)",
+    )
+    oura_pats: dict[str, str] = Field(
+        default_factory=dict,
+        description='PATs by alias for multi-user runs, as JSON (e.g. {"alice": "..."})',
+    )
+    oura_rate_limit_per_second: float = Field(
+        default=10.0,
+        description="Maximum Oura API requests per second per client (adapted down on 429)",
+        gt=0,
+    )
+    oura_rate_limit_burst: int = Field(
+        default=10, description="Oura API requests allowed back-to-back", ge=1
+    )
+
+    oura_cache_dir: str = Field(
+        default="",
+        description="Directory for the on-disk Oura response cache (empty: disabled)",
+    )
+    oura_cache_ttl_seconds: float = Field(
+        default=900.0, description="Cache TTL for responses that include recent days", ge=0
+    )
+    oura_cache_closed_ttl_seconds: float = Field(
+        default=30 * 86400.0, description="Cache TTL for responses of closed past days", ge=0
+    )
+    oura_cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        description="Cache size above which least recently used responses are evicted",
+        ge=0,
+    )
+
+    archive_dir: str = Field(
+        default="",
+        description="Directory of the append-only raw response archive (empty: disabled)",
+    )
+    archive_compression_level: int = Field(
+        default=3, description="zstd level of archived responses", ge=1, le=22
+    )
+    archive_segment_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="Compressed size after which an archive month starts a new segment",
+        ge=1,
+    )
+
     # Database settings
     supabase_db_url: str = Field(..., description="Supabase PostgreSQL connection URL")
     supabase_service_role_key: str = Field(
@@ -29,6 +77,123 @@ class Settings(BaseSettings):
         description="Supabase Service Role Key (optional for REST API calls)",
     )
 
+    db_pooler_mode: Literal["auto", "direct", "session", "transaction"] = Field(
+        default="auto",
+        description=(
+            "Connection profile: direct Postgres, or a session/transaction-mode pooler "
+            "(PgBouncer/Supavisor). auto decides from the URL host and port"
+        ),
+    )
+    db_pool_size: int = Field(default=5, description="Connections kept in the client pool", ge=1)
+    db_max_overflow: int = Field(
+        default=10, description="Extra connections opened above db_pool_size under load", ge=0
+    )
+    db_pool_pre_ping: bool = Field(
+        default=True, description="Check pooled connections before use (direct/session mode)"
+    )
+    db_statement_cache_size: int = Field(
+        default=100,
+        description="Prepared statements cached per connection (always 0 in transaction mode)",
+        ge=0,
+    )
+    db_startup_check: bool = Field(
+        default=True, description="Probe the pooler mode at startup and warn on misconfiguration"
+    )
+
+    upsert_batch_size: int = Field(
+        default=500,
+        description="Maximum rows per multi-row INSERT ... ON CONFLICT statement",
+        ge=1,
+    )
+
+    parallel_table_writes: bool = Field(
+        default=False,
+        description="Write each table on its own connection and transaction concurrently",
+    )
+    pipeline_queue_size: int = Field(
+        default=8, description="Maximum pages buffered between two ingest pipeline stages", ge=1
+    )
+
+    read_cache_max_entries: int = Field(
+        default=256,
+        description="Repository range reads cached in process (0: disabled)",
+        ge=0,
+    )
+    read_cache_ttl_seconds: float = Field(
+        default=300.0, description="Seconds a cached repository read stays valid", gt=0
+    )
+
+    # Backfill settings
+    backfill_window_days: int = Field(
+        default=30, description="Days per window for backfill runs", ge=1
+    )
+    backfill_concurrency: int = Field(
+        default=4, description="Maximum windows processed concurrently during backfill", ge=1
+    )
+
+    export_batch_size: int = Field(
+        default=10_000, description="Rows fetched per server-side cursor batch by export", ge=1
+    )
+
+    # Heart rate settings
+    heartrate_window_days: int = Field(
+        default=7, description="Days per window for heart rate ingestion", ge=1
+    )
+    heartrate_concurrency: int = Field(
+        default=4, description="Maximum heart rate windows ingested concurrently", ge=1
+    )
+
+    # Anomaly detection settings
+    analyze_window_days: int = Field(
+        default=28, description="Trailing days forming the baseline of each day", ge=2
+    )
+    analyze_min_days: int = Field(
+        default=14, description="Days with values required in the window to score a day", ge=1
+    )
+    analyze_threshold: float = Field(
+        default=3.5, description="Absolute robust z-score at which a day is anomalous", gt=0
+    )
+    analyze_user_batch: int = Field(
+        default=100, description="Users loaded and scored together by analyze", ge=1
+    )
+
+    # Incremental sync settings
+    sync_revision_days: int = Field(
+        default=3,
+        description="Days before the sync watermark that are re-fetched (Oura revises recent days)",
+        ge=0,
+    )
+    sync_initial_days: int = Field(
+        default=30, description="Days fetched for an endpoint that has no watermark yet", ge=0
+    )
+
+    # Daemon settings
+    daemon_run_times: list[str] = Field(
+        default_factory=lambda: ["06:00"],
+        description='Local times (TIMEZONE) the daemon runs the sync, as JSON (e.g. ["06:00"])',
+    )
+    daemon_max_retries: int = Field(
+        default=3, description="Retries of a failed scheduled run", ge=0
+    )
+    daemon_retry_delay_seconds: float = Field(
+        default=300.0, description="Seconds between retries of a failed run", ge=0
+    )
+    daemon_status_file: str = Field(
+        default="", description="JSON file with the daemon's last-run status (empty: none)"
+    )
+    daemon_health_host: str = Field(default="127.0.0.1", description="Health endpoint host")
+    daemon_health_port: int = Field(
+        default=0,
+        description="Port of the /healthz, /status and /metrics endpoint (0: disabled)",
+        ge=0,
+    )
+
+    # Metrics settings
+    metrics_textfile: str = Field(
+        default="",
+        description="Prometheus textfile written after each command or daemon run (empty: none)",
+    )
+
     # Logging settings
     log_level: str = Field(default="INFO", description="Logging level")
 
@@ -48,6 +213,28 @@ class Settings(BaseSettings):
         description="User ID for single-user batch processing",
     )
     timezone: str = Field(default="UTC", description="Timezone for data processing")
+    multi_user_concurrency: int = Field(
+        default=8, description="Maximum users processed concurrently by fetch-all-users", ge=1
+    )
+
+    def resolve_oura_pat(self, alias: str) -> str:
+        """Resolve a PAT alias stored in ``healthhub.users`` to the token.
+
+        Args:
+            alias: Key in ``OURA_PATS`` (``default`` falls back to ``OURA_PAT``)
+
+        Returns:
+            Personal Access Token
+
+        Raises:
+            ValueError: If the alias is unknown
+        """
+        if alias in self.oura_pats:
+            return self.oura_pats[alias]
+        if alias == "default" and self.oura_pat:
+            return self.oura_pat
+        msg = f"OURA_PATS has no token for alias '{alias}'"
+        raise ValueError(msg)
 
     def validate_required_secrets(self) -> None:
         """Validate that required secrets are provided."""
@@ -0,0 +1,182 @@
+# src/healthhub_batch/copy_loader.py
+# COPYによるステージングテーブル経由の一括ロード（大量リカバリ用）
+# asyncpgのバイナリCOPYで一時テーブルに流し込み、テーブルごとに1回のINSERT ... SELECTでマージする
+# RELEVANT FILES: repository.py, database.py, fetcher.py
+
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date
+from typing import Any
+from uuid import UUID
+
+import structlog
+from asyncpg import Connection
+
+from healthhub_batch.database import Database
+from healthhub_batch.metrics import DB_STATEMENT_SECONDS, observe_upsert
+from healthhub_batch.repository import (
+    CONFLICT_KEYS,
+    IMMUTABLE_COLUMNS,
+    TABLE_MAPPINGS,
+    UpsertResult,
+)
+from healthhub_batch.rollups import refresh_rollups
+
+logger = structlog.get_logger()
+
+# ステージングテーブルで行の到着順を保持するカラム（同一日の重複は後勝ち）
+_ORDINAL_COLUMN = "_ord"
+
+
+class CopyLoader:
+    """COPY + INSERT ... SELECT ... ON CONFLICT による一括ローダー
+
+    HealthDataRepository と同じ列マッピング（TABLE_MAPPINGS）を使うため、
+    保存される内容はORM経由のupsertと同一になる。
+    """
+
+    def __init__(self, db: Database, user_id: UUID):
+        """
+        Args:
+            db: データベースインスタンス
+            user_id: ユーザーID
+        """
+        self.db = db
+        self.user_id = user_id
+
+    async def load(self, parsed_data: dict[str, list[Any]]) -> dict[str, UpsertResult]:
+        """
+        データ種別ごとのレコードを1トランザクションでロード
+
+        Args:
+            parsed_data: データ種別（"sleep" など）→ Pydanticモデルのリスト
+
+        Returns:
+            データ種別ごとの挿入・更新・変更なしの件数
+        """
+        save_counts: dict[str, UpsertResult] = {}
+        written: dict[str, list[date]] = {}
+
+        async with self.db.engine.connect() as conn:
+            raw_conn = await conn.get_raw_connection()
+            pg_conn: Connection = raw_conn.driver_connection
+
+            async with pg_conn.transaction():
+                for data_type, items in parsed_data.items():
+                    save_counts[data_type] = await self._load_table(
+                        pg_conn, data_type, items, written
+                    )
+        self._invalidate(written)
+
+        logger.info("copy_load_completed", save_counts=save_counts)
+        return save_counts
+
+    async def load_table(self, data_type: str, items: list[Any]) -> UpsertResult:
+        """
+        1テーブル分を専用のコネクション・トランザクションでロード（テーブルごとの並列ロード用）
+
+        Args:
+            data_type: データ種別（"sleep" など）
+            items: Pydanticモデルのリスト
+
+        Returns:
+            UpsertResult: 挿入・更新・変更なしの件数
+        """
+        written: dict[str, list[date]] = {}
+        async with self.db.engine.connect() as conn:
+            raw_conn = await conn.get_raw_connection()
+            pg_conn: Connection = raw_conn.driver_connection
+
+            async with pg_conn.transaction():
+                counts = await self._load_table(pg_conn, data_type, items, written)
+        self._invalidate(written)
+        return counts
+
+    async def _load_table(
+        self,
+        pg_conn: Connection,
+        data_type: str,
+        items: list[Any],
+        written: dict[str, list[date]],
+    ) -> UpsertResult:
+        """
+        1テーブル分をステージングテーブルへCOPYし、本テーブルへマージ
+
+        Args:
+            pg_conn: asyncpgコネクション（トランザクション内）
+            data_type: データ種別
+            items: Pydanticモデルのリスト
+            written: 挿入・更新した日を入れる辞書（コミット後のキャッシュ無効化用）
+
+        Returns:
+            UpsertResult: 挿入・更新・変更なしの件数
+        """
+        if not items:
+            return UpsertResult()
+
+        mapping = TABLE_MAPPINGS[data_type]
+        table = mapping.model.__table__
+        columns = list(mapping.to_row(self.user_id, items[0]).keys())
+        staging = f"_stage_{table.name}"
+
+        # 本テーブルと同じ列定義の一時テーブル（コミット時に自動削除）
+        await pg_conn.execute(
+            f"CREATE TEMP TABLE {staging} "
+            f"(LIKE {table.fullname} INCLUDING DEFAULTS, {_ORDINAL_COLUMN} bigint) "
+            "ON COMMIT DROP"
+        )
+
+        # asyncpgを直接使うのでSQLAlchemyのイベントでは計測されない（ここで計測する）
+        with DB_STATEMENT_SECONDS.time(operation="COPY"):
+            await pg_conn.copy_records_to_table(
+                staging,
+                records=self._records(items, mapping.to_row, columns),
+                columns=[*columns, _ORDINAL_COLUMN],
+            )
+
+        column_list = ", ".join(columns)
+        conflict_keys = ", ".join(CONFLICT_KEYS)
+        updates = ", ".join(
+            f"{col} = EXCLUDED.{col}" for col in columns if col not in IMMUTABLE_COLUMNS
+        )
+        # content_hashが同じ行は更新しない（RETURNINGはINSERT/UPDATEされた行のみ）
+        # 返った日を含む週・月のロールアップは同じトランザクションで集計し直す
+        with DB_STATEMENT_SECONDS.time(operation="INSERT"):
+            flags = await pg_conn.fetch(
+                f"INSERT INTO {table.fullname} AS t ({column_list}) "
+                f"SELECT DISTINCT ON ({conflict_keys}) {column_list} FROM {staging} "
+                f"ORDER BY {conflict_keys}, {_ORDINAL_COLUMN} DESC "
+                f"ON CONFLICT ({conflict_keys}) DO UPDATE SET {updates} "
+                "WHERE t.content_hash IS DISTINCT FROM EXCLUDED.content_hash "
+                "RETURNING (xmax = 0) AS inserted, day"
+            )
+        days = [row["day"] for row in flags]
+        await refresh_rollups(pg_conn, mapping.model, self.user_id, days)
+        written[data_type] = days
+        self._invalidate({data_type: days})
+        unique_days = len({(self.user_id, item.day) for item in items})
+
+        inserted = sum(1 for row in flags if row["inserted"])
+        updated = len(flags) - inserted
+        counts = UpsertResult(inserted, updated, unique_days - inserted - updated)
+        observe_upsert(table.name, *counts)
+        logger.info(f"{data_type}_data_copied", **counts._asdict())
+        return counts
+
+    def _invalidate(self, written: dict[str, list[date]]) -> None:
+        """書き込んだ日を含む読み出しキャッシュを無効化（書き込み時とコミット後に呼ぶ）"""
+        cache = self.db.read_cache
+        if cache is None:
+            return
+        for data_type, days in written.items():
+            cache.invalidate(self.user_id, data_type, days)
+
+    def _records(
+        self,
+        items: Iterable[Any],
+        to_row: Callable[[UUID, Any], dict[str, Any]],
+        columns: list[str],
+    ) -> Iterator[tuple[Any, ...]]:
+        """COPY用のタプルを1件ずつ生成（行dictを溜め込まない）"""
+        for ordinal, item in enumerate(items):
+            row = to_row(self.user_id, item)
+            yield (*(row[col] for col in columns), ordinal)
@@ -0,0 +1,387 @@
+# src/healthhub_batch/daemon.py
+# 常駐プロセスで増分同期を定時実行するスケジューラ
+# OuraClient（HTTPプール）とDatabase（コネクションプール）を実行間で使い回し、取りこぼした実行は起動時・復帰時に追いかける
+# RELEVANT FILES: sync.py, multi_user.py, cli.py, config.py
+
+"""In-process scheduler that runs the incremental sync at fixed local times."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from collections.abc import Callable
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+import httpx
+import structlog
+
+from healthhub_batch.config import Settings
+from healthhub_batch.database import Database
+from healthhub_batch.metrics import (
+    OPENMETRICS_CONTENT_TYPE,
+    PROMETHEUS_CONTENT_TYPE,
+    REGISTRY,
+    record_run,
+)
+from healthhub_batch.multi_user import local_today
+from healthhub_batch.oura_client import OuraClient
+from healthhub_batch.sync import sync_all_users, sync_user
+
+logger = structlog.get_logger(__name__)
+
+# 時計のずれやスリープ復帰に気づけるよう、待機はこの秒数ごとに区切る
+MAX_SLEEP_SECONDS = 60.0
+
+
+def parse_run_times(values: list[str]) -> list[time]:
+    """Parse ``HH:MM`` run times.
+
+    Args:
+        values: Times such as ``["06:00", "18:30"]``
+
+    Returns:
+        Sorted, de-duplicated times
+
+    Raises:
+        ValueError: If the list is empty or a value is not ``HH:MM``
+    """
+    if not values:
+        msg = "DAEMON_RUN_TIMES must contain at least one HH:MM time"
+        raise ValueError(msg)
+    try:
+        return sorted({time.fromisoformat(value) for value in values})
+    except ValueError as e:
+        msg = f"DAEMON_RUN_TIMES must be HH:MM times: {values}"
+        raise ValueError(msg) from e
+
+
+def previous_run_time(now: datetime, run_times: list[time], tz: ZoneInfo) -> datetime:
+    """Return the latest scheduled time at or before ``now``.
+
+    Args:
+        now: Current time (timezone-aware)
+        run_times: Local run times (see ``parse_run_times``)
+        tz: Timezone of the run times
+
+    Returns:
+        Scheduled time (timezone-aware)
+    """
+    local_now = now.astimezone(tz)
+    for days_back in range(2):
+        day = local_now.date() - timedelta(days=days_back)
+        slots = [datetime.combine(day, t, tzinfo=tz) for t in run_times]
+        past = [slot for slot in slots if slot <= local_now]
+        if past:
+            return max(past)
+    msg = "run_times must not be empty"
+    raise ValueError(msg)
+
+
+def next_run_time(now: datetime, run_times: list[time], tz: ZoneInfo) -> datetime:
+    """Return the first scheduled time strictly after ``now``.
+
+    Args:
+        now: Current time (timezone-aware)
+        run_times: Local run times (see ``parse_run_times``)
+        tz: Timezone of the run times
+
+    Returns:
+        Scheduled time (timezone-aware)
+    """
+    local_now = now.astimezone(tz)
+    for days_ahead in range(2):
+        day = local_now.date() + timedelta(days=days_ahead)
+        slots = [datetime.combine(day, t, tzinfo=tz) for t in run_times]
+        upcoming = [slot for slot in slots if slot > local_now]
+        if upcoming:
+            return min(upcoming)
+    msg = "run_times must not be empty"
+    raise ValueError(msg)
+
+
+class DaemonStatus:
+    """Last-run status exposed through the status file and health endpoint."""
+
+    def __init__(self, started_at: datetime) -> None:
+        self.started_at = started_at
+        self.running = False
+        self.runs = 0
+        self.consecutive_failures = 0
+        self.gave_up = False  # 直近の予定実行がリトライ後も失敗した
+        self.last_run_started_at: datetime | None = None
+        self.last_run_finished_at: datetime | None = None
+        self.last_success_at: datetime | None = None
+        self.last_error: str | None = None
+        self.next_run_at: datetime | None = None
+        self.last_summary: dict[str, Any] = {}
+
+    @property
+    def healthy(self) -> bool:
+        """False once a scheduled run has failed after all retries (not while retrying)."""
+        return not self.gave_up
+
+    def as_dict(self) -> dict[str, Any]:
+        def iso(value: datetime | None) -> str | None:
+            return value.isoformat() if value else None
+
+        return {
+            "healthy": self.healthy,
+            "running": self.running,
+            "started_at": iso(self.started_at),
+            "runs": self.runs,
+            "consecutive_failures": self.consecutive_failures,
+            "gave_up": self.gave_up,
+            "last_run_started_at": iso(self.last_run_started_at),
+            "last_run_finished_at": iso(self.last_run_finished_at),
+            "last_success_at": iso(self.last_success_at),
+            "last_error": self.last_error,
+            "next_run_at": iso(self.next_run_at),
+            "last_summary": self.last_summary,
+        }
+
+
+def load_last_success(path: Path) -> datetime | None:
+    """前回プロセスのステータスファイルから最終成功時刻を読む（取りこぼし判定用）"""
+    try:
+        value = json.loads(path.read_text()).get("last_success_at")
+    except (FileNotFoundError, ValueError):
+        return None
+    return datetime.fromisoformat(value) if value else None
+
+
+class SyncDaemon:
+    """Run the incremental sync at ``DAEMON_RUN_TIMES`` in one long-lived process.
+
+    The HTTP pool, the Oura client (with its rate limiter) and the database
+    engine are created once and reused by every run. When scheduled times
+    were missed (process down, host asleep), the sync runs once as soon as
+    the daemon notices; several missed slots collapse into that one run,
+    which syncs from the watermarks anyway. A failed run is retried
+    ``DAEMON_MAX_RETRIES`` times, ``DAEMON_RETRY_DELAY_SECONDS`` apart.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        db: Database,
+        all_users: bool = False,
+        concurrency: int = 8,
+        clock: Callable[[], datetime] | None = None,
+    ) -> None:
+        """Initialize the daemon.
+
+        Args:
+            settings: Application settings
+            db: Database reused by every run (closed by the caller)
+            all_users: Sync every active user in healthhub.users
+            concurrency: Concurrent users (with ``all_users``)
+            clock: Current time (injectable for tests)
+        """
+        self.settings = settings
+        self.db = db
+        self.all_users = all_users
+        self.concurrency = concurrency
+        self.tz = ZoneInfo(settings.timezone)
+        self.run_times = parse_run_times(settings.daemon_run_times)
+        self._clock = clock or (lambda: datetime.now(ZoneInfo("UTC")))
+        self.status = DaemonStatus(self._clock())
+        status_file = settings.daemon_status_file
+        self.status_file = Path(status_file) if status_file else None
+        self._stop = asyncio.Event()
+        # run() の間だけ有効な、実行間で使い回すHTTPプールとクライアント
+        self._http_client: httpx.AsyncClient | None = None
+        self._client: OuraClient
+
+    def stop(self) -> None:
+        """Ask the daemon to finish after the current step."""
+        self._stop.set()
+
+    async def run(self) -> None:
+        """Run until ``stop()`` is called."""
+        last_success = load_last_success(self.status_file) if self.status_file else None
+        self.status.last_success_at = last_success
+        # 前回プロセスが最新の予定時刻以降に成功していれば、その枠は実行済みとみなす
+        slot = previous_run_time(self._clock(), self.run_times, self.tz)
+        done_slot = slot if last_success and last_success >= slot else None
+
+        health_server = None
+        if self.settings.daemon_health_port:
+            health_server = await asyncio.start_server(
+                self._handle_health,
+                self.settings.daemon_health_host,
+                self.settings.daemon_health_port,
+            )
+
+        self._http_client = OuraClient.create_http_client(
+            max_connections=self.concurrency * 5, base_url=self.settings.oura_api_base_url
+        )
+        logger.info(
+            "daemon_started",
+            run_times=[t.isoformat("minutes") for t in self.run_times],
+            timezone=self.settings.timezone,
+            all_users=self.all_users,
+            health_port=self.settings.daemon_health_port or None,
+        )
+        client = OuraClient.from_settings(self.settings, http_client=self._http_client)
+        try:
+            async with self._http_client, client:
+                self._client = client
+                while not self._stop.is_set():
+                    now = self._clock()
+                    slot = previous_run_time(now, self.run_times, self.tz)
+                    if slot != done_slot:
+                        # 遅れが大きければ停止中・スリープ中に取りこぼした枠の追いかけ実行
+                        logger.info(
+                            "daemon_run_due",
+                            scheduled_at=slot.isoformat(),
+                            late_seconds=round((now - slot).total_seconds()),
+                        )
+                        await self._run_with_retries()
+                        done_slot = slot
+                        continue
+
+                    self.status.next_run_at = next_run_time(now, self.run_times, self.tz)
+                    self._write_status()
+                    wait = (self.status.next_run_at - now).total_seconds()
+                    await self._sleep(min(max(wait, 0.0), MAX_SLEEP_SECONDS))
+        finally:
+            if health_server is not None:
+                health_server.close()
+                await health_server.wait_closed()
+            logger.info("daemon_stopped", runs=self.status.runs)
+
+    async def _sleep(self, seconds: float) -> None:
+        """stop() で即座に起きる待機"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except TimeoutError:
+            pass
+
+    async def _run_with_retries(self) -> None:
+        """1回分の同期を実行し、失敗したら間隔を空けてリトライ"""
+        retries = self.settings.daemon_max_retries
+        for attempt in range(retries + 1):
+            if self._stop.is_set():
+                return
+            if await self._run_once():
+                return
+            if attempt < retries:
+                logger.warning(
+                    "daemon_run_retry_scheduled",
+                    attempt=attempt + 1,
+                    delay_seconds=self.settings.daemon_retry_delay_seconds,
+                )
+                await self._sleep(self.settings.daemon_retry_delay_seconds)
+        self.status.gave_up = True
+        self._write_status()
+        logger.error("daemon_run_gave_up", attempts=retries + 1, error=self.status.last_error)
+
+    async def _run_once(self) -> bool:
+        """同期を1回実行してステータスを更新（成功ならTrue）"""
+        status = self.status
+        status.running = True
+        status.runs += 1
+        status.last_run_started_at = self._clock()
+        self._write_status()
+
+        error: str | None
+        try:
+            if self.all_users:
+                results = await sync_all_users(
+                    self.settings, self.db, self.concurrency, self._http_client
+                )
+                failed = [str(r.user_id) for r in results if not r.ok]
+                summary: dict[str, Any] = {"users": len(results), "failed_users": failed}
+                error = f"{len(failed)} users failed" if failed else None
+            else:
+                result = await sync_user(
+                    self._client,
+                    UUID(self.settings.user_id),
+                    local_today(self.settings.timezone),
+                    self.settings,
+                    self.db,
+                )
+                summary = {
+                    data_type: counts._asdict() for data_type, counts in result.save_counts.items()
+                }
+                error = f"failed endpoints: {', '.join(result.errors)}" if result.errors else None
+        except Exception as e:
+            summary = {}
+            error = str(e)
+
+        status.running = False
+        status.last_run_finished_at = self._clock()
+        status.last_summary = summary
+        status.last_error = error
+        record_run(
+            "serve",
+            (status.last_run_finished_at - status.last_run_started_at).total_seconds(),
+            error is None,
+            self.settings.metrics_textfile,
+        )
+        if error is None:
+            status.last_success_at = status.last_run_finished_at
+            status.consecutive_failures = 0
+            status.gave_up = False
+            logger.info("daemon_run_completed", summary=summary)
+        else:
+            status.consecutive_failures += 1
+            logger.error("daemon_run_failed", error=error, summary=summary)
+        self._write_status()
+        return error is None
+
+    def _write_status(self) -> None:
+        """ステータスファイルを書き換え（一時ファイル経由で置き換え、読み手が書きかけを見ない）"""
+        if self.status_file is None:
+            return
+        tmp_path = self.status_file.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.status.as_dict(), indent=2))
+        os.replace(tmp_path, self.status_file)
+
+    async def _handle_health(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """GET /healthz（200/503）と GET /status（常に200）に最新のステータスをJSONで、
+        GET /metrics にメトリクスを返す（Acceptに application/openmetrics-text があればOpenMetrics）
+        """
+        try:
+            request_line = await reader.readline()
+            accept = ""
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "accept":
+                    accept = value.strip()
+            parts = request_line.decode("latin-1").split(" ")
+            path = parts[1] if len(parts) > 1 else "/"
+
+            content_type = "application/json"
+            if path in ("/healthz", "/status"):
+                ok = self.status.healthy or path == "/status"
+                code, reason = (200, "OK") if ok else (503, "Service Unavailable")
+                body = json.dumps(self.status.as_dict()).encode()
+            elif path == "/metrics":
+                openmetrics = "application/openmetrics-text" in accept
+                code, reason = 200, "OK"
+                body = REGISTRY.render(openmetrics).encode()
+                content_type = OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+            else:
+                code, reason, body = 404, "Not Found", b'{"error": "not found"}'
+
+            writer.write(
+                (
+                    f"HTTP/1.1 {code} {reason}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
@@ -3,16 +3,104 @@
 # SQLAlchemy非同期エンジンとセッションファクトリを提供
 # RELEVANT FILES: db_models.py, config.py, repository.py
 
+import time
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
+from uuid import uuid4
 
 import structlog
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from healthhub_batch.config import Settings
+from healthhub_batch.metrics import DB_STATEMENT_SECONDS, statement_operation
+from healthhub_batch.read_cache import ReadCache
 
 logger = structlog.get_logger()
 
+# Supabaseのプーラー（Supavisor）はホスト名で、モードはポートで判別できる
+SUPABASE_POOLER_HOST_SUFFIX = ".pooler.supabase.com"
+TRANSACTION_POOLER_PORT = 6543
+
+# 起動時チェックで pg_backend_pid() を取得する回数（トランザクションプーリングの検出用）
+_PROBE_TRANSACTIONS = 5
+
+
+def _statement_started(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    """before_cursor_execute: 実行開始時刻を実行コンテキストに記録"""
+    context._healthhub_started = time.perf_counter()
+
+
+def _statement_finished(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    """after_cursor_execute: 先頭のSQLキーワードごとに実行時間を記録"""
+    elapsed = time.perf_counter() - context._healthhub_started
+    DB_STATEMENT_SECONDS.observe(elapsed, operation=statement_operation(statement))
+
+
+def detect_pooler_mode(db_url: str) -> str:
+    """
+    接続URLからプーラーのモードを推定
+
+    Args:
+        db_url: PostgreSQL接続URL
+
+    Returns:
+        "direct" / "session" / "transaction"
+    """
+    url = make_url(db_url)
+    if url.port == TRANSACTION_POOLER_PORT:
+        return "transaction"
+    if (url.host or "").endswith(SUPABASE_POOLER_HOST_SUFFIX):
+        return "session"
+    return "direct"
+
+
+def engine_options(settings: Settings, pooler_mode: str) -> dict[str, Any]:
+    """
+    プーラーのモードに合わせたエンジン設定を作成
+
+    トランザクションモードではトランザクションごとに別のサーバー接続に振り分けられるため、
+    名前付きのプリペアドステートメントを使い回せない。キャッシュを無効にし、文の名前を毎回
+    一意にする。接続のプールはプーラー側が持つので、クライアント側はNullPoolにする。
+
+    Args:
+        settings: アプリケーション設定
+        pooler_mode: "direct" / "session" / "transaction"
+
+    Returns:
+        create_async_engine に渡すキーワード引数
+    """
+    connect_args: dict[str, Any] = {
+        "timeout": 30,  # 接続タイムアウト（秒）
+        "command_timeout": 30,  # コマンドタイムアウト（秒）
+        "ssl": "prefer",  # SSL接続を優先（Supabase推奨）
+    }
+
+    if pooler_mode == "transaction":
+        connect_args.update(
+            statement_cache_size=0,  # asyncpg側のキャッシュ
+            prepared_statement_cache_size=0,  # SQLAlchemy側のキャッシュ
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    connect_args.update(
+        statement_cache_size=settings.db_statement_cache_size,
+        prepared_statement_cache_size=settings.db_statement_cache_size,
+    )
+    return {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "connect_args": connect_args,
+    }
+
 
 class Database:
     """データベース接続管理クラス"""
@@ -32,18 +120,26 @@ class Database:
         if db_url.startswith("postgresql://"):
             db_url = db_url.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-        # 非同期エンジンの作成
+        self.pooler_mode = (
+            detect_pooler_mode(db_url)
+            if settings.db_pooler_mode == "auto"
+            else settings.db_pooler_mode
+        )
+
+        # 非同期エンジンの作成（SQLログは出力しない）
         self.engine = create_async_engine(
-            db_url,
-            echo=False,  # SQLログを出力しない（本番環境）
-            pool_pre_ping=True,  # 接続チェック
-            pool_size=5,  # コネクションプール数
-            max_overflow=10,  # 最大オーバーフロー接続数
-            connect_args={
-                "timeout": 30,  # 接続タイムアウト（秒）
-                "command_timeout": 30,  # コマンドタイムアウト（秒）
-                "ssl": "prefer",  # SSL接続を優先（Supabase推奨）
-            }
+            db_url, echo=False, **engine_options(settings, self.pooler_mode)
+        )
+
+        # SQLAlchemy経由の全ステートメントの実行時間を計測
+        event.listen(self.engine.sync_engine, "before_cursor_execute", _statement_started)
+        event.listen(self.engine.sync_engine, "after_cursor_execute", _statement_finished)
+
+        # リポジトリの読み出しキャッシュ（このプロセス内の書き込みで無効化される）
+        self.read_cache = (
+            ReadCache(settings.read_cache_max_entries, settings.read_cache_ttl_seconds)
+            if settings.read_cache_max_entries
+            else None
         )
 
         # セッションファクトリの作成
@@ -53,7 +149,61 @@ class Database:
             expire_on_commit=False,  # コミット後もオブジェクトを使える
         )
 
-        logger.info("database_initialized", db_host=self._get_db_host(db_url))
+        logger.info(
+            "database_initialized",
+            db_host=self._get_db_host(db_url),
+            pooler_mode=self.pooler_mode,
+        )
+
+    async def check_pooler(self) -> list[str]:
+        """
+        接続先のプーリング方式を実測し、設定との食い違いを警告する
+
+        1本のクライアント接続で短いトランザクションを繰り返し、バックエンドのPIDが変われば
+        トランザクションモードのプーラー経由と判定する（変わらなければ直結かセッションモード）。
+
+        Returns:
+            警告メッセージのリスト（問題なければ空）
+        """
+        warnings: list[str] = []
+        try:
+            async with self.engine.connect() as conn:
+                pids = set()
+                for _ in range(_PROBE_TRANSACTIONS):
+                    pids.add((await conn.execute(text("SELECT pg_backend_pid()"))).scalar())
+                    await conn.commit()
+                max_connections = int(
+                    (await conn.execute(text("SHOW max_connections"))).scalar() or 0
+                )
+        except Exception as e:
+            warnings.append(
+                f"pooler check failed ({e}); if this is a transaction-mode pooler, "
+                "set DB_POOLER_MODE=transaction"
+            )
+        else:
+            transaction_pooling = len(pids) > 1
+            pool_limit = self.settings.db_pool_size + self.settings.db_max_overflow
+            if transaction_pooling and self.pooler_mode != "transaction":
+                warnings.append(
+                    "transaction-mode pooler detected but DB_POOLER_MODE resolves to "
+                    f"'{self.pooler_mode}'; prepared statements will fail, "
+                    "set DB_POOLER_MODE=transaction"
+                )
+            elif not transaction_pooling and self.pooler_mode == "transaction":
+                logger.info("database_pooler_not_observed", backend_pids=len(pids))
+            if self.pooler_mode != "transaction" and max_connections and (
+                pool_limit > max_connections
+            ):
+                warnings.append(
+                    f"DB_POOL_SIZE + DB_MAX_OVERFLOW ({pool_limit}) exceeds the server's "
+                    f"max_connections ({max_connections})"
+                )
+
+        for message in warnings:
+            logger.warning("database_pooler_misconfigured", message=message)
+        if not warnings:
+            logger.info("database_pooler_checked", pooler_mode=self.pooler_mode)
+        return warnings
 
     def _get_db_host(self, db_url: str) -> str:
         """接続文字列からホスト名を抽出（ログ用）"""
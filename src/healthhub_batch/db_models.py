@@ -7,7 +7,19 @@ from datetime import date, datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import Date, DateTime, Integer, Numeric, SmallInteger, String, Text
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    LargeBinary,
+    Numeric,
+    SmallInteger,
+    String,
+    Text,
+    true,
+)
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql import func
@@ -67,6 +79,8 @@ class DailySleepSummary(Base):
     document_id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True), nullable=False, unique=True
     )
+    # ソースドキュメントのSHA-256（変化のない再取得ではupsertで更新しない）
+    content_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -108,6 +122,14 @@ class DailyActivitySummary(Base):
     # Other metrics
     inactivity_alerts: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
 
+    # Intraday series（series_codec でエンコード）
+    met_interval: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    met_timestamp: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    met_items: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # float32 LE
+    class_5_min: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)  # 1 byte/slot
+
     # Contributors (展開)
     contributors_meet_daily_targets: Mapped[Optional[int]] = mapped_column(
         SmallInteger, nullable=True
@@ -135,6 +157,8 @@ class DailyActivitySummary(Base):
     document_id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True), nullable=False, unique=True
     )
+    # ソースドキュメントのSHA-256（変化のない再取得ではupsertで更新しない）
+    content_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -197,6 +221,8 @@ class DailyReadinessSummary(Base):
     document_id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True), nullable=False, unique=True
     )
+    # ソースドキュメントのSHA-256（変化のない再取得ではupsertで更新しない）
+    content_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -237,6 +263,8 @@ class DailyStressSummary(Base):
     document_id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True), nullable=False, unique=True
     )
+    # ソースドキュメントのSHA-256（変化のない再取得ではupsertで更新しない）
+    content_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -278,6 +306,151 @@ class DailyResilienceSummary(Base):
     document_id: Mapped[UUID] = mapped_column(
         PG_UUID(as_uuid=True), nullable=False, unique=True
     )
+    # ソースドキュメントのSHA-256（変化のない再取得ではupsertで更新しない）
+    content_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+# ===============================
+# Users
+# ===============================
+
+
+class User(Base):
+    """バッチ対象ユーザーテーブル"""
+
+    __tablename__ = "users"
+    __table_args__ = {"schema": "healthhub"}
+
+    # Primary Key
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True)
+
+    # PATそのものは保存せず、Settings.oura_pats のキー（エイリアス）だけを持つ
+    oura_pat_alias: Mapped[str] = mapped_column(Text, nullable=False)
+    timezone: Mapped[str] = mapped_column(Text, nullable=False, server_default="UTC")
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=true())
+
+    # Metadata
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+
+
+# ===============================
+# Heart Rate
+# ===============================
+
+
+class HeartrateSample(Base):
+    """心拍数サンプルテーブル（timestampの月単位でレンジパーティション分割）
+
+    パーティション（heartrate_samples_yYYYYmMM）は heartrate.ensure_partitions が作成する。
+    行数が多いため created_at などのメタデータ列は持たない。
+    """
+
+    __tablename__ = "heartrate_samples"
+    __table_args__ = {"schema": "healthhub", "postgresql_partition_by": "RANGE (timestamp)"}
+
+    # Primary Key（パーティションキーを含む）
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    source: Mapped[str] = mapped_column(Text, primary_key=True)
+
+    bpm: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+
+
+# ===============================
+# Rollups
+# ===============================
+
+
+class _RollupColumns:
+    """週次・月次ロールアップ共通のカラム（1行 = ユーザー × 期間 × 指標）"""
+
+    # Primary Key
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True)
+    period_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    metric: Mapped[str] = mapped_column(Text, primary_key=True)
+
+    # Aggregates（値がNULLの日は数えない）
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    sum: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    min: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    max: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    mean: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # Metadata
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class WeeklyRollup(_RollupColumns, Base):
+    """ISO週（月曜始まり）単位のロールアップテーブル（rollups.py が upsert 時に更新）"""
+
+    __tablename__ = "weekly_rollups"
+    __table_args__ = {"schema": "healthhub"}
+
+
+class MonthlyRollup(_RollupColumns, Base):
+    """月単位のロールアップテーブル（rollups.py が upsert 時に更新）"""
+
+    __tablename__ = "monthly_rollups"
+    __table_args__ = {"schema": "healthhub"}
+
+
+# ===============================
+# Anomalies
+# ===============================
+
+
+class Anomaly(Base):
+    """指標の異常日テーブル（analytics.py が期間単位で置き換える）"""
+
+    __tablename__ = "anomalies"
+    __table_args__ = {"schema": "healthhub"}
+
+    # Primary Key
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    metric: Mapped[str] = mapped_column(Text, primary_key=True)
+
+    # Score
+    value: Mapped[float] = mapped_column(Float, nullable=False)
+    baseline: Mapped[float] = mapped_column(Float, nullable=False)  # 直前の窓の中央値
+    scale: Mapped[float] = mapped_column(Float, nullable=False)  # 1.4826 × MAD
+    z_score: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # Metadata
+    detected_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+# ===============================
+# Sync State
+# ===============================
+
+
+class SyncState(Base):
+    """増分同期のウォーターマークテーブル（ユーザー × エンドポイント）"""
+
+    __tablename__ = "sync_state"
+    __table_args__ = {"schema": "healthhub"}
+
+    # Primary Key
+    user_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True)
+    endpoint: Mapped[str] = mapped_column(Text, primary_key=True)
+
+    # Watermark
+    last_synced_day: Mapped[date] = mapped_column(Date, nullable=False)
+    max_source_timestamp: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+    # Metadata
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,270 @@
+# src/healthhub_batch/export.py
+# 日次サマリーテーブルのParquet / Arrow IPCエクスポート
+# サーバーサイドカーソルで一定行数ずつ読み、ユーザー × 年のパーティションへ逐次書き出す（メモリ使用量はバッチサイズで決まる）
+# RELEVANT FILES: db_models.py, repository.py, series_codec.py, cli.py
+
+"""Stream the daily summary tables into partitioned Parquet or Arrow IPC files."""
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Sequence
+from datetime import date
+from enum import Enum
+from itertools import groupby
+from pathlib import Path
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+import structlog
+from sqlalchemy import Column, Table, select
+from sqlalchemy import types as sqltypes
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+
+from healthhub_batch.database import Database
+from healthhub_batch.repository import TABLE_MAPPINGS
+from healthhub_batch.series_codec import CLASS_5_MIN_DTYPE, MET_DTYPE
+
+logger = structlog.get_logger(__name__)
+
+DEFAULT_EXPORT_BATCH_SIZE = 10_000
+
+# 分析には不要な内部カラム
+EXCLUDED_COLUMNS = {"content_hash"}
+
+# bytea の日内時系列は要素型つきのリストとして書き出す
+SERIES_COLUMNS: dict[str, tuple[np.dtype, pa.DataType]] = {
+    "met_items": (MET_DTYPE, pa.float32()),
+    "class_5_min": (CLASS_5_MIN_DTYPE, pa.uint8()),
+}
+
+
+class ExportFormat(str, Enum):
+    """出力形式"""
+
+    PARQUET = "parquet"
+    IPC = "ipc"  # Arrow IPC（Feather v2）
+
+
+class ExportResult(NamedTuple):
+    """1テーブル分のエクスポート結果"""
+
+    table: str
+    rows: int
+    files: list[Path]
+
+
+def arrow_type(column: Column[Any]) -> pa.DataType:
+    """Return the Arrow type of a table column.
+
+    ``Numeric(p, s)`` becomes ``decimal128(p, s)`` and ``SmallInteger``
+    ``int16``, so readers see the database types rather than float64/int64.
+
+    Args:
+        column: SQLAlchemy column
+
+    Returns:
+        Arrow data type
+
+    Raises:
+        TypeError: If the column type has no mapping
+    """
+    if column.name in SERIES_COLUMNS:
+        return pa.list_(SERIES_COLUMNS[column.name][1])
+    column_type = column.type
+    if isinstance(column_type, PG_UUID):
+        return pa.string()
+    if isinstance(column_type, sqltypes.Numeric) and not isinstance(column_type, sqltypes.Float):
+        return pa.decimal128(column_type.precision or 38, column_type.scale or 0)
+    if isinstance(column_type, sqltypes.DateTime):
+        return pa.timestamp("us", tz="UTC") if column_type.timezone else pa.timestamp("us")
+    mapping: list[tuple[type[Any], pa.DataType]] = [
+        (sqltypes.SmallInteger, pa.int16()),
+        (sqltypes.BigInteger, pa.int64()),
+        (sqltypes.Integer, pa.int32()),
+        (sqltypes.Float, pa.float64()),
+        (sqltypes.Boolean, pa.bool_()),
+        (sqltypes.Date, pa.date32()),
+        (sqltypes.LargeBinary, pa.binary()),
+        (sqltypes.String, pa.string()),
+    ]
+    for sql_type, result in mapping:
+        if isinstance(column_type, sql_type):
+            return result
+    msg = f"No Arrow type for column {column.name} ({column_type})"
+    raise TypeError(msg)
+
+
+def export_columns(table: Table) -> list[Column[Any]]:
+    """エクスポート対象のカラム（内部カラムを除く）"""
+    return [column for column in table.columns if column.name not in EXCLUDED_COLUMNS]
+
+
+def _series_array(
+    values: Sequence[bytes | None], dtype: np.dtype, item_type: pa.DataType
+) -> pa.Array:
+    """bytea の配列をリスト配列へ（全行を連結して1回でデコード）"""
+    lengths = np.fromiter(
+        (len(value) // dtype.itemsize if value is not None else 0 for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    offsets = np.zeros(len(values) + 1, dtype=np.int32)
+    np.cumsum(lengths, out=offsets[1:])
+    flat = np.frombuffer(b"".join(value for value in values if value is not None), dtype=dtype)
+    return pa.ListArray.from_arrays(
+        pa.array(offsets),
+        pa.array(flat, type=item_type),
+        mask=pa.array([value is None for value in values]),
+    )
+
+
+def to_record_batch(rows: Sequence[Sequence[Any]], schema: pa.Schema) -> pa.RecordBatch:
+    """Convert database rows (in schema column order) into a record batch.
+
+    Args:
+        rows: Rows of one batch
+        schema: Arrow schema from ``arrow_type``
+
+    Returns:
+        Record batch
+    """
+    arrays = []
+    for field, values in zip(schema, zip(*rows), strict=True):
+        if field.name in SERIES_COLUMNS:
+            dtype, item_type = SERIES_COLUMNS[field.name]
+            arrays.append(_series_array(values, dtype, item_type))
+        elif pa.types.is_string(field.type) and values and isinstance(values[0], UUID):
+            arrays.append(pa.array([str(v) if v is not None else None for v in values]))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _PartitionWriter:
+    """1パーティション（ユーザー × 年）のファイル（閉じるまで一時ファイルに書く）"""
+
+    def __init__(self, path: Path, schema: pa.Schema, fmt: ExportFormat) -> None:
+        self.path = path
+        self._tmp_path = path.with_name(f".{path.name}.tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer: pq.ParquetWriter | ipc.RecordBatchFileWriter
+        if fmt is ExportFormat.PARQUET:
+            self._writer = pq.ParquetWriter(self._tmp_path, schema, compression="zstd")
+        else:
+            self._writer = ipc.new_file(
+                str(self._tmp_path), schema, options=ipc.IpcWriteOptions(compression="zstd")
+            )
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """書きかけの一時ファイルを削除（既存のパーティションはそのまま残る）"""
+        self._writer.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+async def export_table(
+    db: Database,
+    data_type: str,
+    output_dir: Path,
+    fmt: ExportFormat = ExportFormat.PARQUET,
+    batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+    user_id: UUID | None = None,
+    start_day: date | None = None,
+    end_day: date | None = None,
+) -> ExportResult:
+    """
+    1テーブルをサーバーサイドカーソルで読み、ユーザー × 年のパーティションへ書き出す
+
+    行は (user_id, day) 順に読むので、各パーティションは連続して届き、同時に開く
+    ファイルは1つだけになる。メモリに載るのは1バッチ分の行とArrow配列だけで、
+    ユーザー数・年数には依存しない。
+
+    出力は ``<output_dir>/<テーブル名>/user_id=<uuid>/year=<yyyy>/part-0.<拡張子>``
+    （Hive形式）。同じパーティションを再エクスポートすると置き換わる。
+
+    Args:
+        db: データベースインスタンス
+        data_type: データ種別（TABLE_MAPPINGS のキー）
+        output_dir: 出力先ディレクトリ
+        fmt: 出力形式
+        batch_size: 1回にフェッチする行数（Parquetの行グループの上限にもなる）
+        user_id: 対象ユーザー（None: 全ユーザー）
+        start_day: 開始日（None: 制限なし）
+        end_day: 終了日（含む、None: 制限なし）
+
+    Returns:
+        ExportResult: 行数と書き出したファイル
+    """
+    table: Table = TABLE_MAPPINGS[data_type].model.__table__  # type: ignore[assignment]
+    columns = export_columns(table)
+    schema = pa.schema([pa.field(c.name, arrow_type(c), nullable=c.nullable) for c in columns])
+    user_index = [c.name for c in columns].index("user_id")
+    day_index = [c.name for c in columns].index("day")
+
+    stmt = select(*columns).order_by(table.c.user_id, table.c.day)
+    if user_id is not None:
+        stmt = stmt.where(table.c.user_id == user_id)
+    if start_day is not None:
+        stmt = stmt.where(table.c.day >= start_day)
+    if end_day is not None:
+        stmt = stmt.where(table.c.day <= end_day)
+
+    extension = "parquet" if fmt is ExportFormat.PARQUET else "arrow"
+    started = time.perf_counter()
+    rows_written = 0
+    files: list[Path] = []
+    writer: _PartitionWriter | None = None
+    current_key: tuple[UUID, int] | None = None
+
+    try:
+        async with db.engine.connect() as conn:
+            # yield_per: asyncpg のサーバーサイドカーソルから batch_size 行ずつ取得
+            result = await conn.stream(stmt.execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                for key, group in groupby(
+                    rows, key=lambda row: (row[user_index], row[day_index].year)
+                ):
+                    if key != current_key:
+                        if writer is not None:
+                            writer.close()
+                        path = (
+                            output_dir
+                            / table.name
+                            / f"user_id={key[0]}"
+                            / f"year={key[1]}"
+                            / f"part-0.{extension}"
+                        )
+                        writer = _PartitionWriter(path, schema, fmt)
+                        files.append(path)
+                        current_key = key
+                    batch = to_record_batch(list(group), schema)
+                    writer.write(batch)  # type: ignore[union-attr]
+                    rows_written += batch.num_rows
+        if writer is not None:
+            writer.close()
+            writer = None
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+            files.pop()
+        raise
+
+    logger.info(
+        "export_table_completed",
+        table=table.fullname,
+        rows=rows_written,
+        files=len(files),
+        elapsed_seconds=round(time.perf_counter() - started, 3),
+    )
+    return ExportResult(table.fullname, rows_written, files)
@@ -1,19 +1,22 @@
 # src/healthhub_batch/fetcher.py
 # Oura APIからデータを取得し、データベースに保存するメインロジック
 # 複数エンドポイントを並列で取得し、Pydanticモデルでパース、Repositoryで保存
-# RELEVANT FILES: oura_client.py, cli.py, repository.py, models.py
+# RELEVANT FILES: oura_client.py, cli.py, repository.py, models.py, pipeline.py
 
 """Data fetching orchestration for Oura Ring API."""
 from __future__ import annotations
 
 import asyncio
-from typing import Any
+from typing import Any, NamedTuple
 from uuid import UUID
 
 import structlog
+from pydantic import BaseModel
 
 from healthhub_batch.config import Settings
+from healthhub_batch.copy_loader import CopyLoader
 from healthhub_batch.database import Database
+from healthhub_batch.load_mode import LoadMode
 from healthhub_batch.models import (
     DailyActivity,
     DailyReadiness,
@@ -22,13 +25,34 @@ from healthhub_batch.models import (
     DailyStress,
 )
 from healthhub_batch.oura_client import OuraClient
-from healthhub_batch.repository import HealthDataRepository
+from healthhub_batch.parsing import validate_records
+from healthhub_batch.pipeline import IngestPipeline
+from healthhub_batch.repository import HealthDataRepository, UpsertResult
 
 logger = structlog.get_logger(__name__)
 
 
+# エンドポイント → (データ種別, Pydanticモデル)
+# データ種別は repository.TABLE_MAPPINGS のキーと対応する
+ENDPOINT_MODELS: dict[str, tuple[str, type[BaseModel]]] = {
+    "daily_sleep": ("sleep", DailySleep),
+    "daily_activity": ("activity", DailyActivity),
+    "daily_readiness": ("readiness", DailyReadiness),
+    "daily_stress": ("stress", DailyStress),
+    "daily_resilience": ("resilience", DailyResilience),
+}
+
+# データ種別 → エンドポイント（保存エラーをエンドポイント単位で報告するため）
+DATA_TYPE_ENDPOINTS: dict[str, str] = {
+    data_type: endpoint for endpoint, (data_type, _) in ENDPOINT_MODELS.items()
+}
+
+
 async def fetch_all_data(
-    start_date: str, end_date: str, settings: Settings
+    start_date: str,
+    end_date: str,
+    settings: Settings,
+    client: OuraClient | None = None,
 ) -> dict[str, Any]:
     """Fetch all daily summaries from Oura API (raw response).
 
@@ -36,148 +60,355 @@ async def fetch_all_data(
         start_date: Start date (YYYY-MM-DD)
         end_date: End date (YYYY-MM-DD)
         settings: Application settings
+        client: Already opened client to reuse (default: open a new one)
 
     Returns:
         Dictionary with all fetched data by endpoint
     """
+    if client is None:
+        async with OuraClient.from_settings(settings) as new_client:
+            return await fetch_all_data(start_date, end_date, settings, client=new_client)
+
     results: dict[str, Any] = {}
+    logger.info("fetch_started", start_date=start_date, end_date=end_date)
+
+    # 各エンドポイントからデータ取得
+    tasks = {
+        "daily_sleep": client.get_daily_sleep(start_date, end_date),
+        "daily_activity": client.get_daily_activity(start_date, end_date),
+        "daily_stress": client.get_daily_stress(start_date, end_date),
+        "daily_resilience": client.get_daily_resilience(start_date, end_date),
+        "daily_readiness": client.get_daily_readiness(start_date, end_date),
+    }
 
-    async with OuraClient(settings.oura_pat) as client:
-        logger.info("fetch_started", start_date=start_date, end_date=end_date)
-
-        # 各エンドポイントからデータ取得
-        tasks = {
-            "daily_sleep": client.get_daily_sleep(start_date, end_date),
-            "daily_activity": client.get_daily_activity(start_date, end_date),
-            "daily_stress": client.get_daily_stress(start_date, end_date),
-            "daily_resilience": client.get_daily_resilience(start_date, end_date),
-            "daily_readiness": client.get_daily_readiness(start_date, end_date),
-        }
-
-        # 並列実行
-        completed = await asyncio.gather(*tasks.values(), return_exceptions=True)
-
-        # 結果を整理
-        for endpoint, result in zip(tasks.keys(), completed):
-            if isinstance(result, Exception):
-                logger.error("fetch_failed", endpoint=endpoint, error=str(result))
-                results[endpoint] = {"error": str(result)}
-            else:
-                results[endpoint] = result
-                logger.info(
-                    "fetch_success",
-                    endpoint=endpoint,
-                    records=len(result.get("data", [])),
-                )
-
-        logger.info("fetch_completed", total_endpoints=len(results))
+    # 並列実行
+    completed = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    # 結果を整理
+    for endpoint, result in zip(tasks.keys(), completed):
+        if isinstance(result, Exception):
+            logger.error("fetch_failed", endpoint=endpoint, error=str(result))
+            results[endpoint] = {"error": str(result)}
+        else:
+            results[endpoint] = result
+            logger.info(
+                "fetch_success",
+                endpoint=endpoint,
+                records=len(result.get("data", [])),
+            )
+
+    logger.info("fetch_completed", total_endpoints=len(results))
 
     return results
 
 
+def parse_raw_data(raw_data: dict[str, Any]) -> dict[str, list[Any]]:
+    """
+    デコード済みのAPIレスポンスをPydanticモデルにパース（dry-run・スクリプト用）
+
+    不正なレコードは1件ずつスキップし、同じエンドポイントの他のレコードは保存対象に残す。
+
+    Args:
+        raw_data: fetch_all_data の戻り値（エンドポイント → レスポンス）
+
+    Returns:
+        データ種別（"sleep" など）→ Pydanticモデルのリスト
+    """
+    parsed_data: dict[str, list[Any]] = {
+        data_type: [] for data_type, _ in ENDPOINT_MODELS.values()
+    }
+
+    for endpoint, (data_type, model) in ENDPOINT_MODELS.items():
+        if endpoint not in raw_data or "data" not in raw_data[endpoint]:
+            continue
+        records, rejected = validate_records(model, raw_data[endpoint]["data"], endpoint)
+        parsed_data[data_type] = records
+        logger.info(f"{data_type}_parsed", count=len(records), rejected=rejected)
+
+    return parsed_data
+
+
+class ParsedRange(NamedTuple):
+    """1期間分の取得・パース結果"""
+
+    parsed_data: dict[str, list[Any]]  # データ種別 → Pydanticモデルのリスト
+    errors: dict[str, str]  # 取得に失敗したエンドポイント → エラー内容
+    rejected: dict[str, int]  # データ種別 → バリデーションエラーでスキップした件数
+
+
+async def _fetch_parsed_endpoint(
+    client: OuraClient, endpoint: str, start_date: str, end_date: str
+) -> tuple[list[Any], int]:
+    """1エンドポイント分の全ページをバイト列から直接パース"""
+    _, model = ENDPOINT_MODELS[endpoint]
+    records: list[Any] = []
+    rejected = 0
+    async for page in client.iter_parsed_pages(endpoint, start_date, end_date, model):
+        records.extend(page.records)
+        rejected += page.rejected
+    return records, rejected
+
+
+async def fetch_parsed_data(
+    client: OuraClient, start_date: str, end_date: str
+) -> ParsedRange:
+    """Fetch all daily summaries and validate them straight from the response bytes.
+
+    Unlike ``fetch_all_data`` + ``parse_raw_data``, no intermediate dicts are
+    built: each page goes from bytes to models in one pass.
+
+    Args:
+        client: Already opened client
+        start_date: Start date (YYYY-MM-DD)
+        end_date: End date (YYYY-MM-DD)
+
+    Returns:
+        Parsed records, fetch errors and rejected record counts
+    """
+    logger.info("fetch_started", start_date=start_date, end_date=end_date)
+
+    completed = await asyncio.gather(
+        *(
+            _fetch_parsed_endpoint(client, endpoint, start_date, end_date)
+            for endpoint in ENDPOINT_MODELS
+        ),
+        return_exceptions=True,
+    )
+
+    parsed_data: dict[str, list[Any]] = {}
+    errors: dict[str, str] = {}
+    rejected: dict[str, int] = {}
+    for (endpoint, (data_type, _)), result in zip(ENDPOINT_MODELS.items(), completed):
+        if isinstance(result, BaseException):
+            logger.error("fetch_failed", endpoint=endpoint, error=str(result))
+            errors[endpoint] = str(result)
+            parsed_data[data_type] = []
+            continue
+
+        records, rejected_count = result
+        parsed_data[data_type] = records
+        if rejected_count:
+            rejected[data_type] = rejected_count
+            logger.warning(f"{data_type}_records_rejected", count=rejected_count)
+        logger.info(f"{data_type}_parsed", count=len(records), rejected=rejected_count)
+
+    return ParsedRange(parsed_data, errors, rejected)
+
+
+async def save_parsed_data(
+    parsed_data: dict[str, list[Any]],
+    user_id: UUID,
+    settings: Settings,
+    db: Database,
+    load_mode: LoadMode = LoadMode.ORM,
+) -> dict[str, UpsertResult]:
+    """
+    パース済みデータを1トランザクションで保存（DB接続は閉じない）
+
+    Args:
+        parsed_data: データ種別 → Pydanticモデルのリスト
+        user_id: ユーザーID
+        settings: アプリケーション設定
+        db: データベースインスタンス
+        load_mode: 保存方式（orm: 複数行upsert / copy: COPY + ステージング）
+
+    Returns:
+        データ種別ごとの挿入・更新・変更なしの件数
+    """
+    if load_mode is LoadMode.COPY:
+        return await CopyLoader(db, user_id).load(parsed_data)
+
+    save_counts: dict[str, UpsertResult] = {}
+    async with db.session() as session:
+        repo = HealthDataRepository(
+            session, user_id, batch_size=settings.upsert_batch_size, cache=db.read_cache
+        )
+
+        save_counts["sleep"] = await repo.upsert_sleep_data(parsed_data["sleep"])
+        save_counts["activity"] = await repo.upsert_activity_data(parsed_data["activity"])
+        save_counts["readiness"] = await repo.upsert_readiness_data(parsed_data["readiness"])
+        save_counts["stress"] = await repo.upsert_stress_data(parsed_data["stress"])
+        save_counts["resilience"] = await repo.upsert_resilience_data(
+            parsed_data["resilience"]
+        )
+
+    return save_counts
+
+
+class TableWriteResult(NamedTuple):
+    """テーブルごとに独立したトランザクションで保存した結果"""
+
+    save_counts: dict[str, UpsertResult]  # コミットできたデータ種別 → 件数
+    errors: dict[str, str]  # 保存に失敗したデータ種別 → エラー内容
+
+
+async def _save_table(
+    data_type: str,
+    items: list[Any],
+    user_id: UUID,
+    settings: Settings,
+    db: Database,
+    load_mode: LoadMode,
+) -> UpsertResult:
+    """1テーブル分を専用のコネクション・トランザクションで保存"""
+    if load_mode is LoadMode.COPY:
+        return await CopyLoader(db, user_id).load_table(data_type, items)
+
+    async with db.session() as session:
+        repo = HealthDataRepository(
+            session, user_id, batch_size=settings.upsert_batch_size, cache=db.read_cache
+        )
+        return await repo.upsert(data_type, items)
+
+
+async def save_tables_concurrently(
+    parsed_data: dict[str, list[Any]],
+    user_id: UUID,
+    settings: Settings,
+    db: Database,
+    load_mode: LoadMode = LoadMode.ORM,
+) -> TableWriteResult:
+    """
+    テーブルごとに別々のコネクション・トランザクションで並列に保存（DB接続は閉じない）
+
+    テーブル同士は独立しているので、あるテーブルの保存に失敗しても他のテーブルのコミットは残る。
+    同時に最大5コネクションを使うため、プールサイズに注意すること。
+
+    Args:
+        parsed_data: データ種別 → Pydanticモデルのリスト
+        user_id: ユーザーID
+        settings: アプリケーション設定
+        db: データベースインスタンス
+        load_mode: 保存方式
+
+    Returns:
+        コミットできたテーブルの件数と、失敗したテーブルのエラー
+    """
+    completed = await asyncio.gather(
+        *(
+            _save_table(data_type, items, user_id, settings, db, load_mode)
+            for data_type, items in parsed_data.items()
+        ),
+        return_exceptions=True,
+    )
+
+    save_counts: dict[str, UpsertResult] = {}
+    errors: dict[str, str] = {}
+    for data_type, result in zip(parsed_data, completed):
+        if isinstance(result, Exception):
+            logger.error("table_write_failed", data_type=data_type, error=str(result))
+            errors[data_type] = str(result)
+        else:
+            logger.info("table_write_committed", data_type=data_type, **result._asdict())
+            save_counts[data_type] = result
+
+    return TableWriteResult(save_counts, errors)
+
+
+class RangeResult(NamedTuple):
+    """1ユーザー・1期間分の取得・保存結果"""
+
+    save_counts: dict[str, UpsertResult]
+    errors: dict[str, str]  # 取得・保存に失敗したエンドポイント → エラー内容
+    rejected: dict[str, int]  # データ種別 → バリデーションエラーでスキップした件数
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+async def fetch_and_save_range(
+    client: OuraClient,
+    start_date: str,
+    end_date: str,
+    user_id: UUID,
+    settings: Settings,
+    db: Database,
+    load_mode: LoadMode = LoadMode.ORM,
+) -> RangeResult:
+    """
+    オープン済みのクライアントで1期間分を取得・パース・保存（DB接続は閉じない）
+
+    取得に失敗したエンドポイントがあっても取得できた分は保存し、不正なレコードは1件ずつスキップする。
+    ORMモードではページが届いた順に保存するストリーミングパイプライン（ページ単位のトランザクション）、
+    COPYモードでは全件取得後に1トランザクションでロードする。
+    ``settings.parallel_table_writes`` が有効ならテーブルごとに別コネクションで並列に書き込み、
+    保存に失敗したテーブルはそのエンドポイントのエラーとして返す（他のテーブルはコミットされる）。
+
+    Args:
+        client: オープン済みのOuraClient
+        start_date: 開始日 (YYYY-MM-DD)
+        end_date: 終了日 (YYYY-MM-DD)
+        user_id: ユーザーID
+        settings: アプリケーション設定
+        db: データベースインスタンス
+        load_mode: 保存方式
+
+    Returns:
+        保存件数・取得エラー・スキップしたレコード数
+    """
+    if load_mode is LoadMode.ORM:
+        pipeline = IngestPipeline(
+            client,
+            db,
+            user_id,
+            ENDPOINT_MODELS,
+            queue_size=settings.pipeline_queue_size,
+            batch_size=settings.upsert_batch_size,
+            parallel_tables=settings.parallel_table_writes,
+        )
+        streamed = await pipeline.run(start_date, end_date)
+        return RangeResult(streamed.save_counts, streamed.errors, streamed.rejected)
+
+    fetched = await fetch_parsed_data(client, start_date, end_date)
+    if not settings.parallel_table_writes:
+        save_counts = await save_parsed_data(fetched.parsed_data, user_id, settings, db, load_mode)
+        return RangeResult(save_counts, fetched.errors, fetched.rejected)
+
+    written = await save_tables_concurrently(
+        fetched.parsed_data, user_id, settings, db, load_mode
+    )
+    errors = dict(fetched.errors)
+    for data_type, error in written.errors.items():
+        errors[DATA_TYPE_ENDPOINTS[data_type]] = f"write failed: {error}"
+    return RangeResult(written.save_counts, errors, fetched.rejected)
+
+
 async def fetch_and_save_data(
-    start_date: str, end_date: str, settings: Settings, db: Database
-) -> dict[str, int]:
+    start_date: str,
+    end_date: str,
+    settings: Settings,
+    db: Database,
+    load_mode: LoadMode = LoadMode.ORM,
+) -> dict[str, UpsertResult]:
     """
     Oura APIからデータを取得し、データベースに保存
 
+    DB接続は閉じないので、呼び出し側で ``db.close()`` すること。
+
     Args:
         start_date: 開始日 (YYYY-MM-DD)
         end_date: 終了日 (YYYY-MM-DD)
         settings: アプリケーション設定
         db: データベースインスタンス
+        load_mode: 保存方式（orm: 複数行upsert / copy: COPY + ステージング）
 
     Returns:
-        エンドポイントごとの保存件数
+        データ種別ごとの挿入・更新・変更なしの件数
     """
     # USER_IDの取得
     user_id = UUID(settings.user_id)
     logger.info("fetch_and_save_started", user_id=str(user_id))
 
-    # APIからデータ取得
-    raw_data = await fetch_all_data(start_date, end_date, settings)
-
-    # Pydanticモデルでパース
-    parsed_data = {
-        "sleep": [],
-        "activity": [],
-        "readiness": [],
-        "stress": [],
-        "resilience": [],
-    }
-
-    # Sleep
-    if "daily_sleep" in raw_data and "data" in raw_data["daily_sleep"]:
-        try:
-            parsed_data["sleep"] = [
-                DailySleep(**item) for item in raw_data["daily_sleep"]["data"]
-            ]
-            logger.info("sleep_parsed", count=len(parsed_data["sleep"]))
-        except Exception as e:
-            logger.error("sleep_parse_error", error=str(e))
-
-    # Activity
-    if "daily_activity" in raw_data and "data" in raw_data["daily_activity"]:
-        try:
-            parsed_data["activity"] = [
-                DailyActivity(**item) for item in raw_data["daily_activity"]["data"]
-            ]
-            logger.info("activity_parsed", count=len(parsed_data["activity"]))
-        except Exception as e:
-            logger.error("activity_parse_error", error=str(e))
-
-    # Readiness
-    if "daily_readiness" in raw_data and "data" in raw_data["daily_readiness"]:
-        try:
-            parsed_data["readiness"] = [
-                DailyReadiness(**item) for item in raw_data["daily_readiness"]["data"]
-            ]
-            logger.info("readiness_parsed", count=len(parsed_data["readiness"]))
-        except Exception as e:
-            logger.error("readiness_parse_error", error=str(e))
-
-    # Stress
-    if "daily_stress" in raw_data and "data" in raw_data["daily_stress"]:
-        try:
-            parsed_data["stress"] = [
-                DailyStress(**item) for item in raw_data["daily_stress"]["data"]
-            ]
-            logger.info("stress_parsed", count=len(parsed_data["stress"]))
-        except Exception as e:
-            logger.error("stress_parse_error", error=str(e))
-
-    # Resilience
-    if "daily_resilience" in raw_data and "data" in raw_data["daily_resilience"]:
-        try:
-            parsed_data["resilience"] = [
-                DailyResilience(**item) for item in raw_data["daily_resilience"]["data"]
-            ]
-            logger.info("resilience_parsed", count=len(parsed_data["resilience"]))
-        except Exception as e:
-            logger.error("resilience_parse_error", error=str(e))
-
-    # データベースに保存
-    save_counts = {}
-    try:
-        async with db.session() as session:
-            repo = HealthDataRepository(session, user_id)
-
-            save_counts["sleep"] = await repo.upsert_sleep_data(parsed_data["sleep"])
-            save_counts["activity"] = await repo.upsert_activity_data(
-                parsed_data["activity"]
-            )
-            save_counts["readiness"] = await repo.upsert_readiness_data(
-                parsed_data["readiness"]
-            )
-            save_counts["stress"] = await repo.upsert_stress_data(parsed_data["stress"])
-            save_counts["resilience"] = await repo.upsert_resilience_data(
-                parsed_data["resilience"]
-            )
+    async with OuraClient.from_settings(settings) as client:
+        result = await fetch_and_save_range(
+            client, start_date, end_date, user_id, settings, db, load_mode
+        )
 
-        logger.info("fetch_and_save_completed", save_counts=save_counts)
-        return save_counts
-    finally:
-        await db.close()
+    logger.info(
+        "fetch_and_save_completed", save_counts=result.save_counts, rejected=result.rejected
+    )
+    return result.save_counts
 
 
 def print_summary(results: dict[str, Any]) -> None:
@@ -0,0 +1,265 @@
+# src/healthhub_batch/heartrate.py
+# 心拍数時系列（/heartrate）の大量取り込み
+# 期間を日時ウィンドウに分割して並列に取得し、ウィンドウごとに「範囲DELETE + バイナリCOPY」を1トランザクションで行う（再実行しても重複しない）
+# RELEVANT FILES: oura_client.py, db_models.py, copy_loader.py, cli.py
+
+"""Windowed heart rate ingestion into the month-partitioned sample table."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import structlog
+from asyncpg import Connection
+
+from healthhub_batch.database import Database
+from healthhub_batch.db_models import HeartrateSample
+from healthhub_batch.models import HeartRateSample
+from healthhub_batch.oura_client import OuraClient
+
+logger = structlog.get_logger(__name__)
+
+HEARTRATE_TABLE = HeartrateSample.__table__
+COPY_COLUMNS = ["user_id", "timestamp", "source", "bpm"]
+
+
+class HeartrateWindowResult(NamedTuple):
+    """1ウィンドウ分の取り込み結果"""
+
+    start: datetime
+    end: datetime
+    samples: int  # 保存したサンプル数
+    replaced: int  # 再取り込みで置き換えた既存サンプル数
+    error: str | None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def split_datetime_range(
+    start: datetime, end: datetime, window: timedelta
+) -> list[tuple[datetime, datetime]]:
+    """Split ``[start, end)`` into half-open windows of ``window``.
+
+    Unlike the daily backfill windows, these do not overlap: every sample
+    belongs to exactly one window, so concurrent windows never write the
+    same rows.
+
+    Args:
+        start: Start of the range (timezone-aware)
+        end: End of the range, exclusive (timezone-aware)
+        window: Length of one window
+
+    Returns:
+        List of (window_start, window_end) pairs covering the range
+    """
+    if window <= timedelta(0):
+        msg = f"window must be positive: {window}"
+        raise ValueError(msg)
+    if end <= start:
+        msg = f"end {end.isoformat()} is not after start {start.isoformat()}"
+        raise ValueError(msg)
+
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + window, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def month_partitions(start: datetime, end: datetime) -> list[tuple[str, datetime, datetime]]:
+    """Return the monthly partitions (UTC) that ``[start, end)`` touches.
+
+    Args:
+        start: Start of the range (timezone-aware)
+        end: End of the range, exclusive (timezone-aware)
+
+    Returns:
+        List of (partition name, lower bound, upper bound)
+    """
+    month = start.astimezone(timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    partitions = []
+    while month < end:
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        name = f"{HEARTRATE_TABLE.name}_y{month.year:04d}m{month.month:02d}"
+        partitions.append((name, month, next_month))
+        month = next_month
+    return partitions
+
+
+async def ensure_partitions(db: Database, start: datetime, end: datetime) -> None:
+    """
+    ``[start, end)`` を含む月パーティションを作成（既存ならそのまま）
+
+    同じパーティションを並列に作ると競合するため、ウィンドウの取り込みを始める前に
+    1本のトランザクションでまとめて作る。
+
+    Args:
+        db: データベースインスタンス
+        start: 期間の開始（タイムゾーン付き）
+        end: 期間の終了（この時刻は含まない）
+    """
+    async with db.engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        pg_conn: Connection = raw_conn.driver_connection
+
+        async with pg_conn.transaction():
+            for name, lower, upper in month_partitions(start, end):
+                await pg_conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {HEARTRATE_TABLE.schema}.{name} "
+                    f"PARTITION OF {HEARTRATE_TABLE.fullname} "
+                    f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+                )
+
+
+class HeartrateLoader:
+    """ウィンドウ単位で心拍数サンプルを置き換えるローダー
+
+    ウィンドウの範囲を削除してからバイナリCOPYで流し込むので、同じウィンドウを
+    何度取り込んでも結果は同じになり、ON CONFLICT の行単位の判定もかからない。
+    """
+
+    def __init__(self, db: Database, user_id: UUID):
+        """
+        Args:
+            db: データベースインスタンス
+            user_id: ユーザーID
+        """
+        self.db = db
+        self.user_id = user_id
+
+    async def replace_window(
+        self, start: datetime, end: datetime, samples: list[HeartRateSample]
+    ) -> tuple[int, int]:
+        """
+        ``[start, end)`` のサンプルを1トランザクションで置き換え
+
+        Args:
+            start: ウィンドウの開始（タイムゾーン付き）
+            end: ウィンドウの終了（この時刻は含まない）
+            samples: APIから取得したサンプル（範囲外・重複は除外する）
+
+        Returns:
+            (保存したサンプル数, 削除した既存サンプル数)
+        """
+        records = self._records(start, end, samples)
+
+        async with self.db.engine.connect() as conn:
+            raw_conn = await conn.get_raw_connection()
+            pg_conn: Connection = raw_conn.driver_connection
+
+            async with pg_conn.transaction():
+                status = await pg_conn.execute(
+                    f"DELETE FROM {HEARTRATE_TABLE.fullname} "
+                    'WHERE user_id = $1 AND "timestamp" >= $2 AND "timestamp" < $3',
+                    self.user_id,
+                    start,
+                    end,
+                )
+                if records:
+                    await pg_conn.copy_records_to_table(
+                        HEARTRATE_TABLE.name,
+                        schema_name=HEARTRATE_TABLE.schema,
+                        records=records,
+                        columns=COPY_COLUMNS,
+                    )
+
+        # execute() は "DELETE <件数>" を返す
+        return len(records), int(status.rsplit(" ", 1)[-1])
+
+    def _records(
+        self, start: datetime, end: datetime, samples: list[HeartRateSample]
+    ) -> list[tuple[Any, ...]]:
+        """COPY用のタプル（ウィンドウ外を除外し、同じ時刻・ソースは後勝ち）"""
+        rows: dict[tuple[datetime, str], tuple[Any, ...]] = {}
+        for sample in samples:
+            if start <= sample.timestamp < end:
+                key = (sample.timestamp, sample.source)
+                rows[key] = (self.user_id, sample.timestamp, sample.source, sample.bpm)
+        return list(rows.values())
+
+
+async def _ingest_window(
+    client: OuraClient,
+    loader: HeartrateLoader,
+    semaphore: asyncio.Semaphore,
+    window: tuple[datetime, datetime],
+) -> HeartrateWindowResult:
+    """1ウィンドウ分を取得してDBへ置き換え（ウィンドウ単位でコミット）"""
+    start, end = window
+
+    async with semaphore:
+        log = logger.bind(window_start=start.isoformat(), window_end=end.isoformat())
+        try:
+            samples: list[HeartRateSample] = []
+            rejected = 0
+            async for page in client.iter_heartrate_pages(start, end):
+                samples.extend(page.records)
+                rejected += page.rejected
+            saved, replaced = await loader.replace_window(start, end, samples)
+        except Exception as e:
+            log.error("heartrate_window_failed", error=str(e))
+            return HeartrateWindowResult(start, end, 0, 0, str(e))
+
+        log.info("heartrate_window_loaded", samples=saved, replaced=replaced, rejected=rejected)
+        return HeartrateWindowResult(start, end, saved, replaced, None)
+
+
+async def ingest_heartrate(
+    client: OuraClient,
+    db: Database,
+    user_id: UUID,
+    start: datetime,
+    end: datetime,
+    window_days: int = 7,
+    concurrency: int = 4,
+) -> list[HeartrateWindowResult]:
+    """
+    期間の心拍数をウィンドウに分割し、並列に取得・保存する（DB接続は閉じない）
+
+    失敗したウィンドウは他のウィンドウに影響せず、同じ期間を再実行すれば
+    そのウィンドウだけが正しく置き換わる。
+
+    Args:
+        client: オープン済みのクライアント
+        db: データベースインスタンス
+        user_id: ユーザーID
+        start: 期間の開始（タイムゾーン付き）
+        end: 期間の終了（この時刻は含まない）
+        window_days: 1ウィンドウの日数
+        concurrency: 同時に処理するウィンドウ数
+
+    Returns:
+        ウィンドウごとの実行結果（期間順）
+    """
+    windows = split_datetime_range(start, end, timedelta(days=window_days))
+    logger.info(
+        "heartrate_ingest_started",
+        user_id=str(user_id),
+        start=start.isoformat(),
+        end=end.isoformat(),
+        windows=len(windows),
+        concurrency=concurrency,
+    )
+
+    await ensure_partitions(db, start, end)
+    loader = HeartrateLoader(db, user_id)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(
+        *(_ingest_window(client, loader, semaphore, window) for window in windows)
+    )
+
+    logger.info(
+        "heartrate_ingest_completed",
+        samples=sum(r.samples for r in results),
+        replaced=sum(r.replaced for r in results),
+        failed_windows=sum(1 for r in results if not r.ok),
+    )
+    return list(results)
@@ -0,0 +1,14 @@
+# src/healthhub_batch/load_mode.py
+# DBへの保存方式の定義
+# CLIのオプション型としても使うため、重い依存（SQLAlchemy・asyncpgなど）をimportしない
+# RELEVANT FILES: fetcher.py, copy_loader.py, cli.py
+
+"""Load mode shared by the fetcher and the CLI."""
+from enum import Enum
+
+
+class LoadMode(str, Enum):
+    """DBへの保存方式"""
+
+    ORM = "orm"  # HealthDataRepositoryによる複数行upsert（日次実行向け）
+    COPY = "copy"  # COPY + ステージングテーブル経由のマージ（大量リカバリ向け）
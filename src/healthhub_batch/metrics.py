@@ -0,0 +1,344 @@
+# src/healthhub_batch/metrics.py
+# バッチ処理のメトリクス（カウンタ・ゲージ・ヒストグラム）のプロセス内レジストリ
+# 実行終了時のPrometheusテキストファイル出力と、常駐モードの GET /metrics（OpenMetrics）に使う
+# RELEVANT FILES: oura_client.py, parsing.py, repository.py, database.py, daemon.py, cli.py
+
+"""In-process metrics registry rendered as Prometheus text or OpenMetrics."""
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TypeVar
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# 秒単位のヒストグラムのバケット上限
+HTTP_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+RUN_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _label_text(pairs: list[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric(ABC):
+    """Metric family with a fixed set of label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            msg = f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            raise ValueError(msg)
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            msg = f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            raise ValueError(msg) from e
+
+    def _pairs(self, key: LabelValues) -> list[tuple[str, str]]:
+        return list(zip(self.labelnames, key, strict=True))
+
+    @abstractmethod
+    def samples(self) -> Iterator[str]:
+        """Yield the exposition lines of every labelled series."""
+
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+class Counter(_Metric):
+    """Monotonically increasing total (exposed with the ``_total`` suffix)."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add ``amount`` (must not be negative) to the labelled total."""
+        if amount < 0:
+            msg = f"{self.name} can only increase (got {amount})"
+            raise ValueError(msg)
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Return the labelled total (0 if never incremented)."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}_total{_label_text(self._pairs(key))} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the labelled value."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: str) -> float:
+        """Return the labelled value (0 if never set)."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_label_text(self._pairs(key))} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = HTTP_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ラベル → (バケットごとの件数（最後は +Inf）, 合計)
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation."""
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the seconds spent in the ``with`` block (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Return the number of labelled observations."""
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(
+                (key, (list(counts), total)) for key, (counts, total) in self._values.items()
+            )
+        for key, (counts, total) in values:
+            pairs = self._pairs(key)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                labels = _label_text([*pairs, ("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_count{_label_text(pairs)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(pairs)} {_format_value(total)}"
+
+
+class MetricsRegistry:
+    """Named metric families of one process."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = HTTP_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric: MetricT) -> MetricT:
+        if metric.name in self._metrics:
+            msg = f"Metric {metric.name} is already registered"
+            raise ValueError(msg)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Render every metric.
+
+        Args:
+            openmetrics: OpenMetrics 1.0 (``# EOF`` terminated) instead of the
+                Prometheus text format read by node_exporter's textfile collector
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        for metric in self._metrics.values():
+            # Prometheus形式ではカウンタのファミリー名にも _total を付ける
+            family = metric.name
+            if metric.kind == "counter" and not openmetrics:
+                family = f"{metric.name}_total"
+            lines.append(f"# HELP {family} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+            lines.extend(metric.samples())
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str | Path) -> None:
+        """Write the Prometheus text format atomically (readers never see a partial file)."""
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(self.render())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = MetricsRegistry()
+
+OURA_REQUEST_SECONDS = REGISTRY.histogram(
+    "healthhub_oura_request_duration_seconds",
+    "Latency of one Oura API HTTP attempt",
+    ("endpoint",),
+    HTTP_BUCKETS,
+)
+OURA_RETRIES = REGISTRY.counter(
+    "healthhub_oura_retries",
+    "Oura API attempts that were retried or gave up, by status code or 'network'",
+    ("endpoint", "reason"),
+)
+OURA_RATE_LIMITED = REGISTRY.counter(
+    "healthhub_oura_rate_limited", "Oura API responses with status 429", ("endpoint",)
+)
+OURA_RESPONSE_BYTES = REGISTRY.counter(
+    "healthhub_oura_response_bytes", "Bytes of successful Oura API response bodies", ("endpoint",)
+)
+RECORDS_PARSED = REGISTRY.counter(
+    "healthhub_records_parsed", "Records that passed validation", ("endpoint",)
+)
+RECORDS_REJECTED = REGISTRY.counter(
+    "healthhub_records_rejected", "Records skipped because validation failed", ("endpoint",)
+)
+ROWS_UPSERTED = REGISTRY.counter(
+    "healthhub_rows_upserted",
+    "Rows written by upserts, by result (inserted / updated / unchanged)",
+    ("table", "result"),
+)
+DB_STATEMENT_SECONDS = REGISTRY.histogram(
+    "healthhub_db_statement_duration_seconds",
+    "Latency of database statements, by leading SQL keyword",
+    ("operation",),
+    DB_BUCKETS,
+)
+RUN_SECONDS = REGISTRY.histogram(
+    "healthhub_run_duration_seconds",
+    "End-to-end duration of a CLI command or daemon run",
+    ("command", "outcome"),
+    RUN_BUCKETS,
+)
+RUN_LAST_SUCCESS = REGISTRY.gauge(
+    "healthhub_run_last_success_timestamp_seconds",
+    "Unix time the command last finished without an exception",
+    ("command",),
+)
+
+
+def statement_operation(statement: str) -> str:
+    """Return the leading SQL keyword of a statement (``SELECT``, ``INSERT``, ...)."""
+    words = statement.lstrip("( \n\t").split(None, 1)
+    return words[0].upper() if words and words[0].isalpha() else "OTHER"
+
+
+def observe_upsert(table: str, inserted: int, updated: int, unchanged: int) -> None:
+    """Count the rows of one upsert by result."""
+    for result, count in (("inserted", inserted), ("updated", updated), ("unchanged", unchanged)):
+        if count:
+            ROWS_UPSERTED.inc(count, table=table, result=result)
+
+
+def record_run(command: str, seconds: float, ok: bool, textfile: str = "") -> None:
+    """Record one finished run and write the textfile.
+
+    Args:
+        command: Label of the run (CLI command name, ``serve`` for daemon runs)
+        seconds: End-to-end duration
+        ok: Whether the run succeeded
+        textfile: Prometheus textfile to write afterwards (empty: none)
+    """
+    RUN_SECONDS.observe(seconds, command=command, outcome="success" if ok else "error")
+    if ok:
+        RUN_LAST_SUCCESS.set(time.time(), command=command)
+    if textfile:
+        try:
+            REGISTRY.write_textfile(textfile)
+        except OSError as e:
+            logger.error("metrics_textfile_write_failed", path=textfile, error=str(e))
+
+
+@contextmanager
+def track_run(command: str, textfile: str = "") -> Iterator[None]:
+    """Time the ``with`` block as one run (an exception counts as an error)."""
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record_run(command, time.perf_counter() - started, ok, textfile)
@@ -52,11 +52,20 @@ class ActivityContributors(BaseModel):
     training_volume: int
 
 
+class Sample(BaseModel):
+    """等間隔サンプルの時系列（METの1分値など）"""
+
+    interval: float  # サンプル間隔（秒）
+    items: list[Optional[float]]
+    timestamp: datetime  # 最初のサンプルの時刻
+
+
 class DailyActivity(BaseModel):
-    """日次活動サマリー（時系列データは除外）"""
+    """日次活動サマリー（日内時系列はseries_codecでバイナリにして保存）"""
 
     id: str
-    class_5_min: Optional[str] = None  # 非常に長いため、保存するか要検討
+    # 5分ごとの活動区分（0-5の数字列）。ほかの文字を含むレコードはパース時に弾く
+    class_5_min: Optional[str] = Field(default=None, pattern=r"^[0-5]*$")
     score: Optional[int] = None
     active_calories: int
     average_met_minutes: float = Field(alias="average_met_minutes")
@@ -69,7 +78,7 @@ class DailyActivity(BaseModel):
     low_activity_time: int
     medium_activity_met_minutes: int
     medium_activity_time: int
-    # met: dict は除外（itemsに2991個の数値配列があるため）
+    met: Optional[Sample] = None
     meters_to_target: int
     non_wear_time: int
     resting_time: int
@@ -154,6 +163,19 @@ class DailyResilience(BaseModel):
     level: Optional[str] = None  # "solid", "strong" など
 
 
+# ===============================
+# Heart Rate Models
+# ===============================
+
+
+class HeartRateSample(BaseModel):
+    """心拍数サンプル（5分間隔以下の時系列）"""
+
+    bpm: int
+    source: str  # "awake", "rest", "sleep", "session", "live", "workout"
+    timestamp: datetime
+
+
 # ===============================
 # API Response Wrappers
 # ===============================
@@ -0,0 +1,181 @@
+# src/healthhub_batch/multi_user.py
+# 複数ユーザーのデータ取得・保存を1プロセスで並列実行
+# healthhub.users の有効ユーザーを、共有のDBエンジンとHTTPコネクションプール上で同時実行数を制限して処理する
+# RELEVANT FILES: fetcher.py, repository.py, oura_client.py, cli.py
+
+"""Multi-user ingestion with bounded concurrency."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+import httpx
+import structlog
+
+from healthhub_batch.config import Settings
+from healthhub_batch.database import Database
+from healthhub_batch.db_models import User
+from healthhub_batch.fetcher import LoadMode, fetch_and_save_range
+from healthhub_batch.oura_client import OuraClient
+from healthhub_batch.repository import UpsertResult, UserRepository
+
+logger = structlog.get_logger(__name__)
+
+
+class UserRunResult(NamedTuple):
+    """1ユーザー分の実行結果"""
+
+    user_id: UUID
+    start_date: str
+    end_date: str
+    save_counts: dict[str, UpsertResult]
+    errors: dict[str, str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def local_today(timezone_name: str, now: datetime | None = None) -> date:
+    """Return today's date in the user's timezone.
+
+    Args:
+        timezone_name: IANA timezone name from ``healthhub.users.timezone``
+        now: Current time (default: now)
+
+    Returns:
+        Local date
+    """
+    return (now or datetime.now(ZoneInfo("UTC"))).astimezone(ZoneInfo(timezone_name)).date()
+
+
+def default_date_range(timezone_name: str, now: datetime | None = None) -> tuple[str, str]:
+    """Return the daily-run range (yesterday to today) in the user's timezone.
+
+    Args:
+        timezone_name: IANA timezone name from ``healthhub.users.timezone``
+        now: Current time (default: now)
+
+    Returns:
+        (start_date, end_date) as YYYY-MM-DD
+    """
+    today = local_today(timezone_name, now)
+    return (today - timedelta(days=1)).isoformat(), today.isoformat()
+
+
+# 1ユーザー分の処理（オープン済みのOuraClientとユーザーを受け取る）
+UserJob = Callable[[OuraClient, User], Awaitable[UserRunResult]]
+
+
+async def _run_user(
+    user: User,
+    job: UserJob,
+    http_client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    settings: Settings,
+) -> UserRunResult:
+    """1ユーザー分を実行（失敗しても他ユーザーには影響させない）"""
+    async with semaphore:
+        log = logger.bind(user_id=str(user.user_id))
+
+        try:
+            token = settings.resolve_oura_pat(user.oura_pat_alias)
+            client = OuraClient.from_settings(
+                settings,
+                token,
+                http_client,
+                token_alias=user.oura_pat_alias,
+                user_id=user.user_id,
+            )
+            async with client:
+                result = await job(client, user)
+        except Exception as e:
+            log.error("user_run_failed", error=str(e))
+            return UserRunResult(user.user_id, "", "", {}, {"user": str(e)})
+
+        log.info("user_run_completed", save_counts=result.save_counts, errors=result.errors)
+        return result
+
+
+async def run_for_active_users(
+    settings: Settings,
+    db: Database,
+    job: UserJob,
+    concurrency: int = 8,
+    http_client: httpx.AsyncClient | None = None,
+) -> list[UserRunResult]:
+    """
+    有効な全ユーザーに対して job を並列実行する（DB接続は閉じない）
+
+    全ユーザーが1つのDBエンジン（コネクションプール）と1つのHTTPコネクションプールを共有する。
+    レート制限はPATごとなので、OuraClient（とそのレートリミッタ）はユーザーごとに作る。
+
+    Args:
+        settings: アプリケーション設定
+        db: データベースインスタンス
+        job: 1ユーザー分の処理
+        concurrency: 同時に処理するユーザー数
+        http_client: 使い回すHTTPコネクションプール（省略時はこの実行の間だけ作成する）
+
+    Returns:
+        ユーザーごとの実行結果
+    """
+    if http_client is None:
+        # 1ユーザーあたり最大5エンドポイントを並列取得する
+        new_client = OuraClient.create_http_client(
+            max_connections=concurrency * 5, base_url=settings.oura_api_base_url
+        )
+        async with new_client:
+            return await run_for_active_users(settings, db, job, concurrency, new_client)
+
+    async with db.session() as session:
+        users = await UserRepository(session).list_active_users()
+
+    logger.info("multi_user_started", users=len(users), concurrency=concurrency)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(
+        *(_run_user(user, job, http_client, semaphore, settings) for user in users)
+    )
+
+    failed = [r for r in results if not r.ok]
+    logger.info("multi_user_completed", users=len(results), failed_users=len(failed))
+    return list(results)
+
+
+async def fetch_all_users(
+    settings: Settings,
+    db: Database,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    concurrency: int = 8,
+    load_mode: LoadMode = LoadMode.ORM,
+) -> list[UserRunResult]:
+    """
+    有効な全ユーザーのデータを並列に取得・保存する（DB接続は閉じない）
+
+    Args:
+        settings: アプリケーション設定
+        db: データベースインスタンス
+        start_date: 開始日 (YYYY-MM-DD)。省略時は各ユーザーのタイムゾーンで前日
+        end_date: 終了日 (YYYY-MM-DD)。省略時は各ユーザーのタイムゾーンで当日
+        concurrency: 同時に処理するユーザー数
+        load_mode: 保存方式
+
+    Returns:
+        ユーザーごとの実行結果
+    """
+
+    async def job(client: OuraClient, user: User) -> UserRunResult:
+        default_start, default_end = default_date_range(user.timezone)
+        user_start, user_end = start_date or default_start, end_date or default_end
+        result = await fetch_and_save_range(
+            client, user_start, user_end, user.user_id, settings, db, load_mode
+        )
+        return UserRunResult(user.user_id, user_start, user_end, result.save_counts, result.errors)
+
+    return await run_for_active_users(settings, db, job, concurrency)
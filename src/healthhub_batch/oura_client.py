@@ -1,19 +1,40 @@
 # src/healthhub_batch/oura_client.py
 # Oura Ring API v2クライアント
 # Personal Access Tokenを使用してOura APIからヘルスデータを取得
-# RELEVANT FILES: config.py, cli.py
+# RELEVANT FILES: config.py, cli.py, rate_limiter.py
 
 """Oura Ring API v2 client for fetching health data."""
 from __future__ import annotations
 
 import asyncio
-from typing import Any
+import contextlib
+import json
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+from typing import Any, TypeVar
+from uuid import UUID
 
 import httpx
 import structlog
+from pydantic import BaseModel
+
+from healthhub_batch.archive import RawArchive
+from healthhub_batch.config import Settings
+from healthhub_batch.metrics import (
+    OURA_RATE_LIMITED,
+    OURA_REQUEST_SECONDS,
+    OURA_RESPONSE_BYTES,
+    OURA_RETRIES,
+)
+from healthhub_batch.models import HeartRateSample
+from healthhub_batch.parsing import ParsedPage, parse_page, peek_next_token
+from healthhub_batch.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from healthhub_batch.response_cache import ResponseCache
 
 logger = structlog.get_logger(__name__)
 
+PageT = TypeVar("PageT")
+
 # リトライ設定
 MAX_RETRIES = 3
 RETRY_BACKOFF_FACTOR = 2.0  # 指数バックオフの係数
@@ -25,36 +46,141 @@ class OuraClient:
 
     BASE_URL = "https://api.ouraring.com/v2/usercollection"
 
-    def __init__(self, personal_access_token: str, timeout: float = 30.0) -> None:
+    def __init__(
+        self,
+        personal_access_token: str,
+        timeout: float = 30.0,
+        rate_limiter: AdaptiveRateLimiter | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        cache: ResponseCache | None = None,
+        token_alias: str = "default",
+        base_url: str | None = None,
+        archive: RawArchive | None = None,
+        archive_user_id: UUID | str | None = None,
+    ) -> None:
         """Initialize Oura API client.
 
         Args:
             personal_access_token: Oura Personal Access Token
             timeout: Request timeout in seconds (default: 30.0)
+            rate_limiter: Limiter shared by every request of this client
+                (default: a new limiter with default limits)
+            http_client: Connection pool shared with other clients, created by
+                ``create_http_client()``. The caller owns and closes it.
+            cache: On-disk response cache (default: no caching)
+            token_alias: Alias identifying the token in cache keys
+            base_url: API base URL (default: ``BASE_URL``; ignored with ``http_client``)
+            archive: Raw response archive every fetched page is appended to
+                (default: no archiving; cache hits are not archived again)
+            archive_user_id: User the archived pages are filed under
+                (default: ``token_alias``)
         """
         self.token = personal_access_token
+        self.token_alias = token_alias
+        self.cache = cache
+        self.base_url = base_url or self.BASE_URL
         self.timeout = timeout
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self._shared_client = http_client
         self._client: httpx.AsyncClient | None = None
+        self.archive = archive
+        self.archive_user_id = archive_user_id or token_alias
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        personal_access_token: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        token_alias: str = "default",
+        user_id: UUID | None = None,
+    ) -> OuraClient:
+        """Create a client configured from application settings.
+
+        The response cache is enabled when ``OURA_CACHE_DIR`` is set, the raw
+        response archive when ``ARCHIVE_DIR`` is set.
+
+        Args:
+            settings: Application settings
+            personal_access_token: Token to use (default: ``settings.oura_pat``)
+            http_client: Shared connection pool (see ``create_http_client()``)
+            token_alias: Alias of the token (``healthhub.users.oura_pat_alias``)
+            user_id: User the archived pages are filed under
+                (default: ``settings.user_id``)
+
+        Returns:
+            Client (not yet opened)
+        """
+        cache = None
+        if settings.oura_cache_dir:
+            cache = ResponseCache(
+                settings.oura_cache_dir,
+                ttl=settings.oura_cache_ttl_seconds,
+                closed_ttl=settings.oura_cache_closed_ttl_seconds,
+                max_bytes=settings.oura_cache_max_bytes,
+            )
+        archive = None
+        if settings.archive_dir:
+            archive = RawArchive(
+                settings.archive_dir,
+                compression_level=settings.archive_compression_level,
+                segment_max_bytes=settings.archive_segment_max_bytes,
+            )
+        return cls(
+            personal_access_token or settings.oura_pat,
+            rate_limiter=AdaptiveRateLimiter(
+                rate=settings.oura_rate_limit_per_second,
+                burst=settings.oura_rate_limit_burst,
+            ),
+            http_client=http_client,
+            cache=cache,
+            token_alias=token_alias,
+            base_url=settings.oura_api_base_url,
+            archive=archive,
+            archive_user_id=user_id or settings.user_id,
+        )
+
+    @classmethod
+    def create_http_client(
+        cls,
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        base_url: str | None = None,
+    ) -> httpx.AsyncClient:
+        """Create a connection pool that several clients (users) can share.
+
+        The token is sent per request, so the pool carries no credentials.
+
+        Args:
+            timeout: Request timeout in seconds
+            max_connections: Maximum open connections to the Oura API
+            base_url: API base URL (default: ``BASE_URL``)
+
+        Returns:
+            HTTP client to pass as ``http_client``
+        """
+        return httpx.AsyncClient(
+            base_url=base_url or cls.BASE_URL,
+            headers={"Accept": "application/json"},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections),
+        )
 
     async def __aenter__(self) -> OuraClient:
         """Async context manager entry."""
-        self._client = httpx.AsyncClient(
-            base_url=self.BASE_URL,
-            headers={
-                "Authorization": f"Bearer {self.token}",
-                "Accept": "application/json",
-            },
-            timeout=self.timeout,
+        self._client = self._shared_client or self.create_http_client(
+            self.timeout, base_url=self.base_url
         )
         return self
 
     async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
         """Async context manager exit."""
-        if self._client:
+        # 共有プールは呼び出し側が閉じる
+        if self._client and self._client is not self._shared_client:
             await self._client.aclose()
 
     async def _get(self, endpoint: str, params: dict[str, str]) -> dict[str, Any]:
-        """Make GET request to Oura API with retry logic.
+        """Make GET request to Oura API and decode the JSON body.
 
         Args:
             endpoint: API endpoint path (e.g., "daily_sleep")
@@ -62,6 +188,18 @@ class OuraClient:
 
         Returns:
             JSON response as dictionary
+        """
+        return json.loads(await self._get_bytes(endpoint, params))
+
+    async def _get_bytes(self, endpoint: str, params: dict[str, str]) -> bytes:
+        """Make GET request to Oura API with retry logic.
+
+        Args:
+            endpoint: API endpoint path (e.g., "daily_sleep")
+            params: Query parameters (e.g., start_date, end_date)
+
+        Returns:
+            Raw response body
 
         Raises:
             httpx.HTTPStatusError: If the request fails after all retries
@@ -71,49 +209,74 @@ class OuraClient:
             msg = "Client not initialized. Use async context manager."
             raise RuntimeError(msg)
 
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.key(endpoint, params, self.token_alias)
+            body = self.cache.get(cache_key)
+            if body is not None:
+                logger.info("oura_api_cache_hit", endpoint=endpoint, params=params)
+                return body
+
         logger.info("oura_api_request", endpoint=endpoint, params=params)
 
         last_exception: Exception | None = None
 
         for attempt in range(MAX_RETRIES):
             try:
-                response = await self._client.get(endpoint, params=params)
+                # クライアント全体のレート制限（429後の一時停止もここで待つ）
+                await self.rate_limiter.acquire()
+                with OURA_REQUEST_SECONDS.time(endpoint=endpoint):
+                    response = await self._client.get(
+                        endpoint,
+                        params=params,
+                        headers={"Authorization": f"Bearer {self.token}"},
+                    )
 
                 # レート制限やサーバーエラーの場合はリトライ
                 if response.status_code in RETRY_STATUS_CODES:
-                    wait_time = RETRY_BACKOFF_FACTOR**attempt
+                    if response.status_code == 429:
+                        OURA_RATE_LIMITED.inc(endpoint=endpoint)
+                    OURA_RETRIES.inc(endpoint=endpoint, reason=str(response.status_code))
+                    wait_time = self._retry_wait(response, attempt)
                     logger.warning(
                         "oura_api_retry",
                         endpoint=endpoint,
                         status_code=response.status_code,
                         attempt=attempt + 1,
                         max_retries=MAX_RETRIES,
-                        wait_seconds=wait_time,
+                        wait_seconds=round(wait_time, 3),
+                        current_rate=round(self.rate_limiter.current_rate, 3),
                     )
 
                     if attempt < MAX_RETRIES - 1:
-                        await asyncio.sleep(wait_time)
+                        await self._sleep_before_retry(response, wait_time)
                         continue
 
                 # ステータスコードチェック
                 response.raise_for_status()
 
                 # 成功
-                data = response.json()
+                self.rate_limiter.on_response(response.headers)
+                OURA_RESPONSE_BYTES.inc(len(response.content), endpoint=endpoint)
+                if self.cache and cache_key:
+                    self.cache.put(cache_key, response.content, self.cache.ttl_for(params))
+                if self.archive is not None:
+                    await self._archive(self.archive, endpoint, params, response.content)
                 logger.info(
                     "oura_api_response",
                     endpoint=endpoint,
                     status_code=response.status_code,
-                    record_count=len(data.get("data", [])),
+                    bytes=len(response.content),
                     attempts=attempt + 1,
                 )
 
-                return data
+                return response.content
 
             except httpx.RequestError as e:
                 # ネットワークエラー
                 last_exception = e
-                wait_time = RETRY_BACKOFF_FACTOR**attempt
+                wait_time = self.rate_limiter.backoff(RETRY_BACKOFF_FACTOR, attempt)
+                OURA_RETRIES.inc(endpoint=endpoint, reason="network")
 
                 logger.warning(
                     "oura_api_network_error",
@@ -121,7 +284,7 @@ class OuraClient:
                     error=str(e),
                     attempt=attempt + 1,
                     max_retries=MAX_RETRIES,
-                    wait_seconds=wait_time,
+                    wait_seconds=round(wait_time, 3),
                 )
 
                 if attempt < MAX_RETRIES - 1:
@@ -142,20 +305,15 @@ class OuraClient:
                     )
                     raise
 
-                wait_time = RETRY_BACKOFF_FACTOR**attempt
+                # 最終試行でもリトライ対象のステータスが返った場合（待機は不要）
                 logger.warning(
                     "oura_api_http_retry",
                     endpoint=endpoint,
                     status_code=e.response.status_code,
                     attempt=attempt + 1,
                     max_retries=MAX_RETRIES,
-                    wait_seconds=wait_time,
                 )
 
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(wait_time)
-                    continue
-
         # 全リトライ失敗
         logger.error(
             "oura_api_max_retries_exceeded",
@@ -170,6 +328,215 @@ class OuraClient:
         msg = f"Failed to fetch {endpoint} after {MAX_RETRIES} retries"
         raise RuntimeError(msg)
 
+    def _retry_wait(self, response: httpx.Response, attempt: int) -> float:
+        """Decide how long to wait before retrying a retryable status.
+
+        A 429 pauses the whole client (every coroutine sharing the limiter)
+        for ``Retry-After`` seconds and lowers its rate. Server errors only
+        back off the current request.
+        """
+        if response.status_code == 429:
+            return self.rate_limiter.on_rate_limited(
+                parse_retry_after(response.headers.get("retry-after")),
+                fallback=RETRY_BACKOFF_FACTOR**attempt,
+            )
+        return self.rate_limiter.backoff(RETRY_BACKOFF_FACTOR, attempt)
+
+    async def _sleep_before_retry(self, response: httpx.Response, wait_time: float) -> None:
+        """Sleep before a retry unless the limiter already enforces the pause."""
+        if response.status_code != 429:
+            await asyncio.sleep(wait_time)
+
+    async def iter_pages(
+        self, endpoint: str, start_date: str, end_date: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield decoded JSON response pages lazily, following ``next_token``.
+
+        Args:
+            endpoint: API endpoint path (e.g., "daily_sleep")
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Yields:
+            One API response page at a time
+        """
+        # 呼び出し側が途中で抜けたら内側のジェネレータも閉じ、先読み中のリクエストを待つ
+        async with contextlib.aclosing(
+            self._iter_pages(
+                endpoint,
+                {"start_date": start_date, "end_date": end_date},
+                json.loads,
+                lambda page: page.get("next_token"),
+            )
+        ) as pages:
+            async for page in pages:
+                yield page
+
+    async def iter_parsed_pages(
+        self, endpoint: str, start_date: str, end_date: str, model: type[BaseModel]
+    ) -> AsyncIterator[ParsedPage]:
+        """Yield pages validated straight from the response bytes into ``model``.
+
+        Invalid records are skipped and counted per page instead of failing
+        the whole endpoint (see ``parsing.parse_page``).
+
+        Args:
+            endpoint: API endpoint path (e.g., "daily_sleep")
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+            model: Pydantic model of one record
+
+        Yields:
+            Parsed page (records, next_token, rejected count)
+        """
+        # 呼び出し側が途中で抜けたら内側のジェネレータも閉じ、先読み中のリクエストを待つ
+        async with contextlib.aclosing(
+            self._iter_pages(
+                endpoint,
+                {"start_date": start_date, "end_date": end_date},
+                lambda body: parse_page(body, model, endpoint),
+                lambda page: page.next_token,
+            )
+        ) as pages:
+            async for page in pages:
+                yield page
+
+    async def iter_raw_pages(
+        self, endpoint: str, start_date: str, end_date: str
+    ) -> AsyncIterator[bytes]:
+        """Yield undecoded response bodies, following ``next_token``.
+
+        Only ``next_token`` is read from each body; decoding and validation
+        are left to the caller (see ``pipeline.IngestPipeline``).
+
+        Args:
+            endpoint: API endpoint path (e.g., "daily_sleep")
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Yields:
+            Raw body of one API response page at a time
+        """
+        # 呼び出し側が途中で抜けたら内側のジェネレータも閉じ、先読み中のリクエストを待つ
+        async with contextlib.aclosing(
+            self._iter_pages(
+                endpoint, {"start_date": start_date, "end_date": end_date}, bytes, peek_next_token
+            )
+        ) as pages:
+            async for body in pages:
+                yield body
+
+    async def iter_heartrate_pages(
+        self, start_datetime: datetime, end_datetime: datetime
+    ) -> AsyncIterator[ParsedPage]:
+        """Yield heart rate samples of one datetime range, page by page.
+
+        Args:
+            start_datetime: Start of the range (timezone-aware)
+            end_datetime: End of the range (timezone-aware)
+
+        Yields:
+            Parsed page of ``HeartRateSample`` records
+        """
+        # 呼び出し側が途中で抜けたら内側のジェネレータも閉じ、先読み中のリクエストを待つ
+        async with contextlib.aclosing(
+            self._iter_pages(
+                "heartrate",
+                {
+                    "start_datetime": start_datetime.isoformat(),
+                    "end_datetime": end_datetime.isoformat(),
+                },
+                lambda body: parse_page(body, HeartRateSample, "heartrate"),
+                lambda page: page.next_token,
+            )
+        ) as pages:
+            async for page in pages:
+                yield page
+
+    async def _archive(
+        self, archive: RawArchive, endpoint: str, params: dict[str, str], body: bytes
+    ) -> None:
+        """Append a fetched page to the archive (a failure does not fail the fetch)."""
+        try:
+            # ファイルロック待ちや圧縮・書き込みでイベントループを止めない
+            await asyncio.to_thread(archive.append, self.archive_user_id, endpoint, params, body)
+        except OSError as e:
+            logger.error("archive_write_failed", endpoint=endpoint, params=params, error=str(e))
+
+    async def _fetch_page(
+        self, endpoint: str, params: dict[str, str], decode: Callable[[bytes], PageT]
+    ) -> PageT:
+        return decode(await self._get_bytes(endpoint, params))
+
+    async def _iter_pages(
+        self,
+        endpoint: str,
+        params: dict[str, str],
+        decode: Callable[[bytes], PageT],
+        next_token_of: Callable[[PageT], str | None],
+    ) -> AsyncIterator[PageT]:
+        """Follow ``next_token`` with one page of prefetch.
+
+        The next page is requested as soon as the current one arrives, so the
+        caller can process page N while page N+1 is in flight. At most one page
+        is buffered ahead of the caller regardless of the range length.
+        """
+        pending: asyncio.Task[PageT] | None = asyncio.create_task(
+            self._fetch_page(endpoint, params, decode)
+        )
+        seen_tokens: set[str] = set()
+        page_number = 0
+
+        try:
+            while pending is not None:
+                page = await pending
+                page_number += 1
+                pending = None
+
+                next_token = next_token_of(page)
+                if next_token and next_token in seen_tokens:
+                    # 同じトークンが返ってきた場合は無限ループを避けて打ち切る
+                    logger.warning(
+                        "oura_api_repeated_next_token", endpoint=endpoint, page=page_number
+                    )
+                elif next_token:
+                    seen_tokens.add(next_token)
+                    pending = asyncio.create_task(
+                        self._fetch_page(endpoint, {**params, "next_token": next_token}, decode)
+                    )
+
+                yield page
+        finally:
+            # 呼び出し側が途中で抜けた場合は先読み中のリクエストを破棄し、終わるまで待つ
+            # （読まれないページの失敗は呼び出し側には関係ないので捨てる）
+            if pending is not None:
+                pending.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await pending
+
+    async def _get_all_pages(
+        self, endpoint: str, start_date: str, end_date: str
+    ) -> dict[str, Any]:
+        """Fetch every page of a date range and merge them into one response.
+
+        Args:
+            endpoint: API endpoint path (e.g., "daily_sleep")
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Returns:
+            Response with the ``data`` of all pages and no ``next_token``
+        """
+        data: list[dict[str, Any]] = []
+        pages = 0
+        async for page in self.iter_pages(endpoint, start_date, end_date):
+            data.extend(page.get("data", []))
+            pages += 1
+
+        if pages > 1:
+            logger.info("oura_api_pages_merged", endpoint=endpoint, pages=pages, records=len(data))
+        return {"data": data, "next_token": None}
+
     async def get_daily_sleep(
         self, start_date: str, end_date: str
     ) -> dict[str, Any]:
@@ -180,12 +547,9 @@ class OuraClient:
             end_date: End date (YYYY-MM-DD)
 
         Returns:
-            API response with sleep data
+            API response with all pages of sleep data
         """
-        return await self._get(
-            "daily_sleep",
-            {"start_date": start_date, "end_date": end_date},
-        )
+        return await self._get_all_pages("daily_sleep", start_date, end_date)
 
     async def get_daily_activity(
         self, start_date: str, end_date: str
@@ -197,12 +561,9 @@ class OuraClient:
             end_date: End date (YYYY-MM-DD)
 
         Returns:
-            API response with activity data
+            API response with all pages of activity data
         """
-        return await self._get(
-            "daily_activity",
-            {"start_date": start_date, "end_date": end_date},
-        )
+        return await self._get_all_pages("daily_activity", start_date, end_date)
 
     async def get_daily_stress(
         self, start_date: str, end_date: str
@@ -214,12 +575,9 @@ class OuraClient:
             end_date: End date (YYYY-MM-DD)
 
         Returns:
-            API response with stress data
+            API response with all pages of stress data
         """
-        return await self._get(
-            "daily_stress",
-            {"start_date": start_date, "end_date": end_date},
-        )
+        return await self._get_all_pages("daily_stress", start_date, end_date)
 
     async def get_daily_resilience(
         self, start_date: str, end_date: str
@@ -231,12 +589,9 @@ class OuraClient:
             end_date: End date (YYYY-MM-DD)
 
         Returns:
-            API response with resilience data
+            API response with all pages of resilience data
         """
-        return await self._get(
-            "daily_resilience",
-            {"start_date": start_date, "end_date": end_date},
-        )
+        return await self._get_all_pages("daily_resilience", start_date, end_date)
 
     async def get_daily_readiness(
         self, start_date: str, end_date: str
@@ -248,9 +603,6 @@ class OuraClient:
             end_date: End date (YYYY-MM-DD)
 
         Returns:
-            API response with readiness data
+            API response with all pages of readiness data
         """
-        return await self._get(
-            "daily_readiness",
-            {"start_date": start_date, "end_date": end_date},
-        )
\ No newline at end of file
+        return await self._get_all_pages("daily_readiness", start_date, end_date)
\ No newline at end of file
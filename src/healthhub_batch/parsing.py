@@ -0,0 +1,155 @@
+# src/healthhub_batch/parsing.py
+# APIレスポンスのバイト列をPydanticモデルへ直接バリデーションするパース処理
+# 通常はTypeAdapter.validate_jsonで1パス、不正なレコードがあればレコード単位に検証し直してスキップ・件数記録する
+# RELEVANT FILES: models.py, oura_client.py, fetcher.py
+
+"""Validate Oura API response bytes straight into typed records."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Generic, NamedTuple, Optional, TypeVar
+
+import structlog
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from healthhub_batch.metrics import RECORDS_PARSED, RECORDS_REJECTED
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Oura APIのページ（data + next_token）"""
+
+    data: list[T]
+    next_token: Optional[str] = None
+
+
+class ParsedPage(NamedTuple):
+    """1ページ分のパース結果"""
+
+    records: list[Any]
+    next_token: str | None
+    rejected: int  # バリデーションエラーでスキップしたレコード数
+    rejected_days: tuple[str, ...] = ()  # スキップしたレコードの day（取れなければ ""）
+
+
+@lru_cache(maxsize=None)
+def _page_adapter(model: type[BaseModel]) -> TypeAdapter[Page[Any]]:
+    return TypeAdapter(Page[model])  # type: ignore[valid-type]
+
+
+@lru_cache(maxsize=None)
+def _record_adapter(model: type[BaseModel]) -> TypeAdapter[Any]:
+    return TypeAdapter(model)
+
+
+_RAW_PAGE = TypeAdapter(Page[dict[str, Any]])
+
+
+class _NextToken(BaseModel):
+    next_token: Optional[str] = None
+
+
+_NEXT_TOKEN = TypeAdapter(_NextToken)
+
+
+def peek_next_token(body: bytes) -> str | None:
+    """Read only ``next_token`` from a response body.
+
+    The ``data`` records are skipped by the JSON parser without building
+    Python objects, so the fetch stage can follow pagination while leaving
+    validation to a later stage.
+
+    Args:
+        body: Raw response body
+
+    Returns:
+        Token of the next page, or None on the last page
+    """
+    return _NEXT_TOKEN.validate_json(body).next_token
+
+
+def validate_records(
+    model: type[BaseModel], items: list[dict[str, Any]], endpoint: str = ""
+) -> tuple[list[Any], int]:
+    """Validate records one by one, skipping invalid ones.
+
+    Args:
+        model: Pydantic model of one record
+        items: Decoded records
+        endpoint: Endpoint name for logging
+
+    Returns:
+        (valid records, number of rejected records)
+    """
+    records, rejected = _split_records(model, items, endpoint)
+    return records, len(rejected)
+
+
+def _split_records(
+    model: type[BaseModel], items: list[Any], endpoint: str
+) -> tuple[list[Any], list[Any]]:
+    """(検証を通ったレコード, 弾いた元の要素) に分ける"""
+    adapter = _record_adapter(model)
+    records = []
+    rejected = []
+    for index, item in enumerate(items):
+        try:
+            records.append(adapter.validate_python(item))
+        except ValidationError as e:
+            rejected.append(item)
+            logger.warning(
+                "record_validation_failed",
+                endpoint=endpoint,
+                index=index,
+                document_id=item.get("id") if isinstance(item, dict) else None,
+                errors=e.errors(include_url=False, include_input=False),
+            )
+    RECORDS_PARSED.inc(len(records), endpoint=endpoint)
+    if rejected:
+        RECORDS_REJECTED.inc(len(rejected), endpoint=endpoint)
+    return records, rejected
+
+
+def _record_day(item: Any) -> str:
+    day = item.get("day") if isinstance(item, dict) else None
+    return day if isinstance(day, str) else ""
+
+
+def parse_page(body: bytes, model: type[BaseModel], endpoint: str = "") -> ParsedPage:
+    """Parse one response body into typed records.
+
+    The whole page is validated in one pass from bytes (no intermediate
+    dicts). Only if that fails is the page decoded again and validated record
+    by record, so one malformed record no longer discards the page.
+
+    Args:
+        body: Raw response body
+        model: Pydantic model of one record
+        endpoint: Endpoint name for logging
+
+    Returns:
+        Valid records, next_token, and the number and days of rejected records
+
+    Raises:
+        pydantic.ValidationError: If the body is not a page at all (invalid
+            JSON or no ``data`` list)
+    """
+    try:
+        page = _page_adapter(model).validate_json(body)
+    except ValidationError:
+        pass
+    else:
+        RECORDS_PARSED.inc(len(page.data), endpoint=endpoint)
+        return ParsedPage(page.data, page.next_token, 0)
+
+    raw_page = _RAW_PAGE.validate_json(body)
+    records, rejected = _split_records(model, raw_page.data, endpoint)
+    return ParsedPage(
+        records,
+        raw_page.next_token,
+        len(rejected),
+        tuple(_record_day(item) for item in rejected),
+    )
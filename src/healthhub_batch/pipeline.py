@@ -0,0 +1,319 @@
+# src/healthhub_batch/pipeline.py
+# 取得 → パース → 行変換 → 保存 を有界キューでつないだストリーミングパイプライン
+# 各エンドポイントのページは届いた順にDBへ流れ、キューが詰まれば上流が待たされる（バックプレッシャー）
+# RELEVANT FILES: fetcher.py, oura_client.py, parsing.py, repository.py
+
+"""Streaming fetch → parse → transform → load pipeline."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import structlog
+from pydantic import BaseModel
+
+from healthhub_batch.database import Database
+from healthhub_batch.oura_client import OuraClient
+from healthhub_batch.parsing import parse_page
+from healthhub_batch.repository import (
+    DEFAULT_UPSERT_BATCH_SIZE,
+    TABLE_MAPPINGS,
+    HealthDataRepository,
+    UpsertResult,
+)
+
+logger = structlog.get_logger(__name__)
+
+# キュー終端を表す番兵
+_DONE = object()
+
+
+class PipelineResult(NamedTuple):
+    """パイプライン1回分の結果"""
+
+    save_counts: dict[str, UpsertResult]  # データ種別 → 件数
+    errors: dict[str, str]  # 失敗したエンドポイント → エラー内容
+    rejected: dict[str, int]  # データ種別 → バリデーションエラーでスキップした件数
+
+
+class StageStats:
+    """Time one stage spends working, waiting for input and blocked on output.
+
+    ``blocked`` is time spent waiting for room in the downstream queue, i.e.
+    backpressure from a slower stage.
+    """
+
+    def __init__(self) -> None:
+        self.items = 0
+        self.busy = 0.0
+        self.idle = 0.0
+        self.blocked = 0.0
+
+    def as_log(self, elapsed: float) -> dict[str, Any]:
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy, 3),
+            "idle_seconds": round(self.idle, 3),
+            "blocked_seconds": round(self.blocked, 3),
+            "utilization": round(self.busy / elapsed, 3) if elapsed else 0.0,
+        }
+
+
+class IngestPipeline:
+    """Fetch, parse, transform and load one date range as a stream of pages.
+
+    Every endpoint has its own fetch task; pages from all endpoints share the
+    downstream stages:
+
+    - fetch: raw response bodies (``OuraClient.iter_raw_pages``)
+    - parse: decode and validate in one pass (``parsing.parse_page``)
+    - transform: records to table rows (``TABLE_MAPPINGS``)
+    - load: one upsert transaction per page, optionally one writer (and
+      connection) per table
+
+    Stages are connected by queues of ``queue_size`` pages, so a slow stage
+    pauses the stages before it instead of buffering the whole range.
+    A failing endpoint is recorded and the others keep flowing; its pages that
+    are still queued are dropped by every later stage in both load modes, so
+    nothing is written for it after the failure is noticed. A database
+    error aborts the run, unless tables are loaded in parallel: then only the
+    failing table stops and the pages committed so far are kept.
+    """
+
+    def __init__(
+        self,
+        client: OuraClient,
+        db: Database,
+        user_id: UUID,
+        endpoint_models: dict[str, tuple[str, type[BaseModel]]],
+        queue_size: int = 8,
+        batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+        log_interval: float = 5.0,
+        parallel_tables: bool = False,
+    ) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            client: Already opened client
+            db: Database (not closed by the pipeline)
+            user_id: User the rows belong to
+            endpoint_models: Endpoint → (data type, Pydantic model)
+            queue_size: Maximum pages waiting between two stages
+            batch_size: Maximum rows per multi-row INSERT statement
+            log_interval: Seconds between queue depth logs (0: only at the end)
+            parallel_tables: Load each table on its own connection concurrently;
+                a failing table is reported as an endpoint error instead of
+                aborting the run
+        """
+        if queue_size < 1:
+            msg = f"queue_size must be positive: {queue_size}"
+            raise ValueError(msg)
+        self.client = client
+        self.db = db
+        self.user_id = user_id
+        self.endpoint_models = endpoint_models
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.log_interval = log_interval
+        self.parallel_tables = parallel_tables
+        self._endpoints = {
+            data_type: endpoint for endpoint, (data_type, _) in endpoint_models.items()
+        }
+
+        self.queues: dict[str, asyncio.Queue[Any]] = {
+            stage: asyncio.Queue(maxsize=queue_size) for stage in ("parse", "transform", "load")
+        }
+        self.max_depth: dict[str, int] = dict.fromkeys(self.queues, 0)
+        self.stats: dict[str, StageStats] = defaultdict(StageStats)
+
+        self.save_counts: dict[str, UpsertResult] = {
+            data_type: UpsertResult() for data_type, _ in endpoint_models.values()
+        }
+        # データ種別 → "empty"（書き込みなし）/ "committed" / "failed"（失敗前のページはコミット済み）
+        self.table_status: dict[str, str] = dict.fromkeys(self._endpoints, "empty")
+        self.errors: dict[str, str] = {}
+        self.rejected: dict[str, int] = defaultdict(int)
+
+    async def run(self, start_date: str, end_date: str) -> PipelineResult:
+        """Run the pipeline for one date range.
+
+        Args:
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD)
+
+        Returns:
+            Save counts, fetch errors and rejected record counts
+        """
+        logger.info("pipeline_started", start_date=start_date, end_date=end_date)
+        started = time.perf_counter()
+        monitor = asyncio.create_task(self._monitor()) if self.log_interval > 0 else None
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                fetchers = [
+                    tg.create_task(self._fetch(endpoint, start_date, end_date))
+                    for endpoint in self.endpoint_models
+                ]
+                tg.create_task(self._close_when_done(fetchers, self.queues["parse"]))
+                tg.create_task(self._parse())
+                tg.create_task(self._transform())
+                tg.create_task(self._load())
+        except ExceptionGroup as eg:
+            # 呼び出し側には従来どおり単一の例外（DBエラーなど）を返す
+            raise eg.exceptions[0] from None
+        finally:
+            if monitor is not None:
+                monitor.cancel()
+
+        elapsed = time.perf_counter() - started
+        for stage, stats in self.stats.items():
+            logger.info("pipeline_stage_stats", stage=stage, **stats.as_log(elapsed))
+        logger.info(
+            "pipeline_completed",
+            elapsed_seconds=round(elapsed, 3),
+            max_queue_depth=self.max_depth,
+            save_counts=self.save_counts,
+            table_status=self.table_status,
+            errors=self.errors,
+        )
+        return PipelineResult(self.save_counts, self.errors, dict(self.rejected))
+
+    async def _put(self, stage: str, queue_name: str, item: Any) -> None:
+        """下流キューへ投入（満杯で待たされた時間をblockedとして計上）"""
+        queue = self.queues[queue_name]
+        waited = time.perf_counter()
+        await queue.put(item)
+        self.stats[stage].blocked += time.perf_counter() - waited
+        self.max_depth[queue_name] = max(self.max_depth[queue_name], queue.qsize())
+
+    async def _get(self, stage: str, queue_name: str) -> Any:
+        """上流キューから取り出し（待った時間をidleとして計上）"""
+        waited = time.perf_counter()
+        item = await self.queues[queue_name].get()
+        self.stats[stage].idle += time.perf_counter() - waited
+        return item
+
+    async def _fetch(self, endpoint: str, start_date: str, end_date: str) -> None:
+        """1エンドポイント分のページを取得して parse キューへ流す"""
+        stats = self.stats["fetch"]
+        pages = self.client.iter_raw_pages(endpoint, start_date, end_date)
+        try:
+            while True:
+                waited = time.perf_counter()
+                try:
+                    body = await anext(pages)
+                except StopAsyncIteration:
+                    break
+                stats.busy += time.perf_counter() - waited
+                stats.items += 1
+                await self._put("fetch", "parse", (endpoint, body))
+        except Exception as e:
+            logger.error("fetch_failed", endpoint=endpoint, error=str(e))
+            self.errors[endpoint] = str(e)
+        finally:
+            await pages.aclose()
+
+    @staticmethod
+    async def _close_when_done(tasks: list[asyncio.Task[None]], queue: asyncio.Queue[Any]) -> None:
+        await asyncio.gather(*tasks)
+        await queue.put(_DONE)
+
+    async def _parse(self) -> None:
+        """レスポンスのバイト列をモデルへ検証（不正なページはエンドポイント単位のエラー）"""
+        stats = self.stats["parse"]
+        while (item := await self._get("parse", "parse")) is not _DONE:
+            endpoint, body = item
+            if endpoint in self.errors:
+                continue  # 失敗済みのエンドポイントの残りページは捨てる
+
+            data_type, model = self.endpoint_models[endpoint]
+            started = time.perf_counter()
+            try:
+                page = parse_page(body, model, endpoint)
+            except ValueError as e:
+                logger.error("parse_failed", endpoint=endpoint, error=str(e))
+                self.errors[endpoint] = str(e)
+                continue
+            finally:
+                stats.busy += time.perf_counter() - started
+            stats.items += 1
+
+            if page.rejected:
+                self.rejected[data_type] += page.rejected
+            if page.records:
+                await self._put("parse", "transform", (data_type, page.records))
+        await self.queues["transform"].put(_DONE)
+
+    async def _transform(self) -> None:
+        """モデルをテーブルの行dictへ変換"""
+        stats = self.stats["transform"]
+        while (item := await self._get("transform", "transform")) is not _DONE:
+            data_type, records = item
+            started = time.perf_counter()
+            to_row = TABLE_MAPPINGS[data_type].to_row
+            rows = [to_row(self.user_id, record) for record in records]
+            stats.busy += time.perf_counter() - started
+            stats.items += 1
+            await self._put("transform", "load", (data_type, rows))
+        await self.queues["load"].put(_DONE)
+
+    async def _load(self) -> None:
+        """ページ単位のトランザクションでupsert（parallel_tables ならテーブルごとのワーカーへ振り分け）"""
+        if not self.parallel_tables:
+            while (item := await self._get("load", "load")) is not _DONE:
+                data_type, rows = item
+                if self._endpoints[data_type] in self.errors:
+                    continue  # 失敗したエンドポイントの残りページは捨てる（parallel_tables と同じ）
+                await self._load_page(data_type, rows)
+            return
+
+        for data_type in self._endpoints:
+            self.queues[f"load:{data_type}"] = asyncio.Queue(maxsize=self.queue_size)
+            self.max_depth[f"load:{data_type}"] = 0
+        async with asyncio.TaskGroup() as tg:
+            for data_type in self._endpoints:
+                tg.create_task(self._table_writer(data_type))
+            while (item := await self._get("load", "load")) is not _DONE:
+                data_type, rows = item
+                await self._put("load", f"load:{data_type}", rows)
+            for data_type in self._endpoints:
+                await self.queues[f"load:{data_type}"].put(_DONE)
+
+    async def _table_writer(self, data_type: str) -> None:
+        """1テーブル分を専用のコネクションで書き込む（失敗しても他のテーブルは続行）"""
+        endpoint = self._endpoints[data_type]
+        queue = self.queues[f"load:{data_type}"]
+        while (rows := await queue.get()) is not _DONE:
+            if endpoint in self.errors:
+                continue  # 失敗済みのテーブルの残りページは捨てる
+            try:
+                await self._load_page(data_type, rows)
+            except Exception as e:
+                logger.error("table_write_failed", data_type=data_type, error=str(e))
+                self.errors[endpoint] = f"write failed: {e}"
+                self.table_status[data_type] = "failed"
+
+    async def _load_page(self, data_type: str, rows: list[dict[str, Any]]) -> None:
+        stats = self.stats["load"]
+        started = time.perf_counter()
+        async with self.db.session() as session:
+            repo = HealthDataRepository(
+                session, self.user_id, batch_size=self.batch_size, cache=self.db.read_cache
+            )
+            counts = await repo.upsert_rows(data_type, rows)
+        stats.busy += time.perf_counter() - started
+        stats.items += 1
+        self.save_counts[data_type] = self.save_counts[data_type].merge(counts)
+        self.table_status[data_type] = "committed"
+
+    async def _monitor(self) -> None:
+        """一定間隔でキューの深さをログ出力"""
+        while True:
+            await asyncio.sleep(self.log_interval)
+            logger.info(
+                "pipeline_queue_depth",
+                **{name: queue.qsize() for name, queue in self.queues.items()},
+            )
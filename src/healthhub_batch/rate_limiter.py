@@ -0,0 +1,194 @@
+# src/healthhub_batch/rate_limiter.py
+# Oura APIクライアント全体で共有する適応型レート制限（トークンバケット）
+# 429のRetry-Afterとレート制限ヘッダを読み取り、クライアント全体の送信レートを調整する
+# RELEVANT FILES: oura_client.py, config.py
+
+"""Client-wide adaptive token-bucket rate limiter."""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# レート制限の残数を示すヘッダ（先に見つかったものを使う）
+REMAINING_HEADERS = ("ratelimit-remaining", "x-ratelimit-remaining")
+LIMIT_HEADERS = ("ratelimit-limit", "x-ratelimit-limit")
+
+# 残数がこの割合を下回ったら送信レートを下げる
+LOW_REMAINING_RATIO = 0.1
+
+
+def parse_retry_after(value: str | None, now: datetime | None = None) -> float | None:
+    """Parse a ``Retry-After`` header (delay-seconds or HTTP-date).
+
+    Args:
+        value: Header value
+        now: Current time for HTTP-date values (default: now in UTC)
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def _first_header(headers: Mapping[str, str], names: tuple[str, ...]) -> float | None:
+    """Return the first numeric header found among ``names``."""
+    lowered = {k.lower(): v for k, v in headers.items()}
+    for name in names:
+        if name in lowered:
+            try:
+                return float(lowered[name])
+            except ValueError:
+                return None
+    return None
+
+
+class AdaptiveRateLimiter:
+    """Token bucket shared by every request of one client.
+
+    The rate drops multiplicatively on a 429 (or when the server reports few
+    remaining requests) and recovers additively on success. A 429 also pauses
+    the whole client until ``Retry-After`` has elapsed, with jitter so callers
+    do not resume in lockstep; the bucket stays empty during the pause, and
+    further 429s within the same pause do not lower the rate again.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        min_rate: float = 0.2,
+        recovery_step: float = 0.1,
+        jitter: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate: Maximum (and initial) requests per second
+            burst: Bucket capacity (requests allowed back-to-back)
+            min_rate: Lower bound for the adaptive rate
+            recovery_step: Requests/sec added back after each success
+            jitter: Maximum random fraction added to waits (0.25 = up to +25%)
+            clock: Monotonic clock (injectable for tests)
+            sleep: Async sleep function (injectable for tests)
+        """
+        if rate <= 0 or burst < 1:
+            msg = f"rate must be positive and burst >= 1: rate={rate}, burst={burst}"
+            raise ValueError(msg)
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self.recovery_step = recovery_step
+        self.jitter = jitter
+        self._clock = clock
+        self._sleep = sleep
+        self._rate = rate
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def current_rate(self) -> float:
+        """Current allowed requests per second."""
+        return self._rate
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _with_jitter(self, seconds: float) -> float:
+        return seconds * (1 + random.uniform(0, self.jitter))
+
+    def _set_rate(self, rate: float, reason: str) -> None:
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        if rate < self._rate:
+            logger.warning("oura_rate_limit_lowered", rate=round(rate, 3), reason=reason)
+        self._rate = rate
+
+    async def acquire(self) -> None:
+        """Wait until the client may send one more request."""
+        # ロックを保持したまま待つことで、待機中の呼び出しはFIFOで1件ずつ進む
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await self._sleep(self._paused_until - now)
+                    continue
+
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await self._sleep((1 - self._tokens) / self._rate)
+
+    def on_response(self, headers: Mapping[str, str]) -> None:
+        """Adapt the rate after a successful response.
+
+        Args:
+            headers: Response headers (rate-limit headers are read if present)
+        """
+        remaining = _first_header(headers, REMAINING_HEADERS)
+        limit = _first_header(headers, LIMIT_HEADERS)
+        if remaining is not None and limit and remaining / limit < LOW_REMAINING_RATIO:
+            self._set_rate(self._rate / 2, reason="low_remaining")
+            return
+        self._set_rate(self._rate + self.recovery_step, reason="success")
+
+    def on_rate_limited(self, retry_after: float | None, fallback: float) -> float:
+        """Slow down the whole client after a 429.
+
+        Args:
+            retry_after: Seconds from the ``Retry-After`` header, if any
+            fallback: Seconds to pause when the server gave no hint
+
+        Returns:
+            Seconds the client is paused for
+        """
+        now = self._clock()
+        already_paused = now < self._paused_until
+        pause = self._with_jitter(retry_after if retry_after is not None else fallback)
+        self._paused_until = max(self._paused_until, now + pause)
+        # 再開直後にバーストしないようにバケットを空にし、停止中はトークンを貯めない
+        self._tokens = 0.0
+        self._updated = self._paused_until
+        # 停止前に送った並行リクエストの429では、同じ停止期間中に何度も半減させない
+        if not already_paused:
+            self._set_rate(self._rate / 2, reason="429")
+        return pause
+
+    def backoff(self, base: float, attempt: int) -> float:
+        """Exponential backoff with jitter for 5xx and network errors.
+
+        Args:
+            base: Backoff factor
+            attempt: Zero-based attempt number
+
+        Returns:
+            Seconds to wait before retrying
+        """
+        return self._with_jitter(base**attempt)
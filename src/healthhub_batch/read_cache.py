@@ -0,0 +1,167 @@
+# src/healthhub_batch/read_cache.py
+# リポジトリの読み出し結果のプロセス内キャッシュ（LRU + TTL）
+# (ユーザー, データ種別, 開始日, 終了日) をキーに保持し、upsertで書き込まれた日を含む範囲のエントリだけを無効化する
+# RELEVANT FILES: repository.py, copy_loader.py, database.py, config.py
+
+"""Bounded in-process LRU/TTL cache of repository range reads."""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from datetime import date
+from typing import Any, NamedTuple
+from uuid import UUID
+
+CacheKey = tuple[UUID, str, date, date]
+
+
+class ReadCacheStats(NamedTuple):
+    """キャッシュのカウンタ（プロセス起動からの累計）"""
+
+    hits: int = 0
+    misses: int = 0  # 期限切れを含む
+    evictions: int = 0  # 上限を超えて古い順に追い出した数
+    expirations: int = 0  # TTL切れで捨てた数
+    invalidations: int = 0  # 書き込まれた日を含むため捨てた数
+    entries: int = 0  # 現在のエントリ数
+
+
+class ReadCache:
+    """Cache of ``(user, data type, start day, end day)`` reads.
+
+    Entries are evicted least recently used first once ``max_entries`` is
+    reached and expire after ``ttl`` seconds (which bounds staleness from
+    writers in other processes). Writers in this process call
+    ``invalidate`` with the days they wrote; only entries whose range
+    contains one of those days are dropped.
+
+    A read that misses takes a ``generation`` token before querying and
+    passes it to ``put``; if the same user and data type were written in the
+    meantime, the possibly stale result is not stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[CacheKey, tuple[float, list[Any]]] = OrderedDict()
+        # (ユーザー, データ種別) → キャッシュ中の範囲（無効化で全エントリを走査しないための索引）
+        self._ranges: dict[tuple[UUID, str], set[CacheKey]] = {}
+        self._generations: dict[tuple[UUID, str], int] = {}
+        self._counts = {field: 0 for field in ReadCacheStats._fields if field != "entries"}
+
+    def get(
+        self, user_id: UUID, data_type: str, start_day: date, end_day: date
+    ) -> list[Any] | None:
+        """Return the cached records of a range, or None on a miss.
+
+        Args:
+            user_id: User
+            data_type: Data type (TABLE_MAPPINGS key)
+            start_day: First day
+            end_day: Last day, inclusive
+
+        Returns:
+            Records in day order (shared; callers must not modify them)
+        """
+        key = (user_id, data_type, start_day, end_day)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= self._clock():
+            self._remove(key)
+            self._counts["expirations"] += 1
+            entry = None
+        if entry is None:
+            self._counts["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counts["hits"] += 1
+        return entry[1]
+
+    def generation(self, user_id: UUID, data_type: str) -> int:
+        """Return the write generation of a user's data type (take it before reading)."""
+        return self._generations.get((user_id, data_type), 0)
+
+    def put(
+        self,
+        user_id: UUID,
+        data_type: str,
+        start_day: date,
+        end_day: date,
+        records: list[Any],
+        generation: int,
+    ) -> None:
+        """Store the records of a range read.
+
+        Args:
+            user_id: User
+            data_type: Data type
+            start_day: First day
+            end_day: Last day, inclusive
+            records: Records in day order
+            generation: ``generation()`` taken before the read
+        """
+        if generation != self.generation(user_id, data_type):
+            return  # 読んでいる間に書き込まれた（古いかもしれない結果は入れない）
+        key = (user_id, data_type, start_day, end_day)
+        self._entries[key] = (self._clock() + self.ttl, records)
+        self._entries.move_to_end(key)
+        self._ranges.setdefault((user_id, data_type), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._counts["evictions"] += 1
+
+    def invalidate(self, user_id: UUID, data_type: str, days: Iterable[date]) -> int:
+        """Drop the cached ranges of a user's data type that contain any of ``days``.
+
+        Args:
+            user_id: User
+            data_type: Data type
+            days: Days that were inserted or updated
+
+        Returns:
+            Number of entries dropped
+        """
+        written = sorted(set(days))
+        if not written:
+            return 0
+        self._generations[(user_id, data_type)] = self.generation(user_id, data_type) + 1
+
+        stale = [
+            key
+            for key in self._ranges.get((user_id, data_type), ())
+            if (i := bisect_left(written, key[2])) < len(written) and written[i] <= key[3]
+        ]
+        for key in stale:
+            self._remove(key)
+        self._counts["invalidations"] += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)."""
+        self._entries.clear()
+        self._ranges.clear()
+
+    def stats(self) -> ReadCacheStats:
+        """Return the hit / miss / eviction counters and the current size."""
+        return ReadCacheStats(**self._counts, entries=len(self._entries))
+
+    def _remove(self, key: CacheKey) -> None:
+        del self._entries[key]
+        ranges = self._ranges[key[:2]]
+        ranges.discard(key)
+        if not ranges:
+            del self._ranges[key[:2]]
@@ -1,24 +1,33 @@
 # src/healthhub_batch/repository.py
-# データ保存ロジック（Repositoryパターン）
-# Pydanticモデルからデータベースへの変換・upsert処理を提供
+# データ保存・読み出しロジック（Repositoryパターン）
+# Pydanticモデルからデータベースへの変換・upsert処理と、(user_id, day) のキーセットページングによる読み出しを提供
 # RELEVANT FILES: db_models.py, models.py, database.py
 
-from datetime import date
-from typing import Any
+import hashlib
+from collections.abc import AsyncIterator, Callable, Sequence
+from datetime import date, datetime
+from typing import Any, NamedTuple
 from uuid import UUID
 
+import numpy as np
 import structlog
-from sqlalchemy import select
+from pydantic import BaseModel
+from sqlalchemy import Select, event, func, literal_column, select
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from healthhub_batch.db_models import (
+    Base,
     DailyActivitySummary,
     DailyReadinessSummary,
     DailyResilienceSummary,
     DailySleepSummary,
     DailyStressSummary,
+    SyncState,
+    User,
 )
+from healthhub_batch.metrics import observe_upsert
 from healthhub_batch.models import (
     DailyActivity,
     DailyReadiness,
@@ -26,23 +35,312 @@ from healthhub_batch.models import (
     DailySleep,
     DailyStress,
 )
+from healthhub_batch.read_cache import ReadCache
+from healthhub_batch.rollups import ROLLUP_METRICS, refresh_rollups
+from healthhub_batch.series_codec import (
+    decode_class_5_min_matrix,
+    decode_met_matrix,
+    encode_class_5_min,
+    encode_met,
+)
 
 logger = structlog.get_logger()
 
+# 1ステートメントあたりの行数（デフォルト）
+DEFAULT_UPSERT_BATCH_SIZE = 500
+# 読み出しで1回に取得する行数（デフォルト）
+DEFAULT_READ_PAGE_SIZE = 1000
+
+# ON CONFLICT時に更新しないカラム
+CONFLICT_KEYS = ("user_id", "day")
+IMMUTABLE_COLUMNS = {*CONFLICT_KEYS, "created_at"}
+
+
+class UpsertResult(NamedTuple):
+    """upsert件数の内訳"""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0  # content_hashが同じで書き込まなかった行
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+    def merge(self, other: "UpsertResult") -> "UpsertResult":
+        """件数を合算"""
+        return UpsertResult(*(a + b for a, b in zip(self, other, strict=True)))
+
+
+# ===============================
+# Column mappings (Pydantic → DB row)
+# ===============================
+
+
+def content_hash(item: BaseModel) -> bytes:
+    """ソースドキュメント（パース済みモデル）のSHA-256ダイジェスト"""
+    return hashlib.sha256(item.model_dump_json().encode()).digest()
+
+
+def sleep_to_row(user_id: UUID, item: DailySleep) -> dict[str, Any]:
+    """睡眠データをdaily_sleep_summariesの行に変換"""
+    return {
+        "user_id": user_id,
+        "day": item.day,
+        "score": item.score,
+        "contributors_deep_sleep": item.contributors.deep_sleep,
+        "contributors_efficiency": item.contributors.efficiency,
+        "contributors_latency": item.contributors.latency,
+        "contributors_rem_sleep": item.contributors.rem_sleep,
+        "contributors_restfulness": item.contributors.restfulness,
+        "contributors_timing": item.contributors.timing,
+        "contributors_total_sleep": item.contributors.total_sleep,
+        "source_timestamp": item.timestamp,
+        "document_id": UUID(item.id),
+        "content_hash": content_hash(item),
+    }
+
+
+def activity_to_row(user_id: UUID, item: DailyActivity) -> dict[str, Any]:
+    """活動データをdaily_activity_summariesの行に変換"""
+    return {
+        "user_id": user_id,
+        "day": item.day,
+        "score": item.score,
+        "steps": item.steps,
+        "active_calories": item.active_calories,
+        "total_calories": item.total_calories,
+        "target_calories": item.target_calories,
+        "equivalent_walking_distance": item.equivalent_walking_distance,
+        "high_activity_time": item.high_activity_time,
+        "medium_activity_time": item.medium_activity_time,
+        "low_activity_time": item.low_activity_time,
+        "sedentary_time": item.sedentary_time,
+        "resting_time": item.resting_time,
+        "non_wear_time": item.non_wear_time,
+        "inactivity_alerts": item.inactivity_alerts,
+        "met_interval": item.met.interval if item.met else None,
+        "met_timestamp": item.met.timestamp if item.met else None,
+        "met_items": encode_met(item.met.items) if item.met else None,
+        "class_5_min": encode_class_5_min(item.class_5_min) if item.class_5_min else None,
+        "contributors_meet_daily_targets": item.contributors.meet_daily_targets,
+        "contributors_move_every_hour": item.contributors.move_every_hour,
+        "contributors_recovery_time": item.contributors.recovery_time,
+        "contributors_stay_active": item.contributors.stay_active,
+        "contributors_training_frequency": item.contributors.training_frequency,
+        "contributors_training_volume": item.contributors.training_volume,
+        "source_timestamp": item.timestamp,
+        "document_id": UUID(item.id),
+        "content_hash": content_hash(item),
+    }
+
+
+def readiness_to_row(user_id: UUID, item: DailyReadiness) -> dict[str, Any]:
+    """レディネスデータをdaily_readiness_summariesの行に変換"""
+    return {
+        "user_id": user_id,
+        "day": item.day,
+        "score": item.score,
+        "temperature_deviation": item.temperature_deviation,
+        "temperature_trend_deviation": item.temperature_trend_deviation,
+        "contributors_activity_balance": item.contributors.activity_balance,
+        "contributors_body_temperature": item.contributors.body_temperature,
+        "contributors_previous_day_activity": item.contributors.previous_day_activity,
+        "contributors_previous_night": item.contributors.previous_night,
+        "contributors_recovery_index": item.contributors.recovery_index,
+        "contributors_resting_heart_rate": item.contributors.resting_heart_rate,
+        "contributors_sleep_balance": item.contributors.sleep_balance,
+        "contributors_hrv_balance": item.contributors.hrv_balance,
+        "source_timestamp": item.timestamp,
+        "document_id": UUID(item.id),
+        "content_hash": content_hash(item),
+    }
+
+
+def stress_to_row(user_id: UUID, item: DailyStress) -> dict[str, Any]:
+    """ストレスデータをdaily_stress_summariesの行に変換"""
+    return {
+        "user_id": user_id,
+        "day": item.day,
+        "day_summary": item.day_summary,
+        "stress_high": item.stress_high,
+        "recovery_high": item.recovery_high,
+        "document_id": UUID(item.id),
+        "content_hash": content_hash(item),
+    }
+
+
+def resilience_to_row(user_id: UUID, item: DailyResilience) -> dict[str, Any]:
+    """レジリエンスデータをdaily_resilience_summariesの行に変換"""
+    return {
+        "user_id": user_id,
+        "day": item.day,
+        "level": item.level,
+        "contributors_sleep_recovery": item.contributors.sleep_recovery,
+        "contributors_daytime_recovery": item.contributors.daytime_recovery,
+        "contributors_stress": item.contributors.stress,
+        "document_id": UUID(item.id),
+        "content_hash": content_hash(item),
+    }
+
+
+class TableMapping(NamedTuple):
+    """データ種別ごとの保存先テーブルと行変換関数"""
+
+    model: type[Base]
+    to_row: Callable[[UUID, Any], dict[str, Any]]
+
+
+# データ種別 → 保存先テーブル（fetcherのparsed_dataのキーと対応）
+TABLE_MAPPINGS: dict[str, TableMapping] = {
+    "sleep": TableMapping(DailySleepSummary, sleep_to_row),
+    "activity": TableMapping(DailyActivitySummary, activity_to_row),
+    "readiness": TableMapping(DailyReadinessSummary, readiness_to_row),
+    "stress": TableMapping(DailyStressSummary, stress_to_row),
+    "resilience": TableMapping(DailyResilienceSummary, resilience_to_row),
+}
+
+# 保存先テーブル → データ種別
+DATA_TYPES: dict[type[Base], str] = {
+    mapping.model: data_type for data_type, mapping in TABLE_MAPPINGS.items()
+}
+
+
+# コミット後に無効化する (キャッシュ, ユーザー, データ種別, 日) を溜めるセッションの info のキー
+_PENDING_INVALIDATIONS = "healthhub_read_cache_invalidations"
+
+
+def _flush_invalidations(session: Session) -> None:
+    """after_commit: 溜めた日を含むキャッシュを無効化"""
+    pending = session.info.get(_PENDING_INVALIDATIONS, [])
+    for cache, user_id, data_type, days in pending:
+        cache.invalidate(user_id, data_type, days)
+    pending.clear()
+
+
+def _discard_invalidations(session: Session) -> None:
+    """after_rollback: 書き込まれなかった日は無効化しない"""
+    session.info.get(_PENDING_INVALIDATIONS, []).clear()
+
+
+class DayRecords(NamedTuple):
+    """複数テーブルを日付で結合した1日分の行"""
+
+    day: date
+    records: dict[str, Any]  # データ種別 → ORMモデル（その日の行がないテーブルは含まない）
+
+
+class ActivitySeries(NamedTuple):
+    """期間の日内時系列（1行 = 1日）"""
+
+    days: list[date]
+    met: np.ndarray  # float32 (日数, 分)、欠損はNaN
+    class_5_min: np.ndarray  # uint8 (日数, 5分スロット)、欠損は0（non wear）
+
 
 class HealthDataRepository:
     """ヘルスデータのリポジトリクラス"""
 
-    def __init__(self, session: AsyncSession, user_id: UUID):
+    def __init__(
+        self,
+        session: AsyncSession,
+        user_id: UUID,
+        batch_size: int = DEFAULT_UPSERT_BATCH_SIZE,
+        cache: ReadCache | None = None,
+    ):
         """
         Args:
             session: データベースセッション
             user_id: ユーザーID
+            batch_size: 1回のINSERT文で送信する最大行数
+            cache: 読み出しキャッシュ（Database.read_cache、None: 使わない）
         """
+        if batch_size < 1:
+            msg = f"batch_size must be positive: {batch_size}"
+            raise ValueError(msg)
         self.session = session
         self.user_id = user_id
+        self.batch_size = batch_size
+        self.cache = cache
 
-    async def upsert_sleep_data(self, sleep_data: list[DailySleep]) -> int:
+    async def _bulk_upsert(self, model: type[Base], rows: list[dict[str, Any]]) -> UpsertResult:
+        """
+        複数行INSERT ... ON CONFLICT (user_id, day) DO UPDATE をチャンク単位で実行
+
+        executemany + RETURNING にすることで、SQLAlchemyのinsertmanyvalues機能が
+        batch_size行ごとの `VALUES (...), (...)` に展開する（コンパイル結果もキャッシュされる）。
+        同一ステートメント内で同じ (user_id, day) が2回現れるとPostgreSQLがエラーに
+        するため、同じ日のレコードは後勝ちで1行にまとめてから送信する。
+
+        content_hash が変わっていない行はDO UPDATEのWHEREで除外し、WALやbloatを出さない。
+        RETURNINGはINSERT/UPDATEされた行だけを返し、`xmax = 0` ならINSERTである。
+        返った日を含む期間のロールアップ（rollups.py）も同じトランザクションで集計し直し、
+        読み出しキャッシュからはその日を含む範囲を捨てる。
+
+        Args:
+            model: 保存先のORMモデル
+            rows: 保存する行のリスト
+
+        Returns:
+            UpsertResult: 挿入・更新・変更なしの件数
+        """
+        unique_rows = list({(row["user_id"], row["day"]): row for row in rows}.values())
+        columns = unique_rows[0].keys()
+        table = model.__table__
+
+        stmt = insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(CONFLICT_KEYS),
+            set_={k: stmt.excluded[k] for k in columns if k not in IMMUTABLE_COLUMNS},
+            where=table.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+        ).returning((literal_column("xmax") == literal_column("0")).label("inserted"), table.c.day)
+
+        conn = await self.session.connection()
+        result = await conn.execute(
+            stmt,
+            unique_rows,
+            execution_options={"insertmanyvalues_page_size": self.batch_size},
+        )
+        written = result.all()
+
+        # 書き込まれた日を含む週・月のロールアップを同じトランザクションで更新
+        if written and model in ROLLUP_METRICS:
+            raw_conn = await conn.get_raw_connection()
+            await refresh_rollups(
+                raw_conn.driver_connection, model, self.user_id, (row.day for row in written)
+            )
+
+        if written and self.cache is not None:
+            self._invalidate(DATA_TYPES[model], [row.day for row in written])
+
+        inserted = sum(row.inserted for row in written)
+        updated = len(written) - inserted
+        counts = UpsertResult(inserted, updated, len(unique_rows) - inserted - updated)
+        observe_upsert(table.name, *counts)
+        return counts
+
+    def _invalidate(self, data_type: str, days: list[date]) -> None:
+        """
+        書き込んだ日を含む読み出しキャッシュを無効化（書き込み時とコミット後の2回）
+
+        コミットまでの間に別の読み出しがコミット前の行をキャッシュし直すことがあるため、
+        コミット後にもう一度捨てる。日はセッションの info に溜め、コミット・ロールバックの
+        リスナーはセッションごとに1回だけ登録する（ロールバックされた分は捨てる）。
+        """
+        cache = self.cache
+        if cache is None:
+            return
+        cache.invalidate(self.user_id, data_type, days)
+
+        session = self.session.sync_session
+        pending = session.info.get(_PENDING_INVALIDATIONS)
+        if pending is None:
+            pending = session.info[_PENDING_INVALIDATIONS] = []
+            event.listen(session, "after_commit", _flush_invalidations)
+            event.listen(session, "after_rollback", _discard_invalidations)
+        pending.append((cache, self.user_id, data_type, days))
+
+    async def upsert_sleep_data(self, sleep_data: list[DailySleep]) -> UpsertResult:
         """
         睡眠データをupsert（存在すれば更新、なければ挿入）
 
@@ -50,52 +348,18 @@ class HealthDataRepository:
             sleep_data: 睡眠データのリスト
 
         Returns:
-            int: 保存したレコード数
+            UpsertResult: 挿入・更新・変更なしの件数
         """
         if not sleep_data:
-            return 0
-
-        saved_count = 0
-        for item in sleep_data:
-            values = {
-                "user_id": self.user_id,
-                "day": item.day,
-                "score": item.score,
-                "contributors_deep_sleep": item.contributors.deep_sleep,
-                "contributors_efficiency": item.contributors.efficiency,
-                "contributors_latency": item.contributors.latency,
-                "contributors_rem_sleep": item.contributors.rem_sleep,
-                "contributors_restfulness": item.contributors.restfulness,
-                "contributors_timing": item.contributors.timing,
-                "contributors_total_sleep": item.contributors.total_sleep,
-                "source_timestamp": item.timestamp,
-                "document_id": UUID(item.id),
-            }
-
-            stmt = insert(DailySleepSummary).values(**values)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["user_id", "day"],
-                set_={
-                    "score": stmt.excluded.score,
-                    "contributors_deep_sleep": stmt.excluded.contributors_deep_sleep,
-                    "contributors_efficiency": stmt.excluded.contributors_efficiency,
-                    "contributors_latency": stmt.excluded.contributors_latency,
-                    "contributors_rem_sleep": stmt.excluded.contributors_rem_sleep,
-                    "contributors_restfulness": stmt.excluded.contributors_restfulness,
-                    "contributors_timing": stmt.excluded.contributors_timing,
-                    "contributors_total_sleep": stmt.excluded.contributors_total_sleep,
-                    "source_timestamp": stmt.excluded.source_timestamp,
-                    "document_id": stmt.excluded.document_id,
-                },
-            )
+            return UpsertResult()
 
-            await self.session.execute(stmt)
-            saved_count += 1
+        rows = [sleep_to_row(self.user_id, item) for item in sleep_data]
+        counts = await self._bulk_upsert(DailySleepSummary, rows)
 
-        logger.info("sleep_data_upserted", count=saved_count)
-        return saved_count
+        logger.info("sleep_data_upserted", **counts._asdict())
+        return counts
 
-    async def upsert_activity_data(self, activity_data: list[DailyActivity]) -> int:
+    async def upsert_activity_data(self, activity_data: list[DailyActivity]) -> UpsertResult:
         """
         活動データをupsert
 
@@ -103,58 +367,18 @@ class HealthDataRepository:
             activity_data: 活動データのリスト
 
         Returns:
-            int: 保存したレコード数
+            UpsertResult: 挿入・更新・変更なしの件数
         """
         if not activity_data:
-            return 0
-
-        saved_count = 0
-        for item in activity_data:
-            values = {
-                "user_id": self.user_id,
-                "day": item.day,
-                "score": item.score,
-                "steps": item.steps,
-                "active_calories": item.active_calories,
-                "total_calories": item.total_calories,
-                "target_calories": item.target_calories,
-                "equivalent_walking_distance": item.equivalent_walking_distance,
-                "high_activity_time": item.high_activity_time,
-                "medium_activity_time": item.medium_activity_time,
-                "low_activity_time": item.low_activity_time,
-                "sedentary_time": item.sedentary_time,
-                "resting_time": item.resting_time,
-                "non_wear_time": item.non_wear_time,
-                "inactivity_alerts": item.inactivity_alerts,
-                "contributors_meet_daily_targets": item.contributors.meet_daily_targets,
-                "contributors_move_every_hour": item.contributors.move_every_hour,
-                "contributors_recovery_time": item.contributors.recovery_time,
-                "contributors_stay_active": item.contributors.stay_active,
-                "contributors_training_frequency": item.contributors.training_frequency,
-                "contributors_training_volume": item.contributors.training_volume,
-                "source_timestamp": item.timestamp,
-                "document_id": UUID(item.id),
-            }
-
-            stmt = insert(DailyActivitySummary).values(**values)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["user_id", "day"],
-                set_={
-                    k: getattr(stmt.excluded, k)
-                    for k in values.keys()
-                    if k not in ["user_id", "day", "created_at"]
-                },
-            )
+            return UpsertResult()
 
-            await self.session.execute(stmt)
-            saved_count += 1
+        rows = [activity_to_row(self.user_id, item) for item in activity_data]
+        counts = await self._bulk_upsert(DailyActivitySummary, rows)
 
-        logger.info("activity_data_upserted", count=saved_count)
-        return saved_count
+        logger.info("activity_data_upserted", **counts._asdict())
+        return counts
 
-    async def upsert_readiness_data(
-        self, readiness_data: list[DailyReadiness]
-    ) -> int:
+    async def upsert_readiness_data(self, readiness_data: list[DailyReadiness]) -> UpsertResult:
         """
         レディネスデータをupsert
 
@@ -162,48 +386,18 @@ class HealthDataRepository:
             readiness_data: レディネスデータのリスト
 
         Returns:
-            int: 保存したレコード数
+            UpsertResult: 挿入・更新・変更なしの件数
         """
         if not readiness_data:
-            return 0
-
-        saved_count = 0
-        for item in readiness_data:
-            values = {
-                "user_id": self.user_id,
-                "day": item.day,
-                "score": item.score,
-                "temperature_deviation": item.temperature_deviation,
-                "temperature_trend_deviation": item.temperature_trend_deviation,
-                "contributors_activity_balance": item.contributors.activity_balance,
-                "contributors_body_temperature": item.contributors.body_temperature,
-                "contributors_previous_day_activity": item.contributors.previous_day_activity,
-                "contributors_previous_night": item.contributors.previous_night,
-                "contributors_recovery_index": item.contributors.recovery_index,
-                "contributors_resting_heart_rate": item.contributors.resting_heart_rate,
-                "contributors_sleep_balance": item.contributors.sleep_balance,
-                "contributors_hrv_balance": item.contributors.hrv_balance,
-                "source_timestamp": item.timestamp,
-                "document_id": UUID(item.id),
-            }
-
-            stmt = insert(DailyReadinessSummary).values(**values)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["user_id", "day"],
-                set_={
-                    k: getattr(stmt.excluded, k)
-                    for k in values.keys()
-                    if k not in ["user_id", "day", "created_at"]
-                },
-            )
+            return UpsertResult()
 
-            await self.session.execute(stmt)
-            saved_count += 1
+        rows = [readiness_to_row(self.user_id, item) for item in readiness_data]
+        counts = await self._bulk_upsert(DailyReadinessSummary, rows)
 
-        logger.info("readiness_data_upserted", count=saved_count)
-        return saved_count
+        logger.info("readiness_data_upserted", **counts._asdict())
+        return counts
 
-    async def upsert_stress_data(self, stress_data: list[DailyStress]) -> int:
+    async def upsert_stress_data(self, stress_data: list[DailyStress]) -> UpsertResult:
         """
         ストレスデータをupsert
 
@@ -211,41 +405,18 @@ class HealthDataRepository:
             stress_data: ストレスデータのリスト
 
         Returns:
-            int: 保存したレコード数
+            UpsertResult: 挿入・更新・変更なしの件数
         """
         if not stress_data:
-            return 0
-
-        saved_count = 0
-        for item in stress_data:
-            values = {
-                "user_id": self.user_id,
-                "day": item.day,
-                "day_summary": item.day_summary,
-                "stress_high": item.stress_high,
-                "recovery_high": item.recovery_high,
-                "document_id": UUID(item.id),
-            }
-
-            stmt = insert(DailyStressSummary).values(**values)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["user_id", "day"],
-                set_={
-                    k: getattr(stmt.excluded, k)
-                    for k in values.keys()
-                    if k not in ["user_id", "day", "created_at"]
-                },
-            )
+            return UpsertResult()
 
-            await self.session.execute(stmt)
-            saved_count += 1
+        rows = [stress_to_row(self.user_id, item) for item in stress_data]
+        counts = await self._bulk_upsert(DailyStressSummary, rows)
 
-        logger.info("stress_data_upserted", count=saved_count)
-        return saved_count
+        logger.info("stress_data_upserted", **counts._asdict())
+        return counts
 
-    async def upsert_resilience_data(
-        self, resilience_data: list[DailyResilience]
-    ) -> int:
+    async def upsert_resilience_data(self, resilience_data: list[DailyResilience]) -> UpsertResult:
         """
         レジリエンスデータをupsert
 
@@ -253,35 +424,297 @@ class HealthDataRepository:
             resilience_data: レジリエンスデータのリスト
 
         Returns:
-            int: 保存したレコード数
+            UpsertResult: 挿入・更新・変更なしの件数
         """
         if not resilience_data:
-            return 0
-
-        saved_count = 0
-        for item in resilience_data:
-            values = {
-                "user_id": self.user_id,
-                "day": item.day,
-                "level": item.level,
-                "contributors_sleep_recovery": item.contributors.sleep_recovery,
-                "contributors_daytime_recovery": item.contributors.daytime_recovery,
-                "contributors_stress": item.contributors.stress,
-                "document_id": UUID(item.id),
-            }
-
-            stmt = insert(DailyResilienceSummary).values(**values)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=["user_id", "day"],
-                set_={
-                    k: getattr(stmt.excluded, k)
-                    for k in values.keys()
-                    if k not in ["user_id", "day", "created_at"]
-                },
-            )
+            return UpsertResult()
+
+        rows = [resilience_to_row(self.user_id, item) for item in resilience_data]
+        counts = await self._bulk_upsert(DailyResilienceSummary, rows)
+
+        logger.info("resilience_data_upserted", **counts._asdict())
+        return counts
+
+    async def upsert(self, data_type: str, items: list[Any]) -> UpsertResult:
+        """
+        データ種別を指定してupsert
+
+        Args:
+            data_type: データ種別（TABLE_MAPPINGS のキー）
+            items: Pydanticモデルのリスト
+
+        Returns:
+            UpsertResult: 挿入・更新・変更なしの件数
+        """
+        upsert_methods = {
+            "sleep": self.upsert_sleep_data,
+            "activity": self.upsert_activity_data,
+            "readiness": self.upsert_readiness_data,
+            "stress": self.upsert_stress_data,
+            "resilience": self.upsert_resilience_data,
+        }
+        return await upsert_methods[data_type](items)
+
+    async def upsert_rows(self, data_type: str, rows: list[dict[str, Any]]) -> UpsertResult:
+        """
+        行変換済み（TABLE_MAPPINGS の to_row 適用済み）の行をupsert
+
+        Args:
+            data_type: データ種別（TABLE_MAPPINGS のキー）
+            rows: 保存する行のリスト
+
+        Returns:
+            UpsertResult: 挿入・更新・変更なしの件数
+        """
+        if not rows:
+            return UpsertResult()
+        return await self._bulk_upsert(TABLE_MAPPINGS[data_type].model, rows)
+
+    def _range_query(
+        self, data_type: str, start_day: date, end_day: date
+    ) -> tuple[type[Any], Select[Any]]:
+        """ユーザー・期間で絞り、day順に並べたクエリ（主キー (user_id, day) のインデックスで読む）"""
+        model = TABLE_MAPPINGS[data_type].model
+        stmt = (
+            select(model)
+            .where(model.user_id == self.user_id, model.day.between(start_day, end_day))
+            .order_by(model.day)
+        )
+        return model, stmt
+
+    async def iter_records(
+        self,
+        data_type: str,
+        start_day: date,
+        end_day: date,
+        page_size: int = DEFAULT_READ_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        期間の行をday順に1件ずつ返す（キーセットページング）
+
+        ``page_size`` 行ずつ「前のページの最後の日より後」を主キーのインデックスで読むので、
+        OFFSET のように読み飛ばす行は発生せず、メモリに載るのは1ページ分だけになる。
+        ページごとに独立した短いクエリなので、トランザクションモードのプーラー経由でも使える。
+
+        Args:
+            data_type: データ種別（TABLE_MAPPINGS のキー）
+            start_day: 開始日
+            end_day: 終了日（含む）
+            page_size: 1回のクエリで取得する行数
+
+        Yields:
+            ORMモデル（DailySleepSummary など）
+        """
+        model, stmt = self._range_query(data_type, start_day, end_day)
+        last_day: date | None = None
+        while True:
+            page_stmt = stmt if last_day is None else stmt.where(model.day > last_day)
+            page = (await self.session.scalars(page_stmt.limit(page_size))).all()
+            # セッションから外して identity map に溜めない（属性は読み込み済みなのでそのまま使える）
+            for record in page:
+                self.session.expunge(record)
+                yield record
+            if len(page) < page_size:
+                return
+            last_day = page[-1].day
+
+    async def get_records(self, data_type: str, start_day: date, end_day: date) -> list[Any]:
+        """
+        期間の行をday順のリストで返す（読み出しキャッシュがあれば経由する）
+
+        「直近7日・30日」のような同じ範囲の繰り返しの読み出し用。キャッシュした行は
+        呼び出し元の間で共有されるので、変更しないこと。
+
+        Args:
+            data_type: データ種別（TABLE_MAPPINGS のキー）
+            start_day: 開始日
+            end_day: 終了日（含む）
 
-            await self.session.execute(stmt)
-            saved_count += 1
+        Returns:
+            ORMモデルのリスト（セッションから切り離し済み）
+        """
+        if self.cache is None:
+            return [record async for record in self.iter_records(data_type, start_day, end_day)]
+
+        records = self.cache.get(self.user_id, data_type, start_day, end_day)
+        if records is None:
+            generation = self.cache.generation(self.user_id, data_type)
+            records = [r async for r in self.iter_records(data_type, start_day, end_day)]
+            self.cache.put(self.user_id, data_type, start_day, end_day, records, generation)
+        return records
+
+    async def stream_records(
+        self,
+        data_type: str,
+        start_day: date,
+        end_day: date,
+        page_size: int = DEFAULT_READ_PAGE_SIZE,
+    ) -> AsyncIterator[Any]:
+        """
+        期間の行をday順に1件ずつ返す（サーバーサイドカーソル）
+
+        1本のクエリを ``page_size`` 行ずつフェッチする。iter_records よりクエリ数が少ないが、
+        読み終えるまでトランザクションとコネクションを占有する。
+
+        Args:
+            data_type: データ種別（TABLE_MAPPINGS のキー）
+            start_day: 開始日
+            end_day: 終了日（含む）
+            page_size: 1回にフェッチする行数
+
+        Yields:
+            ORMモデル（DailySleepSummary など）
+        """
+        _, stmt = self._range_query(data_type, start_day, end_day)
+        result = await self.session.stream_scalars(stmt.execution_options(yield_per=page_size))
+        async for partition in result.partitions():
+            for record in partition:
+                self.session.expunge(record)
+                yield record
+
+    async def iter_days(
+        self,
+        data_types: Sequence[str],
+        start_day: date,
+        end_day: date,
+        page_size: int = DEFAULT_READ_PAGE_SIZE,
+    ) -> AsyncIterator[DayRecords]:
+        """
+        複数テーブルの行を日付で結合し、1日ずつ返す（テーブルごとのキーセットページングをマージ）
+
+        各テーブルをそれぞれのインデックスでday順に読み、先頭の行を突き合わせる
+        （FULL OUTER JOIN 相当）。メモリに載るのはテーブル数 × 1ページ分だけ。
+
+        Args:
+            data_types: データ種別（TABLE_MAPPINGS のキー）
+            start_day: 開始日
+            end_day: 終了日（含む）
+            page_size: テーブルごとに1回のクエリで取得する行数
+
+        Yields:
+            DayRecords: いずれかのテーブルに行がある日だけ（day順）
+        """
+        iterators = {
+            data_type: self.iter_records(data_type, start_day, end_day, page_size)
+            for data_type in data_types
+        }
+        heads: dict[str, Any] = {}
+        for data_type, iterator in iterators.items():
+            if (record := await anext(iterator, None)) is not None:
+                heads[data_type] = record
+
+        while heads:
+            day = min(record.day for record in heads.values())
+            records = {}
+            for data_type in [t for t, record in heads.items() if record.day == day]:
+                records[data_type] = heads.pop(data_type)
+                if (record := await anext(iterators[data_type], None)) is not None:
+                    heads[data_type] = record
+            yield DayRecords(day, records)
+
+    async def get_activity_series(self, start_day: date, end_day: date) -> ActivitySeries:
+        """
+        期間の日内時系列（MET・class_5_min）を日数 × サンプル数の配列で取得
+
+        Args:
+            start_day: 開始日
+            end_day: 終了日（含む）
+
+        Returns:
+            ActivitySeries: 日付と、日付順に並んだ配列
+        """
+        table = DailyActivitySummary
+        result = await self.session.execute(
+            select(table.day, table.met_items, table.class_5_min)
+            .where(table.user_id == self.user_id, table.day.between(start_day, end_day))
+            .order_by(table.day)
+        )
+        rows = result.all()
+        return ActivitySeries(
+            days=[row.day for row in rows],
+            met=decode_met_matrix([row.met_items for row in rows]),
+            class_5_min=decode_class_5_min_matrix([row.class_5_min for row in rows]),
+        )
+
+
+class UserRepository:
+    """バッチ対象ユーザーのリポジトリクラス"""
+
+    def __init__(self, session: AsyncSession):
+        """
+        Args:
+            session: データベースセッション
+        """
+        self.session = session
 
-        logger.info("resilience_data_upserted", count=saved_count)
-        return saved_count
+    async def list_active_users(self) -> list[User]:
+        """
+        有効なユーザーを取得
+
+        Returns:
+            list[User]: is_active のユーザー（user_id順）
+        """
+        result = await self.session.scalars(
+            select(User).where(User.is_active.is_(True)).order_by(User.user_id)
+        )
+        return list(result)
+
+
+class SyncStateRepository:
+    """増分同期ウォーターマークのリポジトリクラス"""
+
+    def __init__(self, session: AsyncSession, user_id: UUID):
+        """
+        Args:
+            session: データベースセッション
+            user_id: ユーザーID
+        """
+        self.session = session
+        self.user_id = user_id
+
+    async def get_states(self) -> dict[str, SyncState]:
+        """
+        ユーザーのウォーターマークを取得
+
+        Returns:
+            dict[str, SyncState]: エンドポイント → ウォーターマーク
+        """
+        result = await self.session.scalars(
+            select(SyncState).where(SyncState.user_id == self.user_id)
+        )
+        return {state.endpoint: state for state in result}
+
+    async def advance(
+        self,
+        endpoint: str,
+        last_synced_day: date,
+        max_source_timestamp: datetime | None,
+    ) -> None:
+        """
+        ウォーターマークを進める（既存値より古い値では戻さない）
+
+        Args:
+            endpoint: エンドポイント名（"daily_sleep" など）
+            last_synced_day: 保存に成功した最新の日
+            max_source_timestamp: 保存したレコードの最大 source_timestamp
+        """
+        stmt = insert(SyncState).values(
+            user_id=self.user_id,
+            endpoint=endpoint,
+            last_synced_day=last_synced_day,
+            max_source_timestamp=max_source_timestamp,
+        )
+        # GREATEST はNULLを無視するので、タイムスタンプのないエンドポイントでも既存値を保つ
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "endpoint"],
+            set_={
+                "last_synced_day": func.greatest(
+                    SyncState.last_synced_day, stmt.excluded.last_synced_day
+                ),
+                "max_source_timestamp": func.greatest(
+                    SyncState.max_source_timestamp, stmt.excluded.max_source_timestamp
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        await self.session.execute(stmt)
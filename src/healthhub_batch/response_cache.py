@@ -0,0 +1,163 @@
+# src/healthhub_batch/response_cache.py
+# Oura APIレスポンスのローカルディスクキャッシュ（オプトイン）
+# (エンドポイント, パラメータ, トークンエイリアス) をキーに、TTLとサイズ上限（古いものから削除）で管理する
+# RELEVANT FILES: oura_client.py, config.py
+
+"""Opt-in on-disk cache for Oura API responses."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable
+from datetime import date, timedelta
+from pathlib import Path
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# この日数より前に終わる期間は「確定済み」とみなす（Ouraは直近数日を後から更新する）
+CLOSED_AFTER_DAYS = 3
+
+
+class ResponseCache:
+    """Directory of cached response bodies, one file per request.
+
+    Each file holds the expiry time (Unix seconds) on its first line and the
+    raw response body after it. Hits refresh the file's mtime, so size-based
+    eviction removes the least recently used entries first.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        ttl: float = 900.0,
+        closed_ttl: float = 30 * 86400.0,
+        max_bytes: int = 256 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            directory: Cache directory (created if missing)
+            ttl: Seconds to keep responses whose range includes recent days
+            closed_ttl: Seconds to keep responses for closed past ranges
+            max_bytes: Total size above which the oldest entries are evicted
+            clock: Wall clock (injectable for tests)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.closed_ttl = closed_ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._size: int | None = None
+
+    @staticmethod
+    def key(endpoint: str, params: dict[str, str], token_alias: str) -> str:
+        """Build the cache key for one request.
+
+        Args:
+            endpoint: API endpoint path (e.g., "daily_sleep")
+            params: Query parameters (including ``next_token`` for later pages)
+            token_alias: Alias of the token (never the token itself)
+
+        Returns:
+            Hex digest used as the file name
+        """
+        raw = json.dumps([endpoint, sorted(params.items()), token_alias])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def ttl_for(self, params: dict[str, str], today: date | None = None) -> float:
+        """Return the TTL for a request, longer when its range is closed.
+
+        Args:
+            params: Query parameters (``end_date`` or ``end_datetime`` decides whether
+                the range is closed)
+            today: Current date (default: today)
+
+        Returns:
+            TTL in seconds
+        """
+        end_date = params.get("end_date") or params.get("end_datetime", "")[:10]
+        if not end_date:
+            return self.ttl
+        today = today or date.today()
+        if date.fromisoformat(end_date) < today - timedelta(days=CLOSED_AFTER_DAYS):
+            return self.closed_ttl
+        return self.ttl
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.cache"
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached body, or None if missing or expired.
+
+        Args:
+            key: Key from ``key()``
+
+        Returns:
+            Raw response body
+        """
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                expires_at = float(f.readline())
+                body = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if expires_at <= self._clock():
+            self._remove(path)
+            return None
+
+        # LRU順に削除できるようにヒット時にmtimeを更新する
+        os.utime(path)
+        return body
+
+    def put(self, key: str, body: bytes, ttl: float) -> None:
+        """Store a response body.
+
+        Args:
+            key: Key from ``key()``
+            body: Raw response body
+            ttl: Seconds until the entry expires
+        """
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        size_before = self._current_size() - (path.stat().st_size if path.exists() else 0)
+
+        # 一時ファイルに書いてから置き換え、読み手が書きかけの内容を見ないようにする
+        tmp_path.write_bytes(f"{self._clock() + ttl}\n".encode() + body)
+        os.replace(tmp_path, path)
+
+        self._size = size_before + path.stat().st_size
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self.directory.glob("*.cache"))
+        return self._size
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def _evict(self) -> None:
+        """古い（最後に使われたのが前の）エントリから上限以下になるまで削除"""
+        entries = sorted(self.directory.glob("*.cache"), key=lambda p: p.stat().st_mtime)
+        evicted = 0
+        for path in entries:
+            if self._current_size() <= self.max_bytes:
+                break
+            self._remove(path)
+            evicted += 1
+        logger.info("oura_cache_evicted", entries=evicted, size_bytes=self._size)
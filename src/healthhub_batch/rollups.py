@@ -0,0 +1,168 @@
+# src/healthhub_batch/rollups.py
+# 週次（ISO週）・月次ロールアップテーブルの差分更新と再構築
+# upsertで実際に挿入・更新された日を含む期間だけを、同じトランザクション内で日次テーブルから集計し直す
+# RELEVANT FILES: db_models.py, repository.py, copy_loader.py, cli.py
+
+"""Weekly and monthly rollups of the daily summary metrics."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import date, timedelta
+from functools import cache
+from typing import Literal
+from uuid import UUID
+
+import structlog
+from asyncpg import Connection
+
+from healthhub_batch.database import Database
+from healthhub_batch.db_models import (
+    Base,
+    DailyActivitySummary,
+    DailyReadinessSummary,
+    DailySleepSummary,
+    DailyStressSummary,
+    MonthlyRollup,
+    WeeklyRollup,
+)
+
+logger = structlog.get_logger(__name__)
+
+Period = Literal["week", "month"]
+
+# 日次テーブル → {指標名: カラム}
+ROLLUP_METRICS: dict[type[Base], dict[str, str]] = {
+    DailySleepSummary: {"sleep_score": "score"},
+    DailyReadinessSummary: {"readiness_score": "score"},
+    DailyActivitySummary: {"steps": "steps"},
+    DailyStressSummary: {"stress_high": "stress_high"},
+}
+
+# 期間 → ロールアップテーブル
+ROLLUP_TABLES: dict[Period, type[Base]] = {"week": WeeklyRollup, "month": MonthlyRollup}
+
+
+def period_start(day: date, period: Period) -> date:
+    """Return the first day of the ISO week (Monday) or month containing ``day``."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(start: date, period: Period) -> date:
+    """Return the first day after the period starting at ``start``."""
+    if period == "week":
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def touched_periods(days: Iterable[date], period: Period) -> list[date]:
+    """Return the sorted starts of the periods containing ``days``."""
+    return sorted({period_start(day, period) for day in days})
+
+
+@cache
+def _rollup_sql(model: type[Base], period: Period, where: str) -> str:
+    """日次テーブルを期間 × 指標で集計し、ロールアップテーブルへ upsert するSQL
+
+    指標ごとの値は LATERAL VALUES で縦持ちにしてから集計するので、テーブルを読むのは1回だけ。
+    集計結果が変わらない行は書き込まない。
+    """
+    source = model.__table__.fullname  # type: ignore[attr-defined]
+    target = ROLLUP_TABLES[period].__table__.fullname  # type: ignore[attr-defined]
+    metrics = ", ".join(
+        f"('{metric}', t.{column}::float8)" for metric, column in ROLLUP_METRICS[model].items()
+    )
+    bucket = f"date_trunc('{period}', t.day::timestamp)::date"
+    return (
+        f"INSERT INTO {target} AS r "
+        "(user_id, period_start, metric, sample_count, sum, min, max, mean) "
+        f"SELECT t.user_id, {bucket}, m.metric, "
+        "count(m.value), sum(m.value), min(m.value), max(m.value), avg(m.value) "
+        f"FROM {source} AS t CROSS JOIN LATERAL (VALUES {metrics}) AS m (metric, value) "
+        f"WHERE {where.format(bucket=bucket)} "
+        f"GROUP BY t.user_id, {bucket}, m.metric "
+        "ON CONFLICT (user_id, period_start, metric) DO UPDATE SET "
+        "sample_count = EXCLUDED.sample_count, sum = EXCLUDED.sum, min = EXCLUDED.min, "
+        "max = EXCLUDED.max, mean = EXCLUDED.mean, updated_at = now() "
+        "WHERE (r.sample_count, r.sum, r.min, r.max) "
+        "IS DISTINCT FROM (EXCLUDED.sample_count, EXCLUDED.sum, EXCLUDED.min, EXCLUDED.max)"
+    )
+
+
+# 差分更新: 主キー (user_id, day) の範囲で読み、触れた期間だけに絞る
+_REFRESH_WHERE = (
+    "t.user_id = $1 AND t.day >= $2 AND t.day < $3 AND {bucket} = ANY($4::date[])"
+)
+
+
+async def refresh_rollups(
+    pg_conn: Connection, model: type[Base], user_id: UUID, days: Iterable[date]
+) -> int:
+    """
+    変更された日を含む期間のロールアップを集計し直す（呼び出し側のトランザクション内で実行）
+
+    期間内の他の日も日次テーブルから読み直すので、結果は全件再集計と同じになる。
+
+    Args:
+        pg_conn: asyncpgコネクション（日次テーブルへの書き込みと同じトランザクション）
+        model: 書き込んだ日次テーブル（ROLLUP_METRICS にないテーブルは何もしない）
+        user_id: ユーザーID
+        days: 挿入・更新された日
+
+    Returns:
+        集計し直した期間の数（週と月の合計）
+    """
+    days = set(days)
+    if model not in ROLLUP_METRICS or not days:
+        return 0
+
+    refreshed = 0
+    for period in ROLLUP_TABLES:
+        starts = touched_periods(days, period)
+        await pg_conn.execute(
+            _rollup_sql(model, period, _REFRESH_WHERE),
+            user_id,
+            starts[0],
+            period_end(starts[-1], period),
+            starts,
+        )
+        refreshed += len(starts)
+    return refreshed
+
+
+async def rebuild_rollups(db: Database, user_id: UUID | None = None) -> dict[str, int]:
+    """
+    ロールアップテーブルを日次テーブルから作り直す（初回投入・定義変更時用）
+
+    対象ユーザーの既存行を削除してから全期間を集計し、1トランザクションでコミットする。
+
+    Args:
+        db: データベースインスタンス
+        user_id: 対象ユーザー（None: 全ユーザー）
+
+    Returns:
+        ロールアップテーブル名 → 書き込んだ行数
+    """
+    where = "t.user_id = $1" if user_id is not None else "TRUE"
+    args = (user_id,) if user_id is not None else ()
+    counts: dict[str, int] = {}
+
+    async with db.engine.connect() as conn:
+        raw_conn = await conn.get_raw_connection()
+        pg_conn: Connection = raw_conn.driver_connection
+
+        async with pg_conn.transaction():
+            for period, rollup in ROLLUP_TABLES.items():
+                target = rollup.__table__.fullname  # type: ignore[attr-defined]
+                if user_id is not None:
+                    await pg_conn.execute(f"DELETE FROM {target} WHERE user_id = $1", user_id)
+                else:
+                    await pg_conn.execute(f"DELETE FROM {target}")
+                counts[target] = 0
+                for model in ROLLUP_METRICS:
+                    status = await pg_conn.execute(_rollup_sql(model, period, where), *args)
+                    counts[target] += int(status.rsplit(" ", 1)[-1])  # "INSERT 0 <行数>"
+
+    logger.info("rollups_rebuilt", user_id=str(user_id) if user_id else None, **counts)
+    return counts
@@ -0,0 +1,127 @@
+# src/healthhub_batch/series_codec.py
+# 日内時系列（METの1分値・class_5_minの5分区分）のbytea用エンコード/デコード
+# METはリトルエンディアンのfloat32配列（欠損はNaN）、class_5_minは1スロット1バイト（0-5）として保存し、NumPyで一括デコードする
+# RELEVANT FILES: repository.py, db_models.py, models.py
+
+"""Compact binary encoding of the intraday activity series."""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+
+# 保存形式（プラットフォームに依存しないようバイトオーダーを固定）
+MET_DTYPE = np.dtype("<f4")
+CLASS_5_MIN_DTYPE = np.dtype("u1")
+CLASS_5_MIN_MAX = 5  # 0: non wear, 1: rest, 2: inactive, 3: low, 4: medium, 5: high
+
+_ZERO = ord("0")
+
+
+def encode_met(items: Sequence[Optional[float]]) -> bytes:
+    """Pack MET samples as little-endian float32 (missing samples become NaN).
+
+    Args:
+        items: ``met.items`` of a daily activity document
+
+    Returns:
+        4 bytes per sample
+    """
+    return np.array(items, dtype=MET_DTYPE).tobytes()
+
+
+def decode_met(data: bytes) -> npt.NDArray[np.float32]:
+    """Unpack ``encode_met`` output without copying.
+
+    Args:
+        data: Stored bytes
+
+    Returns:
+        Read-only float32 array
+    """
+    return np.frombuffer(data, dtype=MET_DTYPE)
+
+
+def encode_class_5_min(value: str) -> bytes:
+    """Store each activity class digit as one byte holding 0-5.
+
+    Args:
+        value: ``class_5_min`` string such as ``"0011223"``
+
+    Returns:
+        One byte per 5-minute slot
+
+    Raises:
+        ValueError: If the string contains anything but the digits 0-5
+    """
+    try:
+        digits = np.frombuffer(value.encode("ascii"), dtype=CLASS_5_MIN_DTYPE)
+    except UnicodeEncodeError as e:
+        msg = f"class_5_min must contain only digits 0-{CLASS_5_MIN_MAX}"
+        raise ValueError(msg) from e
+    # '0'未満の文字は減算で折り返して255付近になるので、上限の比較だけで弾ける
+    classes = digits - CLASS_5_MIN_DTYPE.type(_ZERO)
+    if (classes > CLASS_5_MIN_MAX).any():
+        msg = f"class_5_min must contain only digits 0-{CLASS_5_MIN_MAX}"
+        raise ValueError(msg)
+    return classes.tobytes()
+
+
+def decode_class_5_min(data: bytes) -> npt.NDArray[np.uint8]:
+    """Unpack ``encode_class_5_min`` output without copying.
+
+    Args:
+        data: Stored bytes
+
+    Returns:
+        Read-only uint8 array of classes 0-5
+    """
+    return np.frombuffer(data, dtype=CLASS_5_MIN_DTYPE)
+
+
+def decode_met_matrix(rows: Sequence[Optional[bytes]]) -> npt.NDArray[np.float32]:
+    """Decode many days of MET samples into one ``(days, samples)`` array.
+
+    When every day has the same number of samples (the usual case), the rows
+    are joined and decoded in a single ``frombuffer`` call. Shorter or missing
+    days are padded with NaN.
+
+    Args:
+        rows: Stored ``met_items`` per day (None for days without MET)
+
+    Returns:
+        float32 array with one row per day
+    """
+    return _decode_matrix(rows, MET_DTYPE, np.nan)
+
+
+def decode_class_5_min_matrix(rows: Sequence[Optional[bytes]]) -> npt.NDArray[np.uint8]:
+    """Decode many days of ``class_5_min`` into one ``(days, slots)`` array.
+
+    Shorter or missing days are padded with 0 (non wear).
+
+    Args:
+        rows: Stored ``class_5_min`` per day (None for days without it)
+
+    Returns:
+        uint8 array with one row per day
+    """
+    return _decode_matrix(rows, CLASS_5_MIN_DTYPE, 0)
+
+
+def _decode_matrix(rows: Sequence[Optional[bytes]], dtype: np.dtype, fill: float) -> np.ndarray:
+    lengths = {len(row) if row is not None else -1 for row in rows}
+    if len(lengths) == 1 and -1 not in lengths:
+        # 全日同じ長さなら連結して1回でデコード（ビュー）
+        joined = b"".join(row for row in rows if row is not None)
+        return np.frombuffer(joined, dtype=dtype).reshape(len(rows), -1)
+
+    width = max((len(row) for row in rows if row is not None), default=0) // dtype.itemsize
+    matrix = np.full((len(rows), width), fill, dtype=dtype)
+    for i, row in enumerate(rows):
+        if row is not None:
+            values = np.frombuffer(row, dtype=dtype)
+            matrix[i, : len(values)] = values
+    return matrix
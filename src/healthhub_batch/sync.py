@@ -0,0 +1,259 @@
+# src/healthhub_batch/sync.py
+# ウォーターマークに基づく増分同期（ユーザー × エンドポイント単位）
+# healthhub.sync_state の最終同期日から改訂ウィンドウ分だけ遡って取得し、保存と同じトランザクションでウォーターマークを進める
+# RELEVANT FILES: repository.py, multi_user.py, fetcher.py, cli.py
+
+"""Watermark-based incremental sync."""
+from __future__ import annotations
+
+import asyncio
+from datetime import date, timedelta
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import httpx
+import structlog
+
+from healthhub_batch.config import Settings
+from healthhub_batch.database import Database
+from healthhub_batch.db_models import SyncState, User
+from healthhub_batch.fetcher import ENDPOINT_MODELS
+from healthhub_batch.multi_user import UserRunResult, local_today, run_for_active_users
+from healthhub_batch.oura_client import OuraClient
+from healthhub_batch.repository import (
+    HealthDataRepository,
+    SyncStateRepository,
+    UpsertResult,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+class SyncResult(NamedTuple):
+    """1ユーザー分の増分同期結果"""
+
+    ranges: dict[str, tuple[date, date]]  # エンドポイント → 取得した期間
+    save_counts: dict[str, UpsertResult]
+    errors: dict[str, str]  # 失敗したエンドポイント → エラー内容
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def plan_sync_range(
+    state: SyncState | None,
+    today: date,
+    revision_days: int,
+    initial_days: int,
+) -> tuple[date, date]:
+    """Return the range to fetch for one endpoint.
+
+    Oura keeps revising the last few days (late syncs from the ring, score
+    recalculation), so the range starts ``revision_days`` before the watermark
+    rather than the day after it.
+
+    Args:
+        state: Current watermark, or None if the endpoint was never synced
+        today: Today in the user's timezone
+        revision_days: Days before the watermark to re-fetch
+        initial_days: Days to fetch when there is no watermark
+
+    Returns:
+        (start, end) dates, inclusive
+    """
+    if state is None:
+        return today - timedelta(days=initial_days), today
+    start = state.last_synced_day - timedelta(days=revision_days)
+    return min(start, today), today
+
+
+def watermark_day(records: list[Any], rejected_days: list[str]) -> date | None:
+    """Return the day the watermark may advance to after saving ``records``.
+
+    Records rejected by validation are only fetched again while the watermark
+    stays below them, so it stops the day before the earliest rejected day.
+
+    Args:
+        records: Saved records (at least one)
+        rejected_days: ``day`` of every rejected record ("" if it had none)
+
+    Returns:
+        New watermark, or None if a rejected record has no usable day (the
+        watermark then stays where it is)
+    """
+    last_day = max(r.day for r in records)
+    if not rejected_days:
+        return last_day
+    try:
+        earliest = min(date.fromisoformat(day) for day in rejected_days)
+    except ValueError:
+        return None
+    return min(last_day, earliest - timedelta(days=1))
+
+
+async def _sync_endpoint(
+    client: OuraClient,
+    endpoint: str,
+    sync_range: tuple[date, date],
+    user_id: UUID,
+    settings: Settings,
+    db: Database,
+) -> UpsertResult:
+    """1エンドポイント分を取得し、データとウォーターマークを1トランザクションで保存"""
+    data_type, model = ENDPOINT_MODELS[endpoint]
+    start, end = sync_range
+
+    records: list[Any] = []
+    rejected_days: list[str] = []
+    async for page in client.iter_parsed_pages(
+        endpoint, start.isoformat(), end.isoformat(), model
+    ):
+        records.extend(page.records)
+        rejected_days.extend(page.rejected_days)
+
+    async with db.session() as session:
+        repo = HealthDataRepository(
+            session, user_id, batch_size=settings.upsert_batch_size, cache=db.read_cache
+        )
+        saved = await repo.upsert(data_type, records)
+
+        # データがない期間ではウォーターマークを進めない（次回も同じ日から取得する）
+        last_day = watermark_day(records, rejected_days) if records else None
+        if rejected_days:
+            logger.warning(
+                "sync_watermark_held",
+                endpoint=endpoint,
+                rejected_days=sorted(set(rejected_days)),
+                watermark=last_day.isoformat() if last_day else None,
+            )
+        if last_day is not None:
+            timestamps = [
+                r.timestamp for r in records if r.day <= last_day and getattr(r, "timestamp", None)
+            ]
+            await SyncStateRepository(session, user_id).advance(
+                endpoint, last_day, max(timestamps) if timestamps else None
+            )
+
+    logger.info(
+        "sync_endpoint_completed",
+        endpoint=endpoint,
+        start_date=start.isoformat(),
+        end_date=end.isoformat(),
+        rejected=len(rejected_days),
+        **saved._asdict(),
+    )
+    return saved
+
+
+async def sync_user(
+    client: OuraClient,
+    user_id: UUID,
+    today: date,
+    settings: Settings,
+    db: Database,
+) -> SyncResult:
+    """
+    オープン済みのクライアントで1ユーザー分を増分同期（DB接続は閉じない）
+
+    エンドポイントごとに取得期間・トランザクションが独立しているので、
+    失敗したエンドポイントのウォーターマークだけが据え置かれる。
+
+    Args:
+        client: オープン済みのOuraClient
+        user_id: ユーザーID
+        today: ユーザーのタイムゾーンでの当日
+        settings: アプリケーション設定
+        db: データベースインスタンス
+
+    Returns:
+        エンドポイントごとの取得期間・保存件数・エラー
+    """
+    async with db.session() as session:
+        states = await SyncStateRepository(session, user_id).get_states()
+
+    ranges = {
+        endpoint: plan_sync_range(
+            states.get(endpoint),
+            today,
+            settings.sync_revision_days,
+            settings.sync_initial_days,
+        )
+        for endpoint in ENDPOINT_MODELS
+    }
+
+    completed = await asyncio.gather(
+        *(
+            _sync_endpoint(client, endpoint, sync_range, user_id, settings, db)
+            for endpoint, sync_range in ranges.items()
+        ),
+        return_exceptions=True,
+    )
+
+    save_counts: dict[str, UpsertResult] = {}
+    errors: dict[str, str] = {}
+    for endpoint, result in zip(ranges, completed, strict=True):
+        if isinstance(result, Exception):
+            logger.error("sync_endpoint_failed", endpoint=endpoint, error=str(result))
+            errors[endpoint] = str(result)
+        else:
+            save_counts[ENDPOINT_MODELS[endpoint][0]] = result
+
+    return SyncResult(ranges, save_counts, errors)
+
+
+async def sync(settings: Settings, db: Database) -> SyncResult:
+    """
+    設定のユーザー（USER_ID）を増分同期（DB接続は閉じない）
+
+    Args:
+        settings: アプリケーション設定
+        db: データベースインスタンス
+
+    Returns:
+        同期結果
+    """
+    user_id = UUID(settings.user_id)
+    logger.info("sync_started", user_id=str(user_id))
+
+    async with OuraClient.from_settings(settings) as client:
+        result = await sync_user(client, user_id, local_today(settings.timezone), settings, db)
+
+    logger.info("sync_completed", save_counts=result.save_counts, errors=result.errors)
+    return result
+
+
+async def sync_all_users(
+    settings: Settings,
+    db: Database,
+    concurrency: int = 8,
+    http_client: httpx.AsyncClient | None = None,
+) -> list[UserRunResult]:
+    """
+    有効な全ユーザーを増分同期（DB接続は閉じない）
+
+    Args:
+        settings: アプリケーション設定
+        db: データベースインスタンス
+        concurrency: 同時に処理するユーザー数
+        http_client: 使い回すHTTPコネクションプール（省略時はこの実行の間だけ作成する）
+
+    Returns:
+        ユーザーごとの実行結果（期間は全エンドポイントを通した最小〜最大）
+    """
+
+    async def job(client: OuraClient, user: User) -> UserRunResult:
+        result = await sync_user(
+            client, user.user_id, local_today(user.timezone), settings, db
+        )
+        starts = [start for start, _ in result.ranges.values()]
+        ends = [end for _, end in result.ranges.values()]
+        return UserRunResult(
+            user.user_id,
+            min(starts).isoformat(),
+            max(ends).isoformat(),
+            result.save_counts,
+            result.errors,
+        )
+
+    return await run_for_active_users(settings, db, job, concurrency, http_client)
@@ -0,0 +1,96 @@
+"""Tests for robust z-scores, COPY decoding and anomaly records."""
+import struct
+from datetime import date, timedelta
+from uuid import UUID
+
+import numpy as np
+
+from healthhub_batch.analytics import (
+    ANOMALY_METRICS,
+    MAD_SCALE,
+    MEAN_AD_SCALE,
+    anomaly_records,
+    decode_copy_rows,
+    new_grid,
+    robust_zscores,
+    scatter_rows,
+)
+from healthhub_batch.db_models import DailySleepSummary
+
+
+def _naive_scores(series, window, min_days):
+    """1日ずつ直前の窓から中央値・MADを求める参照実装"""
+    z = np.full(len(series), np.nan)
+    for day in range(len(series)):
+        past = series[max(day - window, 0) : day]
+        past = past[~np.isnan(past)]
+        if len(past) < min_days:
+            continue
+        median = np.median(past)
+        mad = np.median(np.abs(past - median))
+        scale = MAD_SCALE * mad if mad > 0 else MEAN_AD_SCALE * np.mean(np.abs(past - median))
+        if scale > 0:
+            z[day] = (series[day] - median) / scale
+    return z
+
+
+def test_robust_zscores_match_per_day_reference():
+    """Test the vectorized scores against a per-day loop, with gaps and flat windows."""
+    rng = np.random.default_rng(1)
+    values = np.round(rng.normal(70, 6, (20, 120))).astype(np.float32)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[3, :60] = 80  # MAD が0になる窓（平均絶対偏差で代替）
+    values[4, :] = 80  # 全日同じ値（採点しない）
+
+    scores = robust_zscores(values, window=14, min_days=7)
+
+    expected = np.array([_naive_scores(row.astype(np.float64), 14, 7) for row in values])
+    np.testing.assert_allclose(scores.z, expected, rtol=1e-4, atol=1e-4)
+    assert np.isnan(scores.z[4]).all()
+    assert np.isnan(scores.z[:, :7]).all()  # 窓の値が min_days 未満
+
+
+def test_copy_rows_are_scattered_by_user_and_day():
+    """Test decoding binary COPY output and placing rows in the grid."""
+    first_day = date(2024, 1, 1)
+    users = [UUID(int=1), UUID(int=2)]
+    epoch_days = (first_day - date(2000, 1, 1)).days
+
+    def row(user, offset, score):
+        return struct.pack(">hi16sii", 3, 16, user.bytes, 4, epoch_days + offset) + struct.pack(
+            ">if", 4, score
+        )
+
+    data = (
+        b"PGCOPY\n\xff\r\n\x00"
+        + struct.pack(">ii", 0, 0)
+        + row(users[1], 2, 81.0)
+        + row(UUID(int=9), 0, 50.0)  # 対象外のユーザー
+        + row(users[0], 0, float("nan"))
+        + struct.pack(">h", -1)
+    )
+    grid = new_grid(users, first_day, first_day + timedelta(days=3))
+    scatter_rows(grid, DailySleepSummary, decode_copy_rows(data, DailySleepSummary))
+
+    sleep = grid.values[list(ANOMALY_METRICS).index("sleep_score")]
+    assert sleep[1, 2] == 81.0
+    assert np.count_nonzero(~np.isnan(grid.values)) == 1
+
+
+def test_anomaly_records_report_only_days_from_start():
+    """Test that spikes before the start day only serve as baseline."""
+    first_day = date(2024, 1, 1)
+    grid = new_grid([UUID(int=1)], first_day, first_day + timedelta(days=59))
+    rng = np.random.default_rng(2)
+    grid.values[:] = np.round(rng.normal(60, 3, grid.values.shape))
+    sleep = list(ANOMALY_METRICS).index("sleep_score")
+    grid.values[sleep, 0, 25] = 10  # 開始日より前
+    grid.values[sleep, 0, 45] = 10
+
+    metrics, users, days = grid.values.shape
+    scores = robust_zscores(grid.values.reshape(metrics * users, days), 14, 7)
+    records = anomaly_records(grid, scores, 3.5, first_day + timedelta(days=30))
+
+    sleep_records = [r for r in records if r[2] == "sleep_score"]
+    assert [(r[1], r[3]) for r in sleep_records] == [(first_day + timedelta(days=45), 10.0)]
+    assert sleep_records[0][6] < -3.5
@@ -0,0 +1,102 @@
+"""Tests for the raw response archive."""
+import asyncio
+import fcntl
+import json
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+
+import httpx
+import zstandard as zstd
+
+from healthhub_batch.archive import INDEX_FILE, RawArchive, record_days
+from healthhub_batch.oura_client import OuraClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer
+
+USER = "00000000-0000-0000-0000-000000000001"
+
+
+def page(*days: str) -> bytes:
+    return b'{"data": [%s],\n"next_token": null}' % b", ".join(
+        b'{"day": "%s"}' % day.encode() for day in days
+    )
+
+
+def test_pages_round_trip_and_segments_are_chosen_by_day(tmp_path):
+    """Test that pages read back verbatim, filtered by the days in the index."""
+    archive = RawArchive(tmp_path)
+    archive.append(
+        USER, "daily_sleep", {"start_date": "2024-01-30"}, page("2024-01-30", "2024-02-01")
+    )
+    archive.append(USER, "daily_sleep", {"start_date": "2024-02-02"}, page("2024-02-02"))
+    archive.append(USER, "daily_sleep", {"start_date": "2024-03-01"}, page())
+
+    pages = list(archive.iter_pages(USER, "daily_sleep"))
+    assert [p.params["start_date"] for p in pages] == ["2024-01-30", "2024-02-02", "2024-03-01"]
+    assert record_days(pages[0].body) == ["2024-01-30", "2024-02-01"]
+    assert b"\n" not in pages[0].body
+
+    # 月をまたぐページは最初の日の月に入るが、索引から2月の日でも見つかる
+    february = archive.segments(USER, "daily_sleep", date(2024, 2, 1), date(2024, 2, 1))
+    assert [path.parent.name for path in february] == ["2024-01"]
+
+
+def test_torn_write_is_ignored_by_readers_and_cut_by_the_next_append(tmp_path):
+    """Test that bytes past the indexed length never reach readers."""
+    archive = RawArchive(tmp_path)
+    segment = archive.append(USER, "daily_sleep", {}, page("2024-01-01"))
+    with open(segment, "ab") as fh:
+        fh.write(b"\x28\xb5\x2f\xfd partial frame")
+
+    assert len(list(archive.iter_pages(USER, "daily_sleep"))) == 1
+
+    archive.append(USER, "daily_sleep", {}, page("2024-01-02"))
+    pages = list(archive.iter_pages(USER, "daily_sleep"))
+    assert [record_days(p.body) for p in pages] == [["2024-01-01"], ["2024-01-02"]]
+
+
+def test_malformed_lines_are_skipped(tmp_path):
+    """Test that lines without a body or with broken metadata do not stop the segment."""
+    archive = RawArchive(tmp_path)
+    segment = archive.append(USER, "daily_sleep", {}, page("2024-01-01"))
+    with open(segment, "ab") as fh:
+        for line in (b'{"endpoint":"daily_sleep"}\n', b'{"fetched_at":,"body":{}}\n'):
+            fh.write(zstd.ZstdCompressor().compress(line))
+        size = fh.tell()
+    # 壊れた行も記録済みの範囲に含める
+    index_path = segment.parent / INDEX_FILE
+    index = json.loads(index_path.read_text())
+    index[segment.name]["bytes"] = size
+    index_path.write_text(json.dumps(index))
+
+    archive.append(USER, "daily_sleep", {}, page("2024-01-02"))
+    pages = list(archive.iter_pages(USER, "daily_sleep"))
+    assert [record_days(p.body) for p in pages] == [["2024-01-01"], ["2024-01-02"]]
+
+
+async def test_client_archives_off_the_event_loop(tmp_path):
+    """Test that a month lock held by another writer does not block the event loop."""
+    server = FakeOuraServer(FakeOuraConfig())
+    archive = RawArchive(tmp_path)
+    http_client = httpx.AsyncClient(transport=server.transport(), base_url=server.base_url)
+    client = OuraClient(
+        server.token(0), http_client=http_client, archive=archive, archive_user_id=USER
+    )
+    async with http_client, client:
+        await client.get_daily_sleep("2024-12-01", "2024-12-01")
+        directory = archive.segments(USER, "daily_sleep")[0].parent
+        with open(directory / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # 別プロセスが同じ月に追記中
+            release = threading.Timer(0.5, fcntl.flock, (lock_file, fcntl.LOCK_UN))
+            release.start()
+            fetch = asyncio.create_task(client.get_daily_sleep("2024-12-02", "2024-12-02"))
+            await asyncio.sleep(0.1)  # ループが止まっていればロック解放まで戻ってこない
+            assert not fetch.done()
+            await fetch
+            release.join()
+
+    assert len(list(archive.iter_pages(USER, "daily_sleep"))) == 2
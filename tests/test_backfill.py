@@ -0,0 +1,31 @@
+"""Tests for backfill window splitting."""
+from datetime import date
+
+import pytest
+
+from healthhub_batch.backfill import split_date_range
+
+
+def test_split_date_range_covers_range_with_shared_boundaries():
+    """Test that windows cover the whole range and share boundary days."""
+    windows = split_date_range(date(2024, 1, 1), date(2024, 3, 1), 30)
+
+    assert windows == [
+        (date(2024, 1, 1), date(2024, 1, 31)),
+        (date(2024, 1, 31), date(2024, 3, 1)),
+    ]
+
+
+def test_split_date_range_single_day():
+    """Test that a one-day range yields a single window."""
+    assert split_date_range(date(2024, 1, 1), date(2024, 1, 1), 30) == [
+        (date(2024, 1, 1), date(2024, 1, 1))
+    ]
+
+
+def test_split_date_range_rejects_invalid_input():
+    """Test validation of window size and range order."""
+    with pytest.raises(ValueError, match="window_days"):
+        split_date_range(date(2024, 1, 1), date(2024, 1, 2), 0)
+    with pytest.raises(ValueError, match="before start"):
+        split_date_range(date(2024, 1, 2), date(2024, 1, 1), 30)
@@ -0,0 +1,85 @@
+"""Tests for daemon schedule computation and health reporting."""
+import asyncio
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from healthhub_batch import daemon
+from healthhub_batch.config import Settings
+from healthhub_batch.daemon import SyncDaemon, next_run_time, parse_run_times, previous_run_time
+from healthhub_batch.sync import SyncResult
+
+TOKYO = ZoneInfo("Asia/Tokyo")
+
+
+def test_run_times_are_resolved_in_local_timezone():
+    """Test previous/next slots around midnight in the configured timezone."""
+    run_times = parse_run_times(["18:30", "06:00", "06:00"])
+    now = datetime(2024, 3, 10, 20, 0, tzinfo=ZoneInfo("UTC"))  # 05:00 on 3/11 in Tokyo
+
+    assert run_times == [time(6, 0), time(18, 30)]
+    assert previous_run_time(now, run_times, TOKYO) == datetime(2024, 3, 10, 18, 30, tzinfo=TOKYO)
+    assert next_run_time(now, run_times, TOKYO) == datetime(2024, 3, 11, 6, 0, tzinfo=TOKYO)
+
+
+def test_parse_run_times_rejects_invalid_values():
+    """Test that an empty schedule or a malformed time is a configuration error."""
+    with pytest.raises(ValueError, match="at least one"):
+        parse_run_times([])
+    with pytest.raises(ValueError, match="HH:MM"):
+        parse_run_times(["6am"])
+
+
+class _Writer:
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+async def _get_status_code(sync_daemon, path):
+    reader = asyncio.StreamReader()
+    reader.feed_data(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    reader.feed_eof()
+    writer = _Writer()
+    await sync_daemon._handle_health(reader, writer)
+    return int(writer.data.split(b" ", 2)[1])
+
+
+async def test_healthz_stays_ok_while_a_failed_run_is_retried(monkeypatch):
+    """Test that /healthz is 200 during retries and 503 only after the last attempt fails."""
+    settings = Settings(
+        oura_pat="unused",
+        supabase_db_url="postgresql://localhost/unused",
+        daemon_max_retries=1,
+        daemon_retry_delay_seconds=0,
+    )
+    sync_daemon = SyncDaemon(settings, db=None)
+    sync_daemon._client = None
+    outcomes = [RuntimeError("transient"), SyncResult({}, {}, {})]
+    codes = []
+
+    async def fake_sync_user(*args):
+        codes.append(await _get_status_code(sync_daemon, "/healthz"))
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(daemon, "sync_user", fake_sync_user)
+    await sync_daemon._run_with_retries()
+    assert codes == [200, 200]  # 1回目の失敗後のリトライ中も200
+    assert await _get_status_code(sync_daemon, "/healthz") == 200
+
+    outcomes[:] = [RuntimeError("down"), RuntimeError("still down")]
+    await sync_daemon._run_with_retries()
+    assert await _get_status_code(sync_daemon, "/healthz") == 503
+    assert sync_daemon.status.consecutive_failures == 2
@@ -0,0 +1,69 @@
+"""Tests for the Arrow conversion of exported rows."""
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from healthhub_batch.db_models import (  # noqa: E402
+    DailyActivitySummary,
+    DailyResilienceSummary,
+)
+from healthhub_batch.export import arrow_type, export_columns, to_record_batch  # noqa: E402
+from healthhub_batch.series_codec import encode_class_5_min, encode_met  # noqa: E402
+
+
+def schema_of(model) -> pa.Schema:
+    return pa.schema([pa.field(c.name, arrow_type(c)) for c in export_columns(model.__table__)])
+
+
+def test_column_types_follow_the_database_types():
+    """Test that Numeric keeps precision/scale and SmallInteger stays 16-bit."""
+    resilience = schema_of(DailyResilienceSummary)
+    activity = schema_of(DailyActivitySummary)
+
+    assert resilience.field("contributors_stress").type == pa.decimal128(5, 2)
+    assert resilience.field("user_id").type == pa.string()
+    assert activity.field("score").type == pa.int16()
+    assert activity.field("steps").type == pa.int32()
+    assert activity.field("day").type == pa.date32()
+    assert activity.field("met_items").type == pa.list_(pa.float32())
+    assert "content_hash" not in activity.names
+
+
+def test_series_columns_become_lists():
+    """Test that bytea series decode into list arrays, keeping NULLs."""
+    columns = export_columns(DailyActivitySummary.__table__)
+    row = dict.fromkeys((c.name for c in columns), None)
+    user_id = UUID(int=1)
+    rows = [
+        {
+            **row,
+            "user_id": user_id,
+            "day": date(2024, 1, 1),
+            "met_items": encode_met([1.0, 2.5]),
+            "class_5_min": encode_class_5_min("015"),
+            "document_id": UUID(int=2),
+        },
+        {**row, "user_id": user_id, "day": date(2024, 1, 2), "document_id": UUID(int=3)},
+    ]
+
+    batch = to_record_batch([tuple(r.values()) for r in rows], schema_of(DailyActivitySummary))
+
+    assert batch.column("met_items").to_pylist() == [[1.0, 2.5], None]
+    assert batch.column("class_5_min").to_pylist() == [[0, 1, 5], None]
+    assert batch.column("user_id").to_pylist() == [str(user_id)] * 2
+
+
+def test_decimal_values_are_exact():
+    """Test that Numeric(5, 2) values round-trip without float conversion."""
+    columns = export_columns(DailyResilienceSummary.__table__)
+    row = {c.name: None for c in columns}
+    row.update(user_id=UUID(int=1), day=date(2024, 1, 1), document_id=UUID(int=2))
+    row["contributors_stress"] = Decimal("56.78")
+
+    batch = to_record_batch([tuple(row.values())], schema_of(DailyResilienceSummary))
+
+    assert batch.column("contributors_stress").to_pylist() == [Decimal("56.78")]
@@ -0,0 +1,48 @@
+"""Tests for the fake Oura API used by the benchmarks."""
+import sys
+from pathlib import Path
+
+import httpx
+
+from healthhub_batch.fetcher import parse_raw_data
+from healthhub_batch.oura_client import OuraClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer
+
+
+async def fetch_raw(server: FakeOuraServer, start: str, end: str) -> dict:
+    http_client = httpx.AsyncClient(transport=server.transport(), base_url=server.base_url)
+    async with http_client, OuraClient(server.token(0), http_client=http_client) as client:
+        return {
+            "daily_sleep": await client.get_daily_sleep(start, end),
+            "daily_activity": await client.get_daily_activity(start, end),
+            "daily_readiness": await client.get_daily_readiness(start, end),
+            "daily_stress": await client.get_daily_stress(start, end),
+            "daily_resilience": await client.get_daily_resilience(start, end),
+        }
+
+
+async def test_generated_documents_parse_into_models():
+    """Test that schema-generated documents validate against models.py."""
+    server = FakeOuraServer(FakeOuraConfig(page_size=3))
+    parsed = parse_raw_data(await fetch_raw(server, "2024-12-01", "2024-12-10"))
+
+    assert {data_type: len(items) for data_type, items in parsed.items()} == {
+        "sleep": 10,
+        "activity": 10,
+        "readiness": 10,
+        "stress": 10,
+        "resilience": 10,
+    }
+
+
+async def test_documents_do_not_depend_on_page_size():
+    """Test that a day's document is the same however it is paginated."""
+    small_pages = FakeOuraServer(FakeOuraConfig(page_size=2))
+    one_page = FakeOuraServer(FakeOuraConfig(page_size=30))
+
+    assert await fetch_raw(small_pages, "2024-12-01", "2024-12-05") == await fetch_raw(
+        one_page, "2024-12-01", "2024-12-05"
+    )
@@ -0,0 +1,75 @@
+"""Tests for heart rate window splitting, partitioning and fetching."""
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import UUID
+
+import httpx
+
+from healthhub_batch.heartrate import HeartrateLoader, month_partitions, split_datetime_range
+from healthhub_batch.oura_client import OuraClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer
+
+UTC = timezone.utc
+
+
+def test_split_datetime_range_does_not_overlap():
+    """Test that windows are half-open and cover the range exactly once."""
+    start = datetime(2024, 1, 1, tzinfo=UTC)
+    windows = split_datetime_range(start, start + timedelta(days=10), timedelta(days=4))
+
+    assert windows == [
+        (start, start + timedelta(days=4)),
+        (start + timedelta(days=4), start + timedelta(days=8)),
+        (start + timedelta(days=8), start + timedelta(days=10)),
+    ]
+
+
+def test_month_partitions_cover_range_in_utc():
+    """Test that partitions are whole UTC months touching the range."""
+    jst = timezone(timedelta(hours=9))
+    partitions = month_partitions(
+        datetime(2024, 2, 1, tzinfo=jst), datetime(2024, 3, 15, tzinfo=UTC)
+    )
+
+    assert partitions == [
+        (
+            "heartrate_samples_y2024m01",
+            datetime(2024, 1, 1, tzinfo=UTC),
+            datetime(2024, 2, 1, tzinfo=UTC),
+        ),
+        (
+            "heartrate_samples_y2024m02",
+            datetime(2024, 2, 1, tzinfo=UTC),
+            datetime(2024, 3, 1, tzinfo=UTC),
+        ),
+        (
+            "heartrate_samples_y2024m03",
+            datetime(2024, 3, 1, tzinfo=UTC),
+            datetime(2024, 4, 1, tzinfo=UTC),
+        ),
+    ]
+
+
+async def test_window_records_exclude_samples_outside_the_window():
+    """Test that an inclusive API range is clipped to the half-open window."""
+    server = FakeOuraServer(FakeOuraConfig(heartrate_interval=3600, heartrate_page_size=5))
+    start = datetime(2024, 12, 1, tzinfo=UTC)
+    end = start + timedelta(days=1)
+
+    http_client = httpx.AsyncClient(transport=server.transport(), base_url=server.base_url)
+    async with http_client, OuraClient(server.token(0), http_client=http_client) as client:
+        samples = [
+            sample
+            async for page in client.iter_heartrate_pages(start, end)
+            for sample in page.records
+        ]
+
+    assert len(samples) == 25  # 00:00 から翌日 00:00 まで（両端を含む）
+    records = HeartrateLoader(None, UUID(int=1))._records(start, end, samples + samples[:3])
+    assert [record[1] for record in records] == [
+        start + timedelta(hours=hour) for hour in range(24)
+    ]
@@ -0,0 +1,55 @@
+"""Import-time regression tests for the CLI entry point (``python -X importtime``)."""
+import subprocess
+import sys
+
+# --help や version だけのために読み込まれてはいけないモジュール
+HEAVY_MODULES = (
+    "asyncpg",
+    "httpx",
+    "numpy",
+    "pydantic",
+    "sqlalchemy",
+    "zstandard",
+    "structlog",
+    "healthhub_batch.config",
+    "healthhub_batch.fetcher",
+)
+
+# CLIモジュールのimportにかかる累積時間の上限（マイクロ秒）。現状は約60ms
+IMPORT_BUDGET_US = 300_000
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import ``module`` in a fresh interpreter and return cumulative µs per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_does_not_load_heavy_dependencies():
+    """Test that importing the CLI leaves DB, HTTP and model modules for the subcommands."""
+    loaded = import_times("healthhub_batch.cli")
+
+    heavy = sorted(
+        name
+        for name in loaded
+        if any(name == root or name.startswith(f"{root}.") for root in HEAVY_MODULES)
+    )
+    assert heavy == []
+
+
+def test_cli_import_time_within_budget():
+    """Test that the CLI module imports within the startup budget."""
+    cumulative = import_times("healthhub_batch.cli")["healthhub_batch.cli"]
+
+    assert cumulative < IMPORT_BUDGET_US, f"healthhub_batch.cli took {cumulative / 1000:.0f} ms"
@@ -0,0 +1,44 @@
+"""Tests for the metrics registry and its exposition formats."""
+import pytest
+
+from healthhub_batch.metrics import MetricsRegistry, record_run, track_run
+
+
+def test_render_prometheus_text_and_openmetrics():
+    """Test counter suffixes, cumulative buckets, label escaping and the EOF marker."""
+    registry = MetricsRegistry()
+    retries = registry.counter("retries", "Retried requests", ("endpoint",))
+    latency = registry.histogram("latency_seconds", "Latency", ("endpoint",), (0.1, 1.0))
+    retries.inc(endpoint='a"b')
+    retries.inc(2, endpoint='a"b')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, endpoint="x")
+
+    text = registry.render()
+    assert "# TYPE retries_total counter" in text
+    assert 'retries_total{endpoint="a\\"b"} 3.0' in text
+    assert 'latency_seconds_bucket{endpoint="x",le="0.1"} 2' in text  # le は上限を含む
+    assert 'latency_seconds_bucket{endpoint="x",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{endpoint="x",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{endpoint="x"} 3.65' in text
+    assert not text.endswith("# EOF\n")
+
+    openmetrics = registry.render(openmetrics=True)
+    assert "# TYPE retries counter" in openmetrics
+    assert openmetrics.endswith("# EOF\n")
+
+    with pytest.raises(ValueError):
+        retries.inc(status="429")
+
+
+def test_track_run_records_outcome_and_writes_textfile(tmp_path):
+    """Test that a failing run is labelled as an error and the textfile is still written."""
+    path = tmp_path / "healthhub.prom"
+
+    with pytest.raises(RuntimeError), track_run("test-run", str(path)):
+        raise RuntimeError("boom")
+    record_run("test-run", 2.0, True)
+
+    text = path.read_text()
+    assert 'healthhub_run_duration_seconds_count{command="test-run",outcome="error"} 1' in text
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,68 @@
+"""Tests for OuraClient pagination against the fake Oura API."""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+
+from healthhub_batch.oura_client import OuraClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer
+
+
+def _client(server: FakeOuraServer, transport: httpx.AsyncBaseTransport | None = None):
+    http_client = httpx.AsyncClient(
+        transport=transport or server.transport(), base_url=server.base_url
+    )
+    return http_client, OuraClient(server.token(0), http_client=http_client)
+
+
+async def test_pages_are_followed_until_the_last_token():
+    """Test that a range longer than one page is fetched page by page, in day order."""
+    server = FakeOuraServer(FakeOuraConfig(page_size=3))
+    http_client, client = _client(server)
+    async with http_client, client:
+        pages = [
+            page async for page in client.iter_pages("daily_sleep", "2024-12-01", "2024-12-10")
+        ]
+
+    assert [len(page["data"]) for page in pages] == [3, 3, 3, 1]
+    days = [record["day"] for page in pages for record in page["data"]]
+    assert days == [f"2024-12-{day:02d}" for day in range(1, 11)]
+    assert server.requests == 4
+
+
+async def test_repeated_next_token_stops_pagination():
+    """Test that a server returning the same next_token again does not loop forever."""
+    server = FakeOuraServer(FakeOuraConfig(page_size=3))
+
+    async def same_token(request: httpx.Request) -> httpx.Response:
+        response = await server.handle(request)
+        body = json.loads(response.content)
+        body["next_token"] = "Mw=="
+        return httpx.Response(response.status_code, json=body)
+
+    http_client, client = _client(server, httpx.MockTransport(same_token))
+    async with http_client, client:
+        pages = [
+            page async for page in client.iter_pages("daily_sleep", "2024-12-01", "2024-12-10")
+        ]
+
+    assert len(pages) == 2
+    assert server.requests == 2
+
+
+async def test_early_break_cancels_and_awaits_the_prefetch():
+    """Test that leaving the loop early leaves no prefetch request running."""
+    server = FakeOuraServer(FakeOuraConfig(page_size=3, latency=0.05))
+    http_client, client = _client(server)
+    async with http_client, client:
+        pages = client.iter_pages("daily_sleep", "2024-12-01", "2024-12-10")
+        async for _ in pages:
+            break  # 2ページ目の先読みが進行中
+        await pages.aclose()
+
+        assert asyncio.all_tasks() == {asyncio.current_task()}
@@ -0,0 +1,60 @@
+"""Tests for direct-from-bytes page parsing."""
+import json
+
+from healthhub_batch.models import DailyStress
+from healthhub_batch.parsing import parse_page, peek_next_token
+
+
+def stress(day: str, **overrides) -> dict:
+    return {
+        "id": f"id-{day}",
+        "day": day,
+        "stress_high": 3600,
+        "recovery_high": 1800,
+        "day_summary": "normal",
+        **overrides,
+    }
+
+
+def test_parse_page_validates_all_records():
+    """Test that a valid page is parsed into models with its next_token."""
+    body = json.dumps(
+        {"data": [stress("2024-01-01"), stress("2024-01-02")], "next_token": "abc"}
+    ).encode()
+
+    page = parse_page(body, DailyStress)
+
+    assert [r.day.isoformat() for r in page.records] == ["2024-01-01", "2024-01-02"]
+    assert all(isinstance(r, DailyStress) for r in page.records)
+    assert page.next_token == "abc"
+    assert page.rejected == 0
+
+
+def test_parse_page_skips_only_invalid_records():
+    """Test that one malformed record is skipped and counted, not the whole page."""
+    body = json.dumps(
+        {
+            "data": [
+                stress("2024-01-01"),
+                stress("not-a-date"),
+                stress("2024-01-03", stress_high="lots"),
+                stress("2024-01-04"),
+            ],
+            "next_token": None,
+        }
+    ).encode()
+
+    page = parse_page(body, DailyStress)
+
+    assert [r.day.isoformat() for r in page.records] == ["2024-01-01", "2024-01-04"]
+    assert page.rejected == 2
+    assert page.rejected_days == ("not-a-date", "2024-01-03")
+    assert page.next_token is None
+
+
+def test_peek_next_token_ignores_records():
+    """Test that next_token is read even when records would fail validation."""
+    body = json.dumps({"data": [{"day": "not-a-date"}], "next_token": "abc"}).encode()
+
+    assert peek_next_token(body) == "abc"
+    assert peek_next_token(b'{"data": []}') is None
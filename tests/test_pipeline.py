@@ -0,0 +1,67 @@
+"""Tests for the streaming ingest pipeline."""
+import json
+import sys
+from pathlib import Path
+from uuid import UUID
+
+import httpx
+import pytest
+
+from healthhub_batch.fetcher import ENDPOINT_MODELS
+from healthhub_batch.oura_client import OuraClient
+from healthhub_batch.pipeline import _DONE, IngestPipeline
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from fake_oura_server import FakeOuraConfig, FakeOuraServer
+
+
+@pytest.mark.parametrize("parallel_tables", [False, True])
+async def test_queued_pages_of_failed_endpoint_are_dropped(parallel_tables):
+    """Test that both load modes skip pages of an endpoint that failed after queuing them."""
+    pipeline = IngestPipeline(
+        None, None, UUID(int=1), ENDPOINT_MODELS, parallel_tables=parallel_tables
+    )
+    written = []
+
+    async def load_page(data_type, rows):
+        written.append((data_type, rows))
+
+    pipeline._load_page = load_page
+    for page, data_type in enumerate(("sleep", "activity", "sleep")):
+        pipeline.queues["load"].put_nowait((data_type, [{"page": page}]))
+    pipeline.queues["load"].put_nowait(_DONE)
+    pipeline.errors["daily_sleep"] = "fetch failed"
+
+    await pipeline._load()
+
+    assert [data_type for data_type, _ in written] == ["activity"]
+
+
+async def test_invalid_class_5_min_rejects_only_that_record():
+    """Test that a class_5_min outside 0-5 is counted as rejected and the run completes."""
+    server = FakeOuraServer(FakeOuraConfig(page_size=10))
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        response = await server.handle(request)
+        if not request.url.path.endswith("/daily_activity"):
+            return response
+        body = json.loads(response.content)
+        body["data"][0]["class_5_min"] = "0129"
+        return httpx.Response(response.status_code, json=body)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handle), base_url=server.base_url)
+    written = []
+
+    async def load_page(data_type, rows):
+        written.extend((data_type, row["day"]) for row in rows)
+
+    async with http_client, OuraClient(server.token(0), http_client=http_client) as client:
+        pipeline = IngestPipeline(client, None, UUID(int=1), ENDPOINT_MODELS, log_interval=0)
+        pipeline._load_page = load_page
+        result = await pipeline.run("2024-12-01", "2024-12-03")
+
+    assert result.errors == {}
+    assert result.rejected == {"activity": 1}
+    assert sum(data_type == "activity" for data_type, _ in written) == 2
+    assert sum(data_type == "sleep" for data_type, _ in written) == 3
@@ -0,0 +1,86 @@
+"""Tests for the adaptive rate limiter."""
+from datetime import datetime, timezone
+
+from healthhub_batch.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+
+class FakeClock:
+    """Manually advanced clock whose sleep just moves time forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(clock: FakeClock, **kwargs) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(clock=clock, sleep=clock.sleep, jitter=0.0, **kwargs)
+
+
+def test_parse_retry_after():
+    """Test delay-seconds and HTTP-date forms of Retry-After."""
+    now = datetime(2024, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+    assert parse_retry_after("30") == 30.0
+    assert parse_retry_after("Mon, 01 Jan 2024 00:00:10 GMT", now=now) == 10.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+async def test_acquire_allows_burst_then_paces():
+    """Test that the bucket allows a burst and then waits 1/rate per request."""
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=2.0, burst=2)
+
+    await limiter.acquire()
+    await limiter.acquire()
+    assert clock.slept == []
+
+    await limiter.acquire()
+    assert clock.slept == [0.5]
+
+
+async def test_rate_limited_pauses_client_and_lowers_rate():
+    """Test that a 429 pauses every caller for Retry-After and halves the rate."""
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=4.0, burst=4)
+
+    pause = limiter.on_rate_limited(retry_after=3.0, fallback=1.0)
+    assert pause == 3.0
+    assert limiter.current_rate == 2.0
+
+    await limiter.acquire()
+    assert clock.now >= 3.0
+
+
+async def test_requests_after_pause_are_paced_without_burst():
+    """Test that a pause does not refill the bucket and concurrent 429s halve the rate once."""
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=4.0, burst=4)
+
+    limiter.on_rate_limited(retry_after=3.0, fallback=1.0)
+    limiter.on_rate_limited(retry_after=2.0, fallback=1.0)  # 同時に送っていた別リクエストの429
+    assert limiter.current_rate == 2.0
+
+    for _ in range(3):
+        await limiter.acquire()
+    assert clock.slept == [3.0, 0.5, 0.5, 0.5]
+
+
+def test_rate_recovers_and_reacts_to_low_remaining_header():
+    """Test additive recovery on success and slowdown on low remaining quota."""
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=4.0, recovery_step=1.0)
+
+    limiter.on_rate_limited(retry_after=None, fallback=1.0)
+    limiter.on_response({})
+    assert limiter.current_rate == 3.0
+
+    limiter.on_response({"X-RateLimit-Remaining": "5", "X-RateLimit-Limit": "5000"})
+    assert limiter.current_rate == 1.5
@@ -0,0 +1,82 @@
+"""Tests for the repository read cache."""
+from datetime import date
+from types import SimpleNamespace
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from healthhub_batch.read_cache import ReadCache, ReadCacheStats
+from healthhub_batch.repository import HealthDataRepository
+
+USER = UUID(int=1)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_ttl_are_counted():
+    """Test that the least recently used entry is evicted and old entries expire."""
+    clock = _Clock()
+    cache = ReadCache(max_entries=2, ttl=10.0, clock=clock)
+    for day in (1, 2):
+        cache.put(USER, "sleep", date(2024, 1, day), date(2024, 1, 7), [day], 0)
+
+    assert cache.get(USER, "sleep", date(2024, 1, 1), date(2024, 1, 7)) == [1]
+    cache.put(USER, "sleep", date(2024, 1, 3), date(2024, 1, 7), [3], 0)  # 2日始まりを追い出す
+    assert cache.get(USER, "sleep", date(2024, 1, 2), date(2024, 1, 7)) is None
+
+    clock.now = 10.0
+    assert cache.get(USER, "sleep", date(2024, 1, 3), date(2024, 1, 7)) is None
+    assert cache.stats() == ReadCacheStats(
+        hits=1, misses=2, evictions=1, expirations=1, invalidations=0, entries=1
+    )
+
+
+def test_invalidate_drops_only_ranges_containing_written_days():
+    """Test precise invalidation and that reads racing a write are not stored."""
+    cache = ReadCache()
+    cache.put(USER, "sleep", date(2024, 1, 1), date(2024, 1, 7), ["week1"], 0)
+    cache.put(USER, "sleep", date(2024, 1, 8), date(2024, 1, 14), ["week2"], 0)
+    cache.put(USER, "activity", date(2024, 1, 1), date(2024, 1, 7), ["act"], 0)
+    cache.put(UUID(int=2), "sleep", date(2024, 1, 1), date(2024, 1, 7), ["other"], 0)
+
+    generation = cache.generation(USER, "sleep")
+    assert cache.invalidate(USER, "sleep", [date(2024, 1, 7), date(2023, 12, 31)]) == 1
+
+    assert cache.get(USER, "sleep", date(2024, 1, 1), date(2024, 1, 7)) is None
+    assert cache.get(USER, "sleep", date(2024, 1, 8), date(2024, 1, 14)) == ["week2"]
+    assert cache.get(USER, "activity", date(2024, 1, 1), date(2024, 1, 7)) == ["act"]
+    assert cache.get(UUID(int=2), "sleep", date(2024, 1, 1), date(2024, 1, 7)) == ["other"]
+
+    # 書き込み前に読み始めた結果は入れない
+    cache.put(USER, "sleep", date(2024, 1, 1), date(2024, 1, 7), ["stale"], generation)
+    assert cache.get(USER, "sleep", date(2024, 1, 1), date(2024, 1, 7)) is None
+    assert cache.stats().invalidations == 1
+
+
+def test_repository_invalidates_after_commit_but_not_after_rollback():
+    """Test that days written in a rolled-back transaction are not invalidated on a later commit."""
+    cache = ReadCache()
+    session = Session()
+    repo = HealthDataRepository(SimpleNamespace(sync_session=session), USER, cache=cache)
+
+    session.begin()
+    repo._invalidate("sleep", [date(2024, 1, 3)])
+    session.rollback()
+    generation = cache.generation(USER, "sleep")
+    cache.put(USER, "sleep", date(2024, 1, 1), date(2024, 1, 7), ["week1"], generation)
+
+    session.begin()
+    repo._invalidate("sleep", [date(2024, 1, 10)])
+    # コミット前に読み直された古い行はコミット後に捨てられる
+    generation = cache.generation(USER, "sleep")
+    cache.put(USER, "sleep", date(2024, 1, 8), date(2024, 1, 14), ["stale"], generation)
+    session.commit()
+
+    assert cache.get(USER, "sleep", date(2024, 1, 1), date(2024, 1, 7)) == ["week1"]
+    assert cache.get(USER, "sleep", date(2024, 1, 8), date(2024, 1, 14)) is None
@@ -0,0 +1,71 @@
+"""Tests for the keyset-paginated read API of HealthDataRepository."""
+from datetime import date, timedelta
+from types import SimpleNamespace
+from uuid import UUID
+
+from sqlalchemy.dialects import postgresql
+
+from healthhub_batch.repository import DayRecords, HealthDataRepository
+
+START = date(2024, 1, 1)
+
+
+class _PagedSession:
+    """Session stub returning pre-built pages and recording the statements."""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.statements = []
+        self.expunged = 0
+
+    async def scalars(self, stmt):
+        self.statements.append(stmt)
+        page = self.pages.pop(0)
+        return SimpleNamespace(all=lambda: page)
+
+    def expunge(self, record):
+        self.expunged += 1
+
+
+def _rows(days):
+    return [SimpleNamespace(day=START + timedelta(days=i)) for i in days]
+
+
+async def test_iter_records_pages_by_last_day_without_offset():
+    """Test that each page starts after the last day of the previous one."""
+    session = _PagedSession([_rows([0, 1]), _rows([2, 3]), _rows([4])])
+    repo = HealthDataRepository(session, UUID(int=1))
+
+    records = [r async for r in repo.iter_records("sleep", START, date(2024, 12, 31), 2)]
+
+    assert [r.day for r in records] == [START + timedelta(days=i) for i in range(5)]
+    assert session.expunged == 5
+    sql = [
+        str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        for stmt in session.statements
+    ]
+    assert "day > '2024-01-02'" in sql[1]
+    assert "day > '2024-01-04'" in sql[2]
+    assert all("OFFSET" not in s and "LIMIT 2" in s for s in sql)
+
+
+async def test_iter_days_merges_tables_by_day():
+    """Test that rows of several tables are joined by day, with gaps left out."""
+    tables = {"sleep": _rows([0, 1, 3]), "readiness": _rows([1, 2, 3])}
+    repo = HealthDataRepository(None, UUID(int=1))
+
+    async def iter_records(data_type, start_day, end_day, page_size):
+        for record in tables[data_type]:
+            yield record
+
+    repo.iter_records = iter_records
+    days = [d async for d in repo.iter_days(["sleep", "readiness"], START, START)]
+
+    assert [d.day for d in days] == [START + timedelta(days=i) for i in range(4)]
+    assert [sorted(d.records) for d in days] == [
+        ["sleep"],
+        ["readiness", "sleep"],
+        ["readiness"],
+        ["readiness", "sleep"],
+    ]
+    assert isinstance(days[0], DayRecords)
@@ -0,0 +1,71 @@
+"""Tests for the on-disk Oura response cache."""
+import os
+from datetime import date
+
+from healthhub_batch.response_cache import ResponseCache
+
+
+class FakeClock:
+    """Manually advanced wall clock."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_key_depends_on_endpoint_params_and_alias():
+    """Test that the same request for another token alias is a different entry."""
+    params = {"start_date": "2024-01-01", "end_date": "2024-01-07"}
+
+    assert ResponseCache.key("daily_sleep", params, "alice") == ResponseCache.key(
+        "daily_sleep", dict(reversed(params.items())), "alice"
+    )
+    assert ResponseCache.key("daily_sleep", params, "alice") != ResponseCache.key(
+        "daily_sleep", params, "bob"
+    )
+    assert ResponseCache.key("daily_sleep", params, "alice") != ResponseCache.key(
+        "daily_activity", params, "alice"
+    )
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    """Test hits before the TTL and a miss after it."""
+    clock = FakeClock()
+    cache = ResponseCache(tmp_path, clock=clock)
+
+    cache.put("k", b'{"data": []}', ttl=60)
+    assert cache.get("k") == b'{"data": []}'
+
+    clock.now += 61
+    assert cache.get("k") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_closed_ranges_get_longer_ttl(tmp_path):
+    """Test that ranges ending a few days ago use closed_ttl."""
+    cache = ResponseCache(tmp_path, ttl=10, closed_ttl=1000)
+    today = date(2024, 3, 10)
+
+    assert cache.ttl_for({"end_date": "2024-03-01"}, today) == 1000
+    assert cache.ttl_for({"end_date": "2024-03-10"}, today) == 10
+
+
+def test_evicts_least_recently_used_when_over_size(tmp_path):
+    """Test that the oldest entry is removed once max_bytes is exceeded."""
+    # 1エントリはヘッダ行（有効期限）+ 本文20バイト。2件までしか収まらない
+    cache = ResponseCache(tmp_path, max_bytes=100)
+    cache.put("old", b"x" * 20, ttl=60)
+    cache.put("new", b"y" * 20, ttl=60)
+    old_path = tmp_path / "old.cache"
+    new_path = tmp_path / "new.cache"
+    # mtimeの分解能に依存しないように明示的に並べる
+    os.utime(old_path, (1, 1))
+    os.utime(new_path, (2, 2))
+
+    cache.put("newest", b"z" * 20, ttl=60)
+
+    assert cache.get("old") is None
+    assert cache.get("new") == b"y" * 20
+    assert cache.get("newest") == b"z" * 20
@@ -0,0 +1,58 @@
+"""Tests for rollup period bucketing and refresh statements."""
+from datetime import date, timedelta
+
+from healthhub_batch.db_models import DailyActivitySummary, DailyResilienceSummary
+from healthhub_batch.rollups import (
+    _REFRESH_WHERE,
+    _rollup_sql,
+    period_end,
+    refresh_rollups,
+    touched_periods,
+)
+
+
+def test_touched_periods_use_iso_weeks_and_months():
+    """Test that days map to Monday-started weeks and calendar months."""
+    days = [date(2024, 12, 29), date(2024, 12, 30), date(2025, 1, 5), date(2025, 1, 6)]
+
+    assert touched_periods(days, "week") == [
+        date(2024, 12, 23),
+        date(2024, 12, 30),
+        date(2025, 1, 6),
+    ]
+    assert touched_periods(days, "month") == [date(2024, 12, 1), date(2025, 1, 1)]
+    assert period_end(date(2024, 12, 30), "week") == date(2025, 1, 6)
+    assert period_end(date(2024, 1, 1), "month") == date(2024, 2, 1)
+    assert all(period_end(date(2024, m, 1), "month").day == 1 for m in range(1, 13))
+
+
+async def test_refresh_rollups_recomputes_only_touched_periods():
+    """Test that the refresh reads the touched range and skips tables without metrics."""
+
+    class _Connection:
+        def __init__(self):
+            self.calls = []
+
+        async def execute(self, sql, *args):
+            self.calls.append((sql, args))
+
+    conn = _Connection()
+    start = date(2024, 3, 30)
+    refreshed = await refresh_rollups(
+        conn, DailyActivitySummary, None, [start, start + timedelta(days=2), date(2024, 5, 2)]
+    )
+
+    assert refreshed == 3 + 3  # 週: 3/25, 4/1, 4/29 / 月: 3月, 4月, 5月
+    (week_sql, week_args), (month_sql, month_args) = conn.calls
+    assert week_sql == _rollup_sql(DailyActivitySummary, "week", _REFRESH_WHERE)
+    assert "healthhub.weekly_rollups" in week_sql and "'steps', t.steps::float8" in week_sql
+    assert week_args[1:3] == (date(2024, 3, 25), date(2024, 5, 6))
+    assert month_sql == _rollup_sql(DailyActivitySummary, "month", _REFRESH_WHERE)
+    assert "healthhub.monthly_rollups" in month_sql
+    assert "date_trunc('month', t.day::timestamp)::date = ANY($4::date[])" in month_sql
+    assert month_args[1:] == (
+        date(2024, 3, 1),
+        date(2024, 6, 1),
+        [date(2024, 3, 1), date(2024, 4, 1), date(2024, 5, 1)],
+    )
+    assert await refresh_rollups(conn, DailyResilienceSummary, None, [start]) == 0
@@ -0,0 +1,42 @@
+"""Tests for the intraday series encoding."""
+import numpy as np
+import pytest
+
+from healthhub_batch.series_codec import (
+    decode_class_5_min,
+    decode_class_5_min_matrix,
+    decode_met,
+    decode_met_matrix,
+    encode_class_5_min,
+    encode_met,
+)
+
+
+def test_met_round_trip_keeps_missing_samples_as_nan():
+    """Test that MET packs to 4 bytes per sample and decodes back."""
+    data = encode_met([1.5, None, 0.9])
+
+    assert len(data) == 12
+    np.testing.assert_array_equal(decode_met(data), np.array([1.5, np.nan, 0.9], dtype="<f4"))
+
+
+def test_class_5_min_stores_one_byte_per_slot():
+    """Test that class digits are stored as their values, not ASCII."""
+    data = encode_class_5_min("012345")
+
+    assert data == bytes([0, 1, 2, 3, 4, 5])
+    assert decode_class_5_min(data).tolist() == [0, 1, 2, 3, 4, 5]
+    for invalid in ("0126", "01/", "01あ"):
+        with pytest.raises(ValueError, match="digits 0-5"):
+            encode_class_5_min(invalid)
+
+
+def test_matrix_decode_pads_short_and_missing_days():
+    """Test that days of different lengths become one padded array."""
+    met = decode_met_matrix([encode_met([1.0, 2.0]), None, encode_met([3.0])])
+    classes = decode_class_5_min_matrix([encode_class_5_min("12"), encode_class_5_min("34")])
+
+    np.testing.assert_array_equal(
+        met, np.array([[1.0, 2.0], [np.nan, np.nan], [3.0, np.nan]], dtype="<f4")
+    )
+    assert classes.tolist() == [[1, 2], [3, 4]]